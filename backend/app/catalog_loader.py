@@ -0,0 +1,192 @@
+"""
+Loads the local datasets into the typed catalog tables (see models.py).
+
+Each dataset is read through its search engine, so the stored rows are the
+ones search returns: Flipkart colour variants are collapsed, prices are
+parsed and converted to INR, and table snapshots are reused. Prices,
+ratings, discounts and counts become numbers; fields only one dataset has go
+to that dataset's attribute table. Reload everything, or only some datasets,
+with
+
+    python -m app.catalog_loader [flipkart_mobiles electronics amazon general_dataset fashion]
+"""
+
+import math
+import re
+import sys
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from search import get_master_search
+from search.base_search import parse_int, parse_price
+from .crud import catalog_key, ensure_catalog_schema
+from .database import Base, SessionLocal, engine
+from .models import AmazonAttributes, CatalogProduct, ElectronicsAttributes, FashionAttributes, FlipkartMobileAttributes, GeneralDatasetAttributes
+
+def _text(row, field):
+    """Stripped string of a cell, or None when it is missing or blank"""
+    value = row.get(field)
+    if value is None or pd.isnull(value):
+        return None
+    return str(value).strip() or None
+
+def _number(value):
+    """Python float of a parsed value, or None for missing / NaN"""
+    if value is None or math.isnan(value):
+        return None
+    return float(value)
+
+def _flipkart_mobiles_row(row):
+    brand, model = _text(row, 'Brand'), _text(row, 'Model')
+    product = {
+        'title': f"{brand} {model}" if brand and model else 'Mobile Phone',
+        'brand': brand,
+        'category': 'Mobiles',
+        'original_price': parse_price(row.get('Original Price')),
+    }
+    attributes = {
+        'model': model,
+        'memory': _text(row, 'Memory'),
+        'storage': _text(row, 'Storage'),
+        'colors': _text(row, 'Color'),
+        'variant_colors': _text(row, 'Variant Colors'),
+        'variant_prices': _text(row, 'Variant Prices'),
+        'max_price': parse_price(row.get('Max Selling Price')),
+    }
+    return product, attributes
+
+def _electronics_row(row):
+    # 'Rated 4.8 out of 5 stars based on 125 reviews.'
+    reviews = re.search(r'based on ([\d,]+)', _text(row, 'Rating') or '')
+    product = {
+        'title': _text(row, 'Title') or 'Electronics Product',
+        'category': _text(row, 'Sub Category'),
+        'rating_count': int(reviews.group(1).replace(',', '')) if reviews else None,
+    }
+    return product, {'discount': _text(row, 'Discount'), 'feature': _text(row, 'Feature')}
+
+def _amazon_row(row):
+    product = {
+        'title': _text(row, 'product_name') or 'Amazon Product',
+        'category': _text(row, 'main_category'),
+        'original_price': parse_price(row.get('actual_price')),
+        'discount_percentage': parse_int(row.get('discount_percentage')),
+        'image': _text(row, 'img_link'),
+        'url': _text(row, 'product_link'),
+    }
+    attributes = {
+        'amazon_product_id': _text(row, 'product_id'),
+        'category_path': _text(row, 'category'),
+        'about_product': _text(row, 'about_product'),
+        'review_title': _text(row, 'review_title'),
+        'review_content': _text(row, 'review_content'),
+    }
+    return product, attributes
+
+def _general_dataset_row(row):
+    product = {
+        'title': _text(row, 'title') or 'Product',
+        'category': _text(row, 'category_1'),
+        'original_price': parse_price(row.get('mrp')),
+        'image': _text(row, 'image_links'),
+    }
+    attributes = {
+        'category_2': _text(row, 'category_2'),
+        'category_3': _text(row, 'category_3'),
+        'seller_name': _text(row, 'seller_name'),
+        'seller_rating': parse_price(row.get('seller_rating')),
+        'description': _text(row, 'description'),
+        'highlights': _text(row, 'highlights'),
+    }
+    return product, attributes
+
+def _fashion_row(row):
+    product = {
+        'title': _text(row, 'title') or 'Fashion Item',
+        'brand': _text(row, 'brand'),
+        'category': 'Fashion',
+        'original_price': parse_price(row.get('actual_price')),
+        'image': _text(row, 'img'),
+        'url': _text(row, 'url'),
+    }
+    return product, {'fashion_id': _text(row, 'id')}
+
+# Search engine name -> (attribute table, row mapper returning (product, attributes) fields)
+SOURCES = {
+    'flipkart_mobiles': (FlipkartMobileAttributes, _flipkart_mobiles_row),
+    'electronics': (ElectronicsAttributes, _electronics_row),
+    'amazon': (AmazonAttributes, _amazon_row),
+    'general_dataset': (GeneralDatasetAttributes, _general_dataset_row),
+    'fashion': (FashionAttributes, _fashion_row),
+}
+
+def catalog_rows(source, search_engine):
+    """``(product, attributes)`` fields of every row of a dataset, prices and ratings as numbers"""
+    _, row_fields = SOURCES[source]
+    catalog = search_engine.catalog
+    table = catalog.table
+    # parse_price reads the first number of a cell ('4.2', 'Rated 4.8 out of 5 ...', '24,269')
+    ratings = table[search_engine.rating_field].tolist() if search_engine.rating_field in table.columns else [None] * len(table)
+    rating_counts = table[search_engine.rating_count_field].tolist() if search_engine.rating_count_field in table.columns else [None] * len(table)
+
+    for row_id, row in enumerate(table.to_dict('records')):
+        price = _number(catalog.price[row_id])
+        rating_count = parse_price(rating_counts[row_id])
+        product = {
+            'source': source,
+            'source_row': row_id,
+            'brand': None,
+            'category': None,
+            'price': price,
+            'currency': catalog.currency[row_id] if price is not None else None,
+            'canonical_price': _number(catalog.canonical_price[row_id]),
+            'original_price': None,
+            'discount_percentage': None,
+            'rating': parse_price(ratings[row_id]),
+            'rating_count': int(rating_count) if rating_count is not None else None,
+            'image': None,
+            'url': None,
+        }
+        fields, attributes = row_fields(row)
+        product.update(fields)
+        product['brand_key'] = catalog_key(product['brand'])
+        product['category_key'] = catalog_key(product['category'])
+        # Derive the discount where the dataset only has both prices
+        original_price = product['original_price']
+        if product['discount_percentage'] is None and price is not None and original_price and original_price > price:
+            product['discount_percentage'] = round((1 - price / original_price) * 100, 1)
+        yield product, attributes
+
+def load_source(db, source, search_engine):
+    """Replace a dataset's catalog rows in one transaction; returns the number of products loaded"""
+    attribute_model, _ = SOURCES[source]
+    rows = list(catalog_rows(source, search_engine))
+    source_ids = select(CatalogProduct.id).where(CatalogProduct.source == source)
+    db.execute(delete(attribute_model).where(attribute_model.product_id.in_(source_ids)))
+    db.execute(delete(CatalogProduct).where(CatalogProduct.source == source))
+    if rows:
+        statement = insert(CatalogProduct).returning(CatalogProduct.id, sort_by_parameter_order=True)
+        product_ids = db.execute(statement, [product for product, _ in rows]).scalars().all()
+        db.execute(insert(attribute_model), [{**attributes, 'product_id': product_id} for product_id, (_, attributes) in zip(product_ids, rows)])
+    db.commit()
+    return len(rows)
+
+def load_catalog(sources=None, bind=engine):
+    """Load the given datasets (all by default); returns ``{source: products loaded}``"""
+    Base.metadata.create_all(bind=bind)
+    ensure_catalog_schema(bind)
+    search_engines = get_master_search().search_engines
+    loaded = {}
+    with SessionLocal(bind=bind) as db:
+        for source in sources or SOURCES:
+            if source not in SOURCES:
+                raise ValueError(f"Unknown catalog source '{source}'. Available sources: {list(SOURCES)}")
+            try:
+                loaded[source] = load_source(db, source, search_engines[source])
+            except Exception as e:
+                db.rollback()
+                print(f"[catalog_loader] Error loading {source}: {e}")
+    return loaded
+
+if __name__ == '__main__':
+    for source, count in load_catalog(sys.argv[1:]).items():
+        print(f"{source}: {count} products")
@@ -1,19 +1,129 @@
-
+from sqlalchemy import delete, insert, inspect, select
 from sqlalchemy.orm import Session
-from .models import Product
+from .models import CatalogProduct, Product
 from datetime import datetime, timedelta
+import os
 
 CACHE_TTL = timedelta(hours=6)
+# Entries past CACHE_TTL are still served (and refreshed in the background)
+# until they are this old; older ones are scraped again before answering
+CACHE_MAX_STALENESS = max(CACHE_TTL, timedelta(seconds=float(os.getenv("CACHE_MAX_STALENESS", "86400"))))
+
+# Columns format_products reads; cache lookups load only these
+CACHED_COLUMNS = (Product.title, Product.price, Product.rating, Product.image)
+
+# Columns a scraped item may fill (anything else it carries is ignored)
+ITEM_COLUMNS = frozenset(Product.__mapper__.column_attrs.keys()) - {"id", "platform", "query", "fetched_at"}
+
+def ensure_cache_schema(bind):
+    """Create the products cache table and its indexes.
+
+    A table created before the current columns existed is dropped and
+    recreated: it only caches scraper results, which are fetched again.
+    """
+    table = Product.__table__
+    inspector = inspect(bind)
+    if inspector.has_table(table.name):
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        if not {column.name for column in table.columns} <= existing:
+            table.drop(bind)
+    table.create(bind, checkfirst=True)
+    for index in table.indexes:
+        index.create(bind, checkfirst=True)
+
+# The catalog products table and the attribute tables keyed by its ids
+CATALOG_TABLES = [
+    table for table in CatalogProduct.metadata.sorted_tables
+    if table is CatalogProduct.__table__ or any(key.column.table is CatalogProduct.__table__ for key in table.foreign_keys)
+]
+
+def ensure_catalog_schema(bind):
+    """Create the catalog tables, dropping them first when they predate the current columns.
+
+    They only hold what ``python -m app.catalog_loader`` loads from the
+    datasets, so an outdated catalog stays empty until it is loaded again.
+    """
+    table = CatalogProduct.__table__
+    inspector = inspect(bind)
+    if inspector.has_table(table.name):
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        if not {column.name for column in table.columns} <= existing:
+            CatalogProduct.metadata.drop_all(bind, tables=CATALOG_TABLES)
+    CatalogProduct.metadata.create_all(bind, tables=CATALOG_TABLES)
+
+def catalog_key(value):
+    """Lower-cased, stripped brand or category the catalog filters compare (None when blank)"""
+    if value is None:
+        return None
+    return value.strip().lower() or None
 
 def get_cached(db: Session, platform: str, query: str):
-    cutoff = datetime.utcnow() - CACHE_TTL
-    return db.query(Product).filter(Product.platform==platform, Product.query==query, Product.fetched_at>=cutoff).all()
+    """Cached rows of a query that are still fresh (within CACHE_TTL)"""
+    return get_cached_with_age(db, platform, query, max_age=CACHE_TTL)[0]
+
+def get_cached_with_age(db: Session, platform: str, query: str, max_age: timedelta = CACHE_MAX_STALENESS):
+    """Cached rows of a query no older than ``max_age``, and the entry's age (None when nothing is cached)"""
+    cutoff = datetime.utcnow() - max_age
+    # Served by the (platform, query, fetched_at) index
+    statement = select(*CACHED_COLUMNS, Product.fetched_at).where(Product.platform == platform, Product.query == query, Product.fetched_at >= cutoff)
+    rows = db.execute(statement).all()
+    if not rows:
+        return [], None
+    return rows, datetime.utcnow() - min(row.fetched_at for row in rows)
 
 def cache_products(db: Session, platform: str, query: str, items: list[dict]):
-    db.query(Product).filter(Product.platform==platform, Product.query==query).delete()
-    for item in items:
-        db.add(Product(platform=platform, query=query, **item))
+    """Replace the cached results of a query: one DELETE and one multi-row INSERT in a single transaction"""
+    fetched_at = datetime.utcnow()
+    rows = [
+        {**{key: value for key, value in item.items() if key in ITEM_COLUMNS}, "platform": platform, "query": query, "fetched_at": fetched_at}
+        for item in items
+    ]
+    db.execute(delete(Product).where(Product.platform == platform, Product.query == query))
+    if rows:
+        db.execute(insert(Product), rows)
     db.commit()
 
 def format_products(db_items):
     return [{"title": p.title, "price": p.price, "rating": p.rating, "image": p.image} for p in db_items]
+
+# Orderings of catalog queries; each is served by an index on its column
+CATALOG_SORTS = {
+    "price": CatalogProduct.canonical_price.asc(),
+    "price_desc": CatalogProduct.canonical_price.desc(),
+    "rating": CatalogProduct.rating.desc(),
+}
+
+def query_catalog(db: Session, category: str = None, brand: str = None, source: str = None, min_price: float = None,
+                  max_price: float = None, min_rating: float = None, sort: str = "price", limit: int = 20):
+    """Catalog products matching the filters, filtered, sorted and limited in SQL (prices in INR)"""
+    if sort not in CATALOG_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'. Available sorts: {list(CATALOG_SORTS)}")
+    statement = select(CatalogProduct)
+    # Brand and category match regardless of case, on their lower-cased columns
+    if category is not None:
+        statement = statement.where(CatalogProduct.category_key == catalog_key(category))
+    if brand is not None:
+        statement = statement.where(CatalogProduct.brand_key == catalog_key(brand))
+    if source is not None:
+        statement = statement.where(CatalogProduct.source == source)
+    if min_price is not None:
+        statement = statement.where(CatalogProduct.canonical_price >= min_price)
+    if max_price is not None:
+        statement = statement.where(CatalogProduct.canonical_price <= max_price)
+    if min_rating is not None:
+        statement = statement.where(CatalogProduct.rating >= min_rating)
+    # Products without the sort value are left out rather than sorted first
+    sort_column = CatalogProduct.rating if sort == "rating" else CatalogProduct.canonical_price
+    statement = statement.where(sort_column.is_not(None)).order_by(CATALOG_SORTS[sort], CatalogProduct.id)
+    return db.execute(statement.limit(limit)).scalars().all()
+
+def format_catalog_products(catalog_items):
+    return [
+        {
+            "title": p.title, "brand": p.brand, "category": p.category, "source": p.source,
+            "price": p.price, "currency": p.currency, "canonical_price": p.canonical_price, "original_price": p.original_price,
+            "discount_percentage": p.discount_percentage, "rating": p.rating, "rating_count": p.rating_count,
+            "image": p.image, "url": p.url
+        }
+        for p in catalog_items
+    ]
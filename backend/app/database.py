@@ -1,10 +1,70 @@
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./products.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# Connection pool (file SQLite databases and server databases)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite pragmas set on every new connection. WAL lets readers run while a
+# write is in progress, NORMAL sync is durable under WAL except on power loss,
+# and busy_timeout makes writers wait for the lock instead of failing.
+# Incremental auto-vacuum (which only applies to files created with it)
+# lets the cache maintenance release free pages without a full VACUUM.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+def _sqlite_pragmas(in_memory):
+    pragmas = [
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        # A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if not in_memory:
+        pragmas += ["PRAGMA auto_vacuum=INCREMENTAL", f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}", f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}"]
+    return pragmas
+
+def create_database_engine(database_url=DATABASE_URL):
+    """Engine for ``database_url``: tuned SQLite, or a pre-pinged connection pool for a server database"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    in_memory = url.database in (None, "", ":memory:")
+    # In-memory databases keep SQLAlchemy's single-connection pool
+    pool_options = {} if in_memory else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool_options)
+    pragmas = _sqlite_pragmas(in_memory)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return sqlite_engine
+
+engine = create_database_engine()
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
@@ -2,6 +2,8 @@ import os
 import google.generativeai as genai # type: ignore
 from dotenv import load_dotenv
 import requests
+import httpx
+import asyncio
 import json
 import re
 
@@ -145,4 +147,75 @@ def generate_multiple_product_images(products):
         image_result = generate_product_image(product_name)
         results.append(image_result)
     
-    return results 
\ No newline at end of file
+    return results
+
+
+async def get_unsplash_image_async(client, product_name):
+    """
+    Async version of get_unsplash_image using a shared httpx client
+    """
+    if not UNSPLASH_ACCESS_KEY:
+        return None
+    url = "https://api.unsplash.com/search/photos"
+    params = {
+        "query": product_name,
+        "client_id": UNSPLASH_ACCESS_KEY,
+        "per_page": 1
+    }
+    try:
+        response = await client.get(url, params=params)
+        data = response.json()
+        if data.get("results"):
+            return data["results"][0]["urls"]["regular"]
+    except Exception as e:
+        print(f"Unsplash error: {e}")
+    return None
+
+async def generate_product_image_async(client, product_name, product_type=""):
+    """
+    Async version of generate_product_image: Unsplash first, then the placeholder
+    """
+    unsplash_url = await get_unsplash_image_async(client, f"{product_name} {product_type} product photo")
+    if unsplash_url:
+        return {
+            "success": True,
+            "image_url": unsplash_url,
+            "product_name": product_name,
+            "generated": False,
+            "source": "unsplash"
+        }
+    try:
+        prompt_name = product_name
+        if product_type:
+            prompt_name += f" {product_type}"
+        prompt_name += " product photo"
+        clean_name = re.sub(r'[^\w\s-]', '', prompt_name)
+        clean_name = clean_name.replace(" ", ",").replace("-", ",")
+        clean_name = clean_name[:50]
+        url = f"https://picsum.photos/400/400?random={hash(clean_name) % 1000}"
+        response = await client.head(url)
+        if response.status_code == 200:
+            return {
+                "success": True,
+                "image_url": url,
+                "product_name": product_name,
+                "generated": True,
+                "source": "prompt-enhanced"
+            }
+    except Exception:
+        pass
+    return get_fallback_image(product_name)
+
+async def generate_multiple_product_images_async(products):
+    """
+    Look up images for multiple products concurrently
+    """
+    product_names = []
+    for product in products:
+        if isinstance(product, dict):
+            product_names.append(product.get('title', product.get('name', 'Product')))
+        else:
+            product_names.append(str(product))
+
+    async with httpx.AsyncClient(timeout=5) as client:
+        return await asyncio.gather(*(generate_product_image_async(client, name) for name in product_names))
@@ -3,20 +3,26 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from .database import SessionLocal, engine
 from .models import Base, User
-from .crud import get_cached, cache_products, format_products
+from .crud import get_cached_with_age, cache_products, format_products, ensure_cache_schema, ensure_catalog_schema, CACHE_TTL, query_catalog, format_catalog_products
 from .scraping import get_flipkart, get_amazon
-from .chatgpt import ask_chatgpt, ask_chatgpt_general  # Updated to return JSON from GPT
-# Use the new master search system
-from search import MasterSearch
-
-# Instantiate master search (singleton for the app)
-master_search = MasterSearch()
+from . import maintenance
+from .chatgpt import ask_chatgpt_async, ask_chatgpt_general_async  # Updated to return JSON from GPT
+# Shared master search instance (created on first use, see search/service.py)
+from search import get_master_search, search_async, start_warmup
+from search import service as search_service
+from search.query_cache import normalize_query
+from search.single_flight import AsyncSingleFlight
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+import asyncio
 import datetime
+import os
+import time
+from contextlib import asynccontextmanager
 
 
 
@@ -25,8 +31,24 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 Base.metadata.create_all(bind=engine)
+ensure_cache_schema(engine)
+ensure_catalog_schema(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse the datasets in the background so the worker starts serving right away
+    if os.getenv("SEARCH_WARMUP", "1") != "0":
+        start_warmup()
+    # One-off full VACUUM of an older SQLite file, at startup rather than on
+    # import, and before any request is served
+    maintenance.enable_incremental_vacuum(engine)
+    # Delete expired scraper cache rows in the background
+    maintenance.start_eviction()
+    yield
+    maintenance.stop_eviction()
+    search_service.shutdown()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -112,36 +134,190 @@ def me(current_user: User = Depends(get_current_user)):
         "username": current_user.username
     }
 
+# Identical requests that arrive while one is being answered share its result
+search_flight = AsyncSingleFlight()
+chat_flight = AsyncSingleFlight()
+# Background refreshes of stale scraper cache entries, at most one per (platform, query)
+refresh_flight = AsyncSingleFlight()
+_refresh_tasks = set()
+# After a failed refresh (scraper error or no items) the entry is not scraped
+# again for this many seconds, so every request for it does not retry
+CACHE_REFRESH_COOLDOWN = float(os.getenv("CACHE_REFRESH_COOLDOWN", "300"))
+# (platform, query) -> time.monotonic() of its last failed refresh, oldest
+# first; entries past the cooldown are dropped whenever a failure is recorded
+_refresh_failures = {}
+
 @app.get("/search")
-def search(query: str, db: Session = Depends(get_db)):
+async def search(query: str, ranking: str = None, include_facets: bool = False):
+    # ranking: "match_count" (default), "bm25" or "semantic"
+    # include_facets: add brand/category/price counts of all matching catalog products
+    try:
+        return await search_flight.do((normalize_query(query), ranking, include_facets), lambda: _shared_search(query, ranking, include_facets))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _shared_search(query: str, ranking: str = None, include_facets: bool = False):
+    # Callers are merged on the normalized query, so scrape and cache with it
+    # too rather than with whichever spelling arrived first
+    query = normalize_query(query)
+    # The shared run outlives any single request, so it uses its own session
+    db = SessionLocal()
+    try:
+        return await _search_products(query, db, ranking, include_facets)
+    finally:
+        db.close()
+
+async def _search_products(query: str, db: Session, ranking: str = None, include_facets: bool = False):
     # 1. Try to find products in local datasets using the new master search
-    dataset_results = master_search.search_all_datasets(query)
+    # (CPU-bound, so it runs on the search thread pool instead of the event loop)
+    dataset_results = await search_async("search_all_datasets", query, ranking=ranking, include_facets=include_facets)
     if dataset_results:
-        return {"source": "dataset", "products": dataset_results}
+        # Cards are compact records inside the search package; the response gets plain dicts
+        response = {"source": "dataset", "products": dataset_results.to_dicts()}
+        if dataset_results.partial:
+            response["timed_out"] = dataset_results.timed_out
+        if include_facets:
+            response["facets"] = dataset_results.facets
+        return response
     results = {}
+    cache_age = {}
 
+    # The database session and scrapers are blocking, so they run in the threadpool
     for platform, scraper in [("flipkart", get_flipkart), ("amazon", get_amazon)]:
-        cached = get_cached(db, platform, query)
+        cached, age = await run_in_threadpool(get_cached_with_age, db, platform, query)
         if cached:
             results[platform] = format_products(cached)
+            if age > CACHE_TTL:
+                # Expired but not past CACHE_MAX_STALENESS: answer now, scrape again in the background
+                cache_age[platform] = round(age.total_seconds())
+                _schedule_refresh(platform, query, scraper)
         else:
-            items = scraper(query)
+            items = await run_in_threadpool(scraper, query)
             if items:
-                cache_products(db, platform, query, items)
+                await run_in_threadpool(cache_products, db, platform, query, items)
                 results[platform] = items
             else:
                 results[platform] = []
 
     # If no products found, always return intro + product list (no confirmation)
     if not (results["flipkart"] or results["amazon"]):
-        ai_response = ask_chatgpt(query)
+        ai_response = await ask_chatgpt_async(query)
         return {"source": "ai", "ai_response": ai_response}
 
-    return {"source": "scraper", "results": results}
+    response = {"source": "scraper", "results": results}
+    if cache_age:
+        response["cache_age_seconds"] = cache_age
+    return response
+
+def _schedule_refresh(platform: str, query: str, scraper):
+    """Refresh a stale cache entry in the background; returns the task, or None while the entry cools down"""
+    key = (platform, query)
+    failed_at = _refresh_failures.get(key)
+    if failed_at is not None:
+        if time.monotonic() - failed_at < CACHE_REFRESH_COOLDOWN:
+            return None
+        del _refresh_failures[key]
+    task = asyncio.ensure_future(refresh_flight.do(key, lambda: _refresh_cached(platform, query, scraper)))
+    # Keep a reference until it finishes, the event loop only holds weak ones
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+    return task
+
+async def _refresh_cached(platform: str, query: str, scraper):
+    db = SessionLocal()
+    try:
+        items = await run_in_threadpool(scraper, query)
+        if items:
+            await run_in_threadpool(cache_products, db, platform, query, items)
+            return
+    except Exception as e:
+        print(f"[main] Error refreshing the {platform} cache for '{query}': {e}")
+    finally:
+        db.close()
+    _record_refresh_failure((platform, query))
+
+def _record_refresh_failure(key):
+    now = time.monotonic()
+    # Re-inserting keeps the dict ordered by failure time
+    _refresh_failures.pop(key, None)
+    _refresh_failures[key] = now
+    # Drop the failures whose cooldown is over, stopping at the first one still cooling down
+    while _refresh_failures:
+        oldest_key, failed_at = next(iter(_refresh_failures.items()))
+        if now - failed_at < CACHE_REFRESH_COOLDOWN:
+            break
+        del _refresh_failures[oldest_key]
+
+MAX_BATCH_QUERIES = int(os.getenv("SEARCH_MAX_BATCH_QUERIES", "50"))
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str]
+    ranking: str = None
+
+@app.post("/search/batch")
+async def search_batch(batch: BatchSearchRequest):
+    if len(batch.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch.")
+
+    # One pass over each dataset for all queries; this also warms the result cache
+    try:
+        dataset_results = await search_async("search_many", batch.queries, ranking=batch.ranking)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def respond(query, products):
+        if products:
+            response = {"source": "dataset", "products": products.to_dicts()}
+            if products.partial:
+                response["timed_out"] = products.timed_out
+            return response
+        # No catalog hit: same scraper/AI fallback as a single /search
+        return await search_flight.do((normalize_query(query), batch.ranking, False), lambda: _shared_search(query, batch.ranking))
+
+    responses = await asyncio.gather(*(respond(query, products) for query, products in zip(batch.queries, dataset_results)))
+    return {"results": [{"query": query, **response} for query, response in zip(batch.queries, responses)]}
+
+@app.get("/autocomplete")
+async def autocomplete(q: str, limit: int = 8):
+    # Prefix lookups are sub-millisecond once the datasets are loaded; the
+    # search pool keeps a first, loading call off the event loop
+    suggestions = await search_async("autocomplete", q, max(1, min(limit, 20)))
+    return {"query": q, "suggestions": suggestions}
 
 class ChatRequest(BaseModel):
     message: str
 
 @app.post("/chat")
-def chat_endpoint(chat: ChatRequest):
-    return ask_chatgpt_general(chat.message)
+async def chat_endpoint(chat: ChatRequest):
+    return await chat_flight.do(normalize_query(chat.message), lambda: ask_chatgpt_general_async(chat.message))
+
+MAX_CATALOG_RESULTS = int(os.getenv("CATALOG_MAX_RESULTS", "100"))
+
+@app.get("/catalog")
+def catalog(category: str = None, brand: str = None, source: str = None, min_price: float = None, max_price: float = None,
+            min_rating: float = None, sort: str = "price", limit: int = 20, db: Session = Depends(get_db)):
+    # Filters and sorting run in the database on the typed catalog tables
+    # (prices in INR; load them with `python -m app.catalog_loader`)
+    try:
+        products = query_catalog(db, category, brand, source, min_price, max_price, min_rating, sort, min(limit, MAX_CATALOG_RESULTS))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"products": format_catalog_products(products)}
+
+@app.get("/search/stats")
+def search_stats():
+    master_search = get_master_search()
+    return {
+        "cache": master_search.get_cache_stats(),
+        "single_flight": {
+            "search": search_flight.stats(),
+            "chat": chat_flight.stats(),
+            "master_search": master_search.get_single_flight_stats(),
+            "cache_refresh": {
+                **refresh_flight.stats(),
+                # Expired failures are pruned as new ones are recorded
+                "cooling_down": len(_refresh_failures)
+            }
+        },
+        "scraper_cache": maintenance.stats()
+    }
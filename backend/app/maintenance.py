@@ -0,0 +1,187 @@
+"""
+Background maintenance of the scraper result cache (the ``products`` table).
+
+Lookups ignore rows older than ``CACHE_MAX_STALENESS`` but nothing removes
+them, so the table and its indexes keep growing. ``start_eviction()`` runs a
+daemon thread that periodically deletes expired rows in small batches (one
+short transaction each, so live requests can write between batches),
+refreshes the planner statistics with ANALYZE, and on SQLite returns free
+pages to the file system with an incremental vacuum once enough of the file
+is free. ``stats()`` reports what it did and how large the table is.
+
+A full VACUUM locks the whole database while it rewrites the file, so it
+only runs once, at startup, to switch a file created before incremental
+vacuuming was enabled (see ``enable_incremental_vacuum()``).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, select, text
+from .crud import CACHE_TTL, CACHE_MAX_STALENESS
+from .database import SessionLocal, engine
+from .models import Product
+
+# Seconds between eviction runs (0 disables the background task)
+EVICTION_INTERVAL = float(os.getenv("CACHE_EVICTION_INTERVAL", "600"))
+# Rows deleted per transaction, and the pause between two batches
+EVICTION_BATCH_SIZE = int(os.getenv("CACHE_EVICTION_BATCH_SIZE", "500"))
+EVICTION_BATCH_PAUSE = float(os.getenv("CACHE_EVICTION_BATCH_PAUSE", "0.05"))
+# ANALYZE (and possibly vacuum) every this many runs
+COMPACT_EVERY_RUNS = int(os.getenv("CACHE_COMPACT_EVERY_RUNS", "6"))
+# SQLite files are vacuumed once at least this share of their pages is free,
+# releasing at most this many pages per run to keep the write lock short
+VACUUM_FREE_RATIO = float(os.getenv("CACHE_VACUUM_FREE_RATIO", "0.25"))
+VACUUM_MAX_PAGES = int(os.getenv("CACHE_VACUUM_MAX_PAGES", "2000"))
+# PRAGMA auto_vacuum value of incremental mode
+INCREMENTAL = 2
+
+_stats = {
+    "runs": 0,
+    "rows_evicted": 0,
+    "last_run_at": None,
+    "last_run_evicted": 0,
+    "last_run_seconds": 0.0,
+    "last_compacted_at": None,
+    "last_vacuumed_at": None,
+}
+_stats_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+def evict_expired(batch_size=EVICTION_BATCH_SIZE, pause=EVICTION_BATCH_PAUSE, stop=None, bind=engine):
+    """Delete cache rows older than CACHE_MAX_STALENESS, at most ``batch_size`` per transaction; returns the count.
+
+    Setting the ``stop`` event ends the loop after the current batch.
+    """
+    cutoff = datetime.utcnow() - CACHE_MAX_STALENESS
+    expired = select(Product.id).where(Product.fetched_at < cutoff).limit(batch_size)
+    evicted = 0
+    while True:
+        with SessionLocal(bind=bind) as db:
+            # Read the ids, then delete by id list: MySQL rejects a LIMIT
+            # inside an IN subquery
+            ids = db.scalars(expired).all()
+            db.commit()
+            if ids:
+                db.execute(delete(Product).where(Product.id.in_(ids), Product.fetched_at < cutoff))
+                db.commit()
+        evicted += len(ids)
+        if len(ids) < batch_size or (stop is not None and stop.is_set()):
+            break
+        # Let requests waiting on the write lock go first
+        time.sleep(pause)
+    return evicted
+
+def table_size(bind=engine):
+    """Rows in the products table, plus file and free-page bytes on SQLite"""
+    with bind.connect() as connection:
+        size = {"rows": connection.execute(select(func.count()).select_from(Product)).scalar()}
+        if bind.dialect.name == "sqlite":
+            page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+            size["file_bytes"] = connection.exec_driver_sql("PRAGMA page_count").scalar() * page_size
+            size["free_bytes"] = connection.exec_driver_sql("PRAGMA freelist_count").scalar() * page_size
+    return size
+
+def enable_incremental_vacuum(bind=engine):
+    """Switch a SQLite file to incremental auto-vacuum; returns whether it had to be converted.
+
+    New files are created in that mode (see database.py). Older ones need
+    one full VACUUM, which locks the database, so call this at startup
+    before serving requests.
+    """
+    if bind.dialect.name != "sqlite":
+        return False
+    # VACUUM cannot run inside a transaction
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == INCREMENTAL:
+            return False
+        connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.exec_driver_sql("VACUUM")
+    return True
+
+def compact(bind=engine, max_pages=VACUUM_MAX_PAGES):
+    """Refresh the planner statistics; on SQLite also release free pages when much of the file is free.
+
+    Returns whether an incremental vacuum ran. Server databases vacuum on
+    their own, so they only get ANALYZE.
+    """
+    with bind.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+
+    if bind.dialect.name != "sqlite":
+        return False
+    size = table_size(bind)
+    if not size["file_bytes"] or size["free_bytes"] < VACUUM_FREE_RATIO * size["file_bytes"]:
+        return False
+    connection = bind.raw_connection()
+    try:
+        sqlite_connection = connection.driver_connection
+        if sqlite_connection.execute("PRAGMA auto_vacuum").fetchone()[0] != INCREMENTAL:
+            return False
+        # sqlite3's execute() frees a single page; executescript() runs the pragma to the end
+        sqlite_connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    finally:
+        connection.close()
+    return True
+
+def run_once(compact_now=False, stop=None, bind=engine):
+    """One maintenance run: evict expired rows, and compact when asked"""
+    started = time.perf_counter()
+    evicted = evict_expired(stop=stop, bind=bind)
+    vacuumed = compact(bind) if compact_now else False
+
+    now = datetime.utcnow().isoformat()
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["rows_evicted"] += evicted
+        _stats["last_run_at"] = now
+        _stats["last_run_evicted"] = evicted
+        _stats["last_run_seconds"] = round(time.perf_counter() - started, 4)
+        if compact_now:
+            _stats["last_compacted_at"] = now
+        if vacuumed:
+            _stats["last_vacuumed_at"] = now
+    return evicted
+
+def _run_forever(interval):
+    runs = 0
+    while not _stop.wait(interval):
+        runs += 1
+        try:
+            run_once(compact_now=COMPACT_EVERY_RUNS > 0 and runs % COMPACT_EVERY_RUNS == 0, stop=_stop)
+        except Exception as e:
+            print(f"[maintenance] Error evicting expired cache rows: {e}")
+
+def start_eviction(interval=EVICTION_INTERVAL):
+    """Run the maintenance every ``interval`` seconds in a background thread"""
+    global _thread
+    if interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return _thread
+    _stop.clear()
+    _thread = threading.Thread(target=_run_forever, args=(interval,), name="cache-eviction", daemon=True)
+    _thread.start()
+    return _thread
+
+def stop_eviction():
+    """Stop the background thread (an evicting batch finishes first)"""
+    global _thread
+    _stop.set()
+    thread, _thread = _thread, None
+    if thread is not None:
+        thread.join(timeout=5)
+
+def stats():
+    """Eviction counters and the current size of the products table"""
+    with _stats_lock:
+        report = dict(_stats)
+    report["ttl_seconds"] = CACHE_TTL.total_seconds()
+    report["max_staleness_seconds"] = CACHE_MAX_STALENESS.total_seconds()
+    try:
+        report["table"] = table_size()
+    except Exception as e:
+        print(f"[maintenance] Error reading the products table size: {e}")
+        report["table"] = None
+    return report
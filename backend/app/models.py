@@ -1,57 +1,103 @@
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, func, UniqueConstraint, Index
 from .database import Base
 
 class Product(Base):
+    """Scraper results cached per (platform, query); dataset products live in CatalogProduct"""
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(String, index=True)
-    product_name = Column(String)
+    platform = Column(String)
+    query = Column(String)
+    fetched_at = Column(DateTime, default=func.now())
+    # Scraper result fields returned by format_products
+    title = Column(String)
+    price = Column(String)
+    rating = Column(String)
+    image = Column(String)
+    product_link = Column(String)
+    # Cache lookups filter on all three columns, most selective prefix first;
+    # eviction of expired rows (see maintenance.py) scans by age alone
+    __table_args__ = (
+        Index('ix_products_platform_query_fetched_at', 'platform', 'query', 'fetched_at'),
+        Index('ix_products_fetched_at', 'fetched_at'),
+    )
+
+class CatalogProduct(Base):
+    """A product of one of the local datasets, with typed columns for SQL filtering and sorting.
+
+    Dataset-specific fields are in the ``*Attributes`` table of its source,
+    keyed by the product id (see catalog_loader.py).
+    """
+    __tablename__ = "catalog_products"
+    id = Column(Integer, primary_key=True)
+    # Search engine name ('flipkart_mobiles', 'amazon', ...) and row in its dataset
+    source = Column(String, nullable=False)
+    source_row = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    brand = Column(String)
     category = Column(String)
-    category_1 = Column(String)
+    # Lower-cased brand and category the filters match on (see crud.catalog_key)
+    brand_key = Column(String)
+    category_key = Column(String)
+    # Price in the dataset's currency, and in INR so sources compare
+    price = Column(Float)
+    currency = Column(String)
+    canonical_price = Column(Float)
+    original_price = Column(Float)
+    discount_percentage = Column(Float)
+    rating = Column(Float)
+    rating_count = Column(Integer)
+    image = Column(String)
+    url = Column(String)
+    __table_args__ = (
+        UniqueConstraint('source', 'source_row', name='uq_catalog_products_source_row'),
+        Index('ix_catalog_products_category_price', 'category_key', 'canonical_price'),
+        Index('ix_catalog_products_brand_price', 'brand_key', 'canonical_price'),
+        Index('ix_catalog_products_canonical_price', 'canonical_price'),
+        Index('ix_catalog_products_rating', 'rating'),
+    )
+
+class FlipkartMobileAttributes(Base):
+    __tablename__ = "flipkart_mobile_attributes"
+    product_id = Column(Integer, ForeignKey("catalog_products.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String)
+    memory = Column(String)
+    storage = Column(String)
+    colors = Column(String)
+    # Separator-joined colour and price of every variant (see FlipkartMobilesSearch)
+    variant_colors = Column(String)
+    variant_prices = Column(String)
+    max_price = Column(Float)
+
+class ElectronicsAttributes(Base):
+    __tablename__ = "electronics_attributes"
+    product_id = Column(Integer, ForeignKey("catalog_products.id", ondelete="CASCADE"), primary_key=True)
+    discount = Column(String)
+    feature = Column(String)
+
+class AmazonAttributes(Base):
+    __tablename__ = "amazon_attributes"
+    product_id = Column(Integer, ForeignKey("catalog_products.id", ondelete="CASCADE"), primary_key=True)
+    amazon_product_id = Column(String, index=True)
+    category_path = Column(String)
+    about_product = Column(String)
+    review_title = Column(String)
+    review_content = Column(String)
+
+class GeneralDatasetAttributes(Base):
+    __tablename__ = "general_dataset_attributes"
+    product_id = Column(Integer, ForeignKey("catalog_products.id", ondelete="CASCADE"), primary_key=True)
     category_2 = Column(String)
     category_3 = Column(String)
-    discounted_price = Column(String)
-    actual_price = Column(String)
-    discount_percentage = Column(String)
-    rating = Column(String)
-    product_rating = Column(String)
-    rating_count = Column(String)
     seller_name = Column(String)
-    seller_rating = Column(String)
-    about_product = Column(String)
+    seller_rating = Column(Float)
     description = Column(String)
     highlights = Column(String)
-    user_id = Column(String)
-    user_name = Column(String)
-    review_id = Column(String)
-    review_title = Column(String)
-    review_content = Column(String)
-    img_link = Column(String)
-    image_links = Column(String)
-    product_link = Column(String)
-    platform = Column(String, index=True)
-    query = Column(String, index=True)
-    fetched_at = Column(DateTime, default=func.now())
-    # Flipkart and ElectronicsData fields
-    Brand = Column(String)
-    Model = Column(String)
-    Color = Column(String)
-    Memory = Column(String)
-    Storage = Column(String)
-    Selling_Price = Column(String)
-    Original_Price = Column(String)
-    Sub_Category = Column(String)
-    Price = Column(String)
-    Discount = Column(String)
-    Currency = Column(String)
-    Feature = Column(String)
-    # Data - Copy.csv fields
-    data_copy_id = Column(String)
-    data_copy_brand = Column(String)
-    sold_price = Column(String)
-    url = Column(String)
-    img = Column(String)
+
+class FashionAttributes(Base):
+    __tablename__ = "fashion_attributes"
+    product_id = Column(Integer, ForeignKey("catalog_products.id", ondelete="CASCADE"), primary_key=True)
+    fashion_id = Column(String)
 
 class User(Base):
     __tablename__ = "users"
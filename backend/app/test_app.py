@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Test script for the API's database layer.
+Every test runs against its own temporary SQLite file, never products.db.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The app reads its settings on import: point it at a scratch database and
+# keep the background warm-up and eviction threads off
+TEST_DIR = tempfile.mkdtemp(prefix="app-tests-")
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'products.db')}"
+os.environ["SEARCH_WARMUP"] = "0"
+os.environ["CACHE_EVICTION_INTERVAL"] = "0"
+
+def _temp_database():
+    """Engine and session factory of a new, empty SQLite file"""
+    from sqlalchemy.orm import sessionmaker
+    from app.database import create_database_engine
+    path = tempfile.mkstemp(suffix=".db", dir=TEST_DIR)[1]
+    os.remove(path)
+    engine = create_database_engine(f"sqlite:///{path}")
+    return engine, sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+def _scraped(count, prefix="Phone"):
+    return [
+        {"title": f"{prefix} {i}", "price": f"₹{10000 + i}", "rating": "4.2", "image": f"https://img/{i}.jpg", "product_link": f"https://shop/{i}", "seller": "ignored"}
+        for i in range(count)
+    ]
+
+def test_cache_products():
+    """Test that a query's scraped items are stored with one INSERT and replace its earlier rows"""
+    print("\n🗄️ Testing Scraper Cache Writes...")
+
+    from sqlalchemy import event
+    from app.crud import cache_products, ensure_cache_schema, format_products, get_cached_with_age
+    engine, Session = _temp_database()
+    ensure_cache_schema(engine)
+
+    inserts = []
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            inserts.append(len(parameters) if executemany else 1)
+
+    with Session() as db:
+        cache_products(db, "flipkart", "phone", _scraped(50))
+        cache_products(db, "amazon", "phone", _scraped(3, "Amazon"))
+        assert inserts == [50, 3]
+
+        rows, age = get_cached_with_age(db, "flipkart", "phone")
+        assert len(rows) == 50 and age.total_seconds() < 60
+        assert {row.title for row in rows} == {f"Phone {i}" for i in range(50)}
+        assert format_products(rows[:1])[0].keys() == {"title", "price", "rating", "image"}
+
+        # Writing the query again replaces its rows, other platforms keep theirs
+        cache_products(db, "flipkart", "phone", _scraped(2, "Refreshed"))
+        rows, _ = get_cached_with_age(db, "flipkart", "phone")
+        assert sorted(row.title for row in rows) == ["Refreshed 0", "Refreshed 1"]
+        assert len(get_cached_with_age(db, "amazon", "phone")[0]) == 3
+
+        # No items clears the query
+        cache_products(db, "flipkart", "phone", [])
+        assert get_cached_with_age(db, "flipkart", "phone") == ([], None)
+    print(f"   ✅ Rows per INSERT: {inserts}")
+
+def test_cache_schema_migration():
+    """Test that ensure_cache_schema rebuilds an outdated products table and keeps a current one"""
+    print("\n🧱 Testing Cache Schema Migration...")
+
+    from sqlalchemy import inspect
+    from app.crud import cache_products, ensure_cache_schema, get_cached_with_age
+    from app.models import Product
+    engine, Session = _temp_database()
+
+    # The wide dataset-shaped table the cache used to be stored in
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE products (id INTEGER PRIMARY KEY, product_name VARCHAR, discounted_price VARCHAR, img_link VARCHAR, platform VARCHAR, query VARCHAR, fetched_at DATETIME, Brand VARCHAR)")
+        connection.exec_driver_sql("INSERT INTO products (product_name, platform, query) VALUES ('Old phone', 'flipkart', 'phone')")
+
+    ensure_cache_schema(engine)
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("products")}
+    assert {"title", "price", "image", "product_link"} <= columns and "product_name" not in columns
+    assert {index.name for index in Product.__table__.indexes} <= {index["name"] for index in inspector.get_indexes("products")}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM products").scalar() == 0
+
+    # An up to date table keeps its rows
+    with Session() as db:
+        cache_products(db, "flipkart", "phone", _scraped(2))
+    ensure_cache_schema(engine)
+    with Session() as db:
+        assert len(get_cached_with_age(db, "flipkart", "phone")[0]) == 2
+    print(f"   ✅ Columns: {sorted(columns)}")
+
+def test_cache_age():
+    """Test the age reported for a cached query and the staleness cut-off"""
+    print("\n⏳ Testing Cache Age...")
+
+    from datetime import datetime, timedelta
+    from sqlalchemy import update
+    from app.crud import CACHE_MAX_STALENESS, cache_products, ensure_cache_schema, get_cached, get_cached_with_age
+    from app.models import Product
+    engine, Session = _temp_database()
+    ensure_cache_schema(engine)
+
+    with Session() as db:
+        cache_products(db, "flipkart", "phone", _scraped(2))
+        assert len(get_cached(db, "flipkart", "phone")) == 2
+        db.execute(update(Product).values(fetched_at=datetime.utcnow() - timedelta(hours=7)))
+        db.commit()
+        rows, age = get_cached_with_age(db, "flipkart", "phone")
+        assert len(rows) == 2 and timedelta(hours=7) <= age < timedelta(hours=7, minutes=1)
+        assert get_cached_with_age(db, "flipkart", "phone", max_age=timedelta(hours=6)) == ([], None)
+        # Past CACHE_TTL the entry is no longer fresh
+        assert get_cached(db, "flipkart", "phone") == []
+
+        db.execute(update(Product).values(fetched_at=datetime.utcnow() - CACHE_MAX_STALENESS - timedelta(minutes=1)))
+        db.commit()
+        assert get_cached_with_age(db, "flipkart", "phone") == ([], None)
+    print(f"   ✅ Age of a 7 hour old entry: {age}")
+
+def _age_rows(db, platform, query, age):
+    from datetime import datetime
+    from sqlalchemy import update
+    from app.models import Product
+    db.execute(update(Product).where(Product.platform == platform, Product.query == query).values(fetched_at=datetime.utcnow() - age))
+    db.commit()
+
+def test_cache_eviction():
+    """Test that expired cache rows are deleted in batches, by id list, and fresh ones kept"""
+    print("\n🧹 Testing Cache Eviction...")
+
+    from datetime import timedelta
+    from sqlalchemy import event
+    from app import maintenance
+    from app.crud import CACHE_MAX_STALENESS, cache_products, ensure_cache_schema, get_cached_with_age
+    engine, Session = _temp_database()
+    ensure_cache_schema(engine)
+    with Session() as db:
+        cache_products(db, "flipkart", "phone", _scraped(5))
+        cache_products(db, "amazon", "phone", _scraped(4))
+        cache_products(db, "flipkart", "laptop", _scraped(3))
+        _age_rows(db, "flipkart", "phone", CACHE_MAX_STALENESS + timedelta(minutes=1))
+        _age_rows(db, "amazon", "phone", CACHE_MAX_STALENESS + timedelta(minutes=1))
+
+    deletes = []
+    @event.listens_for(engine, "before_cursor_execute")
+    def record_deletes(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE"):
+            deletes.append(statement)
+
+    assert maintenance.evict_expired(batch_size=4, pause=0, bind=engine) == 9
+    # 4 + 4 + 1 rows, and no LIMIT inside the DELETE (MySQL rejects it)
+    assert len(deletes) == 3 and not any("LIMIT" in statement for statement in deletes)
+    with Session() as db:
+        assert get_cached_with_age(db, "flipkart", "phone", max_age=timedelta(days=365)) == ([], None)
+        assert len(get_cached_with_age(db, "flipkart", "laptop")[0]) == 3
+    assert maintenance.evict_expired(bind=engine) == 0
+    assert maintenance.table_size(engine)["rows"] == 3
+    # New files are created with incremental auto-vacuum
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == maintenance.INCREMENTAL
+    print(f"   ✅ Evicted 9 rows in {len(deletes)} batches")
+
+def test_cache_compaction():
+    """Test that compaction releases free pages incrementally and converts older files once"""
+    print("\n🗜️ Testing Cache Compaction...")
+
+    import sqlite3
+    from contextlib import closing
+    from datetime import timedelta
+    from app import maintenance
+    from app.crud import CACHE_MAX_STALENESS, cache_products, ensure_cache_schema
+    engine, Session = _temp_database()
+
+    # A file created before incremental vacuuming was enabled
+    with closing(sqlite3.connect(engine.url.database)) as connection:
+        connection.executescript("CREATE TABLE legacy (id INTEGER PRIMARY KEY);")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 0
+    assert maintenance.enable_incremental_vacuum(engine)
+    assert not maintenance.enable_incremental_vacuum(engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == maintenance.INCREMENTAL
+
+    ensure_cache_schema(engine)
+    with Session() as db:
+        cache_products(db, "flipkart", "phone", [{**item, "title": item["title"] * 200} for item in _scraped(2000)])
+        _age_rows(db, "flipkart", "phone", CACHE_MAX_STALENESS + timedelta(minutes=1))
+    maintenance.evict_expired(pause=0, bind=engine)
+    before = maintenance.table_size(engine)
+    assert before["free_bytes"] > maintenance.VACUUM_FREE_RATIO * before["file_bytes"]
+
+    # A run releases about max_pages pages (ANALYZE itself may reuse a few)
+    assert maintenance.compact(engine, max_pages=10)
+    with engine.connect() as connection:
+        page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+    assert 10 * page_size <= before["free_bytes"] - maintenance.table_size(engine)["free_bytes"] <= 20 * page_size
+    assert maintenance.compact(engine)
+    after = maintenance.table_size(engine)
+    assert after["file_bytes"] < before["file_bytes"] and after["free_bytes"] < before["free_bytes"]
+    # Too little free space left to bother
+    assert not maintenance.compact(engine)
+    print(f"   ✅ File: {before['file_bytes']} -> {after['file_bytes']} bytes")
+
+@contextmanager
+def _patched(target, **attributes):
+    """Temporarily replace module attributes"""
+    saved = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+def test_startup_vacuum():
+    """Test that an older SQLite file is switched to incremental vacuum at startup, not on import"""
+    print("\n🚀 Testing Startup Vacuum...")
+
+    import sqlite3
+    from contextlib import closing
+    from fastapi.testclient import TestClient
+    from app import main, maintenance
+    engine, _ = _temp_database()
+    with closing(sqlite3.connect(engine.url.database)) as connection:
+        connection.executescript("CREATE TABLE legacy (id INTEGER PRIMARY KEY);")
+
+    def auto_vacuum():
+        with engine.connect() as connection:
+            return connection.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+    with _patched(main, engine=engine):
+        assert auto_vacuum() == 0
+        with TestClient(main.app):
+            assert auto_vacuum() == maintenance.INCREMENTAL
+    print("   ✅ Converted by the app's lifespan")
+
+def test_stale_cache_refresh():
+    """Test that a stale cache entry is served at once, refreshed in the background, and not retried while cooling down"""
+    print("\n♻️ Testing Stale Cache Refresh...")
+
+    import asyncio
+    from datetime import timedelta
+    from app import main
+    from app.crud import cache_products, ensure_cache_schema, get_cached_with_age
+    engine, Session = _temp_database()
+    ensure_cache_schema(engine)
+    query = "refresh test query"
+    with Session() as db:
+        cache_products(db, "flipkart", query, _scraped(2, "Stale"))
+        cache_products(db, "amazon", query, _scraped(2, "Fresh"))
+        _age_rows(db, "flipkart", query, timedelta(hours=7))
+
+    scraped = []
+    refreshed_items = _scraped(3, "Refreshed")
+    def flipkart(query):
+        scraped.append(query)
+        return refreshed_items
+    def amazon(query):
+        raise AssertionError("fresh entries are not scraped")
+    async def no_dataset_results(*args, **kwargs):
+        return []
+
+    async def search():
+        with Session() as db:
+            response = await main._search_products(query, db)
+        await asyncio.gather(*main._refresh_tasks)
+        return response
+
+    with _patched(main, SessionLocal=Session, search_async=no_dataset_results, get_flipkart=flipkart, get_amazon=amazon):
+        # Stale rows answer the request, the refresh replaces them afterwards
+        response = asyncio.run(search())
+        assert [p["title"] for p in response["results"]["flipkart"]] == ["Stale 0", "Stale 1"]
+        assert 7 * 3600 <= response["cache_age_seconds"]["flipkart"] < 7 * 3600 + 60
+        assert "amazon" not in response["cache_age_seconds"] and scraped == [query]
+        with Session() as db:
+            rows, age = get_cached_with_age(db, "flipkart", query)
+        assert len(rows) == 3 and age < timedelta(minutes=1)
+        assert "cache_age_seconds" not in asyncio.run(search())
+
+        # A refresh that finds nothing keeps the stale rows and starts the cooldown
+        refreshed_items = []
+        with Session() as db:
+            _age_rows(db, "flipkart", query, timedelta(hours=7))
+        asyncio.run(search())
+        assert len(scraped) == 2 and ("flipkart", query) in main._refresh_failures
+        response = asyncio.run(search())
+        assert len(scraped) == 2 and len(response["results"]["flipkart"]) == 3
+
+        # Once the cooldown is over the entry is refreshed again
+        main._refresh_failures[("flipkart", query)] -= main.CACHE_REFRESH_COOLDOWN
+        refreshed_items = _scraped(1, "Recovered")
+        asyncio.run(search())
+        assert len(scraped) == 3 and ("flipkart", query) not in main._refresh_failures
+        with Session() as db:
+            assert [row.title for row in get_cached_with_age(db, "flipkart", query)[0]] == ["Recovered 0"]
+    print(f"   ✅ Scraped {len(scraped)} times for 4 stale requests")
+
+def test_refresh_failures_pruned():
+    """Test that failed refreshes past their cooldown are dropped as new failures are recorded"""
+    print("\n🧊 Testing Refresh Failure Pruning...")
+
+    from app import main
+    with _patched(main, _refresh_failures={}):
+        main._record_refresh_failure(("flipkart", "one-off"))
+        main._record_refresh_failure(("amazon", "one-off"))
+        main._refresh_failures[("flipkart", "one-off")] -= main.CACHE_REFRESH_COOLDOWN
+        main._refresh_failures[("amazon", "one-off")] -= main.CACHE_REFRESH_COOLDOWN
+        main._record_refresh_failure(("flipkart", "still failing"))
+        assert list(main._refresh_failures) == [("flipkart", "still failing")]
+
+        # Failing again moves an entry behind newer failures
+        main._record_refresh_failure(("amazon", "still failing"))
+        main._record_refresh_failure(("flipkart", "still failing"))
+        assert list(main._refresh_failures) == [("amazon", "still failing"), ("flipkart", "still failing")]
+    print("   ✅ Only failures still cooling down are kept")
+
+def test_shared_search_query():
+    """Test that shared searches scrape and cache under the normalized query"""
+    print("\n🔤 Testing Shared Search Query...")
+
+    import asyncio
+    from app import main
+    from app.crud import ensure_cache_schema, get_cached_with_age
+    engine, Session = _temp_database()
+    ensure_cache_schema(engine)
+
+    scraped = []
+    def scraper(query):
+        scraped.append(query)
+        return _scraped(2)
+    async def no_dataset_results(*args, **kwargs):
+        return []
+
+    with _patched(main, SessionLocal=Session, search_async=no_dataset_results, get_flipkart=scraper, get_amazon=scraper):
+        first = asyncio.run(main._shared_search("  Shared  SEARCH query "))
+        assert scraped == ["shared search query", "shared search query"]
+        with Session() as db:
+            assert len(get_cached_with_age(db, "flipkart", "shared search query")[0]) == 2
+        # Another spelling of the query is answered from the cache
+        second = asyncio.run(main._shared_search("shared search Query"))
+        assert len(scraped) == 2
+        for platform in ("flipkart", "amazon"):
+            assert sorted(p["title"] for p in second["results"][platform]) == sorted(p["title"] for p in first["results"][platform])
+    print(f"   ✅ Scraped as: '{scraped[0]}'")
+
+def test_sqlite_pragmas():
+    """Test that every new SQLite connection gets the configured pragmas"""
+    print("\n⚙️ Testing SQLite Pragmas...")
+
+    from app.database import SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_JOURNAL_MODE, create_database_engine
+    engine, _ = _temp_database()
+    # Two connections checked out together are two separate connects
+    with engine.connect() as first, engine.connect() as second:
+        for connection in (first, second):
+            pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert pragma("journal_mode") == SQLITE_JOURNAL_MODE.lower()  # wal
+            assert pragma("busy_timeout") == SQLITE_BUSY_TIMEOUT_MS
+            assert pragma("cache_size") == -SQLITE_CACHE_SIZE_KB
+
+    # In-memory databases have no journal file to switch to WAL
+    with create_database_engine("sqlite://").connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "memory"
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == SQLITE_BUSY_TIMEOUT_MS
+    print(f"   ✅ journal_mode={SQLITE_JOURNAL_MODE}, busy_timeout={SQLITE_BUSY_TIMEOUT_MS}ms")
+
+_catalog = None
+
+def _catalog_database():
+    """Temporary database with the Flipkart mobiles and electronics catalogs loaded (shared by the catalog tests)"""
+    global _catalog
+    if _catalog is None:
+        from app.catalog_loader import load_catalog
+        engine, Session = _temp_database()
+        _catalog = engine, Session, load_catalog(["flipkart_mobiles", "electronics"], bind=engine)
+    return _catalog
+
+def test_catalog_loader():
+    """Test that the loader fills the typed catalog tables and reloads a dataset in place"""
+    print("\n📥 Testing Catalog Loader...")
+
+    from sqlalchemy import func, select
+    from search import get_master_search
+    from app.catalog_loader import load_catalog
+    from app.models import CatalogProduct, ElectronicsAttributes, FlipkartMobileAttributes
+    engine, Session, loaded = _catalog_database()
+    search_engines = get_master_search().search_engines
+    assert loaded == {source: len(search_engines[source].catalog.table) for source in ("flipkart_mobiles", "electronics")}
+
+    def count(model, *where):
+        with Session() as db:
+            return db.scalar(select(func.count()).select_from(model).where(*where))
+    assert count(FlipkartMobileAttributes) == loaded["flipkart_mobiles"]
+    assert count(ElectronicsAttributes) == loaded["electronics"]
+    with Session() as db:
+        products = db.scalars(select(CatalogProduct)).all()
+    assert all(p.category_key == (p.category.lower() if p.category else None) for p in products)
+    assert all(p.brand_key == (p.brand.lower() if p.brand else None) for p in products)
+    assert {p.brand for p in products if p.brand_key == "samsung"} == {"SAMSUNG"}
+    assert all(p.canonical_price is not None and p.currency for p in products if p.source == "flipkart_mobiles")
+
+    # Reloading a dataset replaces its rows and attributes, other datasets keep theirs
+    assert load_catalog(["flipkart_mobiles"], bind=engine) == {"flipkart_mobiles": loaded["flipkart_mobiles"]}
+    assert count(CatalogProduct) == sum(loaded.values())
+    assert count(FlipkartMobileAttributes) == loaded["flipkart_mobiles"]
+    try:
+        load_catalog(["unknown"], bind=engine)
+        assert False, "unknown sources are rejected"
+    except ValueError as e:
+        assert "Available sources" in str(e)
+
+    # Catalog tables from before the brand/category keys are rebuilt
+    old_engine, _ = _temp_database()
+    with old_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE catalog_products (id INTEGER PRIMARY KEY, source VARCHAR, source_row INTEGER, title VARCHAR, category VARCHAR)")
+    assert load_catalog(["electronics"], bind=old_engine) == {"electronics": loaded["electronics"]}
+    print(f"   ✅ Loaded: {loaded}")
+
+def test_catalog_endpoint():
+    """Test /catalog filters (brand and category in any case), sorting, limits and errors"""
+    print("\n🔎 Testing Catalog Endpoint...")
+
+    from fastapi.testclient import TestClient
+    from app import main
+    _, Session, _ = _catalog_database()
+
+    def database_session():
+        with Session() as db:
+            yield db
+    main.app.dependency_overrides[main.get_db] = database_session
+    try:
+        client = TestClient(main.app)
+        def catalog(**params):
+            response = client.get("/catalog", params=params)
+            assert response.status_code == 200, response.text
+            return response.json()["products"]
+
+        phones = catalog(category="mobiles", brand="samsung", max_price=15000, limit=50)
+        assert phones and all(p["brand"] == "SAMSUNG" and p["category"] == "Mobiles" and p["canonical_price"] <= 15000 for p in phones)
+        prices = [p["canonical_price"] for p in phones]
+        assert prices == sorted(prices)
+        assert catalog(category="Mobiles", brand=" SAMSUNG ", max_price=15000, limit=50) == phones
+
+        tvs = catalog(source="electronics", category="tvs", sort="rating")
+        ratings = [p["rating"] for p in tvs]
+        assert tvs and all(p["category"] == "TVs" for p in tvs) and ratings == sorted(ratings, reverse=True)
+        assert catalog(category="no such category") == []
+        assert len(catalog(limit=10 ** 6)) == main.MAX_CATALOG_RESULTS
+
+        response = client.get("/catalog", params={"sort": "cheapest"})
+        assert response.status_code == 400 and "Available sorts" in response.json()["detail"]
+    finally:
+        del main.app.dependency_overrides[main.get_db]
+    print(f"   ✅ {len(phones)} Samsung mobiles up to ₹15,000, {len(tvs)} TVs by rating")
+
+def main():
+    """Main test function"""
+    print("🎯 API Database Test Suite")
+    print("=" * 50)
+
+    # Each test raises AssertionError on failure
+    for test in (
+        test_cache_products,
+        test_cache_schema_migration,
+        test_cache_age,
+        test_cache_eviction,
+        test_cache_compaction,
+        test_startup_vacuum,
+        test_stale_cache_refresh,
+        test_refresh_failures_pruned,
+        test_shared_search_query,
+        test_sqlite_pragmas,
+        test_catalog_loader,
+        test_catalog_endpoint,
+    ):
+        test()
+
+    print("\n🎉 All tests passed successfully!")
+
+if __name__ == "__main__":
+    main()
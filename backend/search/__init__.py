@@ -8,28 +8,49 @@ This package contains individual search engines for each dataset:
 - dataset_data_search: For general mixed products
 - fashion_data_search: For fashion items and clothing
 - master_search: Master coordinator for all datasets
+- service: Shared, lazily created MasterSearch for the API
 
 Each search engine is optimized for its specific dataset structure and provides
 specialized search methods relevant to that dataset's content.
+
+The engine classes are imported on first access so that importing the package
+(e.g. for ``get_master_search``) does not pull in pandas.
 """
 
-from .flipkart_mobiles_data_search import FlipkartMobilesSearch
-from .electronics_data_search import ElectronicsDataSearch
-from .amazon_data_search import AmazonDataSearch
-from .dataset_data_search import DatasetDataSearch
-from .fashion_data_search import FashionDataSearch
-from .master_search import MasterSearch
+import importlib
+
+from .service import get_master_search, search_async, start_warmup
+
+_LAZY_IMPORTS = {
+    'FlipkartMobilesSearch': '.flipkart_mobiles_data_search',
+    'ElectronicsDataSearch': '.electronics_data_search',
+    'AmazonDataSearch': '.amazon_data_search',
+    'DatasetDataSearch': '.dataset_data_search',
+    'FashionDataSearch': '.fashion_data_search',
+    'MasterSearch': '.master_search'
+}
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     'FlipkartMobilesSearch',
-    'ElectronicsDataSearch', 
+    'ElectronicsDataSearch',
     'AmazonDataSearch',
     'DatasetDataSearch',
     'FashionDataSearch',
-    'MasterSearch'
+    'MasterSearch',
+    'get_master_search',
+    'search_async',
+    'start_warmup'
 ]
 
 # Version information
 __version__ = '1.0.0'
 __author__ = 'E-commerce Search System'
-__description__ = 'Specialized search engines for multiple e-commerce datasets' 
\ No newline at end of file
+__description__ = 'Specialized search engines for multiple e-commerce datasets'
@@ -0,0 +1,64 @@
+import os
+from bisect import bisect_left
+import numpy as np
+
+# Phrases kept per dataset, most popular first
+MAX_PHRASES = int(os.getenv('SEARCH_AUTOCOMPLETE_MAX_PHRASES', '20000'))
+# Only this many leading characters of a key are stored and compared
+KEY_LENGTH = 40
+# Besides its start, a phrase is also found from its next few words
+MAX_WORD_STARTS = 4
+
+def normalize_prefix(text):
+    """Key form of a phrase or typed prefix: lowercased, single spaces, truncated"""
+    return ' '.join(str(text).lower().split())[:KEY_LENGTH]
+
+class PrefixIndex:
+    """Type-ahead suggestions from a sorted array of phrase keys.
+
+    Every phrase is stored under its lowercased text and under the text
+    starting at each of its next few words, so both "sam" and "galaxy"
+    complete "Samsung Galaxy F22". Phrase ids are assigned in popularity
+    order, so a lookup is two binary searches for the range of keys starting
+    with the prefix and then the smallest phrase ids in that range. Memory is
+    bounded by ``max_phrases`` and ``KEY_LENGTH``.
+    """
+
+    def __init__(self, phrases, max_phrases=MAX_PHRASES):
+        """``phrases`` is an iterable of ``(text, weight)``; repeated texts add up"""
+        totals = {}
+        for text, weight in phrases:
+            text = ' '.join(str(text).split())
+            key = text.lower()
+            if not key:
+                continue
+            display, total = totals.get(key, (text, 0.0))
+            totals[key] = (display, total + weight)
+
+        ranked = sorted(totals.values(), key=lambda phrase: (-phrase[1], phrase[0].lower()))[:max_phrases]
+        self.phrases = [text for text, _ in ranked]
+        self.weights = np.array([weight for _, weight in ranked], dtype=float)
+
+        entries = []
+        for phrase_id, text in enumerate(self.phrases):
+            words = text.lower().split()
+            for start in range(min(len(words), MAX_WORD_STARTS + 1)):
+                entries.append((normalize_prefix(' '.join(words[start:])), phrase_id))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.phrase_ids = np.array([phrase_id for _, phrase_id in entries], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def complete(self, prefix, limit=8):
+        """Up to ``limit`` ``(text, weight)`` suggestions for the prefix, most popular first"""
+        prefix = normalize_prefix(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\U0010ffff', start)
+        # A phrase can match through several of its word starts
+        best = np.unique(self.phrase_ids[start:end])[:limit]
+        return [(self.phrases[phrase_id], float(self.weights[phrase_id])) for phrase_id in best]
@@ -0,0 +1,795 @@
+import inspect
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from .inverted_index import InvertedIndex
+from .autocomplete import PrefixIndex
+from .ranking import BM25FScorer, check_ranking, top_k_indices
+from .semantic import SemanticIndex
+from .facets import FACET_LIMIT, FacetIndex
+from .records import ProductRecord, card_schema
+from .snapshots import decode_strings, decode_table, encode_strings, encode_table, file_signature, load_snapshot, save_snapshot
+from .currency import CANONICAL_CURRENCY, EXCHANGE_RATES, detect_currency, normalize_currency, parse_price_limit, to_canonical
+
+# "vectorized" evaluates filters as whole-column masks; "iterrows" keeps the
+# original row-by-row scan so both paths can be diffed during rollout
+EXECUTION_MODES = ('vectorized', 'iterrows')
+DEFAULT_EXECUTION_MODE = os.getenv('SEARCH_EXECUTION_MODE', 'vectorized')
+
+# Rewrite keywords that match nothing (typos, split or joined words)
+FUZZY_SEARCH = os.getenv('SEARCH_FUZZY', '1') != '0'
+
+# Modules besides the engine's own whose code shapes a table snapshot: the
+# text and number parsing here, currency detection, and the snapshot encoding
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_SOURCES = tuple(os.path.join(_PACKAGE_DIR, module) for module in ('base_search.py', 'currency.py', 'snapshots.py'))
+
+def parse_price(value):
+    """Numeric price of a cell ('₹1,299' -> 1299.0, '$20.99 ' -> 20.99), or None.
+
+    Currency symbols (including the 'â‚¹' mojibake of '₹'), thousands
+    separators and whitespace are ignored.
+    """
+    if pd.isnull(value):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    price_match = re.search(r'\d+(?:\.\d+)?', str(value).replace(',', ''))
+    return float(price_match.group()) if price_match else None
+
+def parse_int(value):
+    """Integer value of a percentage-like string ('45%' -> 45), or None"""
+    if pd.isnull(value):
+        return None
+    try:
+        return int(str(value).replace('%', '').strip())
+    except ValueError:
+        return None
+
+def parse_float(value):
+    """Float value of a cell, or None when it is not a number"""
+    if pd.isnull(value):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def lower_text(value):
+    """Lowercased string form of a cell, or None for missing values"""
+    return str(value).lower() if pd.notnull(value) else None
+
+def parse_column(parser, values):
+    """Float array of a column parsed cell by cell (NaN where a cell does not parse)"""
+    parsed = (parser(value) for value in values)
+    return np.array([np.nan if value is None else value for value in parsed], dtype=float)
+
+class ParsedDataset:
+    """A dataset file after parsing, before any index is built.
+
+    Holds the prepared table, lowercased copies of the search and filter
+    columns, the parsed numeric columns (prices included) and the currency
+    of every row. This is what a table snapshot stores, so a fresh snapshot
+    replaces CSV parsing, ``_prepare`` and the per-cell normalization.
+    """
+
+    def __init__(self, table, text, numeric, currencies):
+        self.table = table
+        self.text = text
+        self.numeric = numeric
+        self.currencies = currencies
+
+    def to_arrays(self):
+        arrays = encode_table(self.table, 'table.')
+        arrays['text.fields'] = np.array(list(self.text), dtype=str)
+        for position, values in enumerate(self.text.values()):
+            arrays[f'text.{position}.text'], arrays[f'text.{position}.offsets'], arrays[f'text.{position}.missing'] = encode_strings(values)
+        arrays['numeric.fields'] = np.array(list(self.numeric), dtype=str)
+        for position, values in enumerate(self.numeric.values()):
+            arrays[f'numeric.{position}'] = values
+        arrays['currencies'] = np.array(self.currencies, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        text = {
+            field: decode_strings(arrays[f'text.{position}.text'], arrays[f'text.{position}.offsets'], arrays[f'text.{position}.missing'])
+            for position, field in enumerate(arrays['text.fields'].tolist())
+        }
+        numeric = {field: arrays[f'numeric.{position}'] for position, field in enumerate(arrays['numeric.fields'].tolist())}
+        return cls(decode_table(arrays, 'table.'), text, numeric, arrays['currencies'].tolist())
+
+class ColumnRow:
+    """One catalog row read straight from the column arrays.
+
+    Supports the ``row.get(field)``, ``row[field]`` and ``field in row``
+    reads of ``build_product_card`` without building a pandas Series.
+    """
+
+    __slots__ = ('columns', 'row_id')
+
+    def __init__(self, columns, row_id):
+        self.columns = columns
+        self.row_id = row_id
+
+    def __getitem__(self, field):
+        return self.columns[field][self.row_id]
+
+    def get(self, field, default=None):
+        column = self.columns.get(field)
+        return default if column is None else column[self.row_id]
+
+    def __contains__(self, field):
+        return field in self.columns
+
+class DatasetCatalog:
+    """Everything derived from one load of a dataset file.
+
+    Besides the raw table this keeps lowercased copies of the text columns
+    used by filters and parsed float arrays of the numeric ones, so filters
+    can be evaluated as whole-column masks. Prices are stored in their
+    original currency and in the canonical currency, and the canonical prices
+    are kept as a sorted permutation so price ranges resolve with two binary
+    searches. Facet columns and price buckets are factorized into per-row
+    codes for facet counts.
+    """
+
+    def __init__(self, table, index, text_fields, numeric_fields, price_field=None, currencies=None, scorer=None, suggestions=None, facet_fields=None,
+                 text=None, numeric=None):
+        self.table = table
+        # Column arrays that result cards are built from
+        self.columns = {field: table[field].to_numpy() for field in table.columns}
+        self.index = index
+        self.scorer = scorer
+        self.suggestions = suggestions if suggestions is not None else PrefixIndex([])
+        # Dense vectors for semantic ranking, built on first use
+        self.semantic = None
+        self._text = {}
+        self._numeric = {}
+        self._numeric_parsers = dict(numeric_fields)
+
+        # Columns already lowercased / parsed while reading the dataset are reused
+        for field in text_fields:
+            if text and field in text:
+                self._text[field] = pd.Series(text[field], dtype=object)
+            self.text(field)
+        for field in self._numeric_parsers:
+            if numeric and field in numeric:
+                self._numeric[field] = numeric[field]
+            self.numeric(field)
+
+        # Numeric price per row in its original currency (NaN when missing)
+        self.price = self.numeric(price_field) if price_field else np.full(len(table), np.nan)
+        if currencies is None:
+            currencies = [CANONICAL_CURRENCY] * len(table)
+        self.currency = np.array(currencies, dtype=object)
+        rates = np.array([EXCHANGE_RATES[currency] for currency in self.currency], dtype=float)
+        self.canonical_price = self.price * rates
+
+        priced = np.flatnonzero(~np.isnan(self.canonical_price))
+        self.price_order = priced[np.argsort(self.canonical_price[priced], kind='stable')]
+        self.sorted_prices = self.canonical_price[self.price_order]
+
+        facet_columns = {name: table[field] for name, field in (facet_fields or {}).items() if field in table.columns}
+        self.facets = FacetIndex(facet_columns, self.canonical_price if price_field else None)
+
+    def price_range(self, min_price=None, max_price=None):
+        """Row ids priced within [min_price, max_price] in the canonical currency, cheapest first"""
+        start = 0 if min_price is None else np.searchsorted(self.sorted_prices, min_price, side='left')
+        end = len(self.sorted_prices) if max_price is None else np.searchsorted(self.sorted_prices, max_price, side='right')
+        return self.price_order[start:end]
+
+    def text(self, field):
+        """Lowercased column as a Series (None for missing cells)"""
+        values = self._text.get(field)
+        if values is None:
+            if field in self.table.columns:
+                values = pd.Series([lower_text(value) for value in self.table[field]], dtype=object)
+            else:
+                values = pd.Series([None] * len(self.table), dtype=object)
+            self._text[field] = values
+        return values
+
+    def numeric(self, field):
+        """Parsed column as a float array (NaN where the cell did not parse)"""
+        values = self._numeric.get(field)
+        if values is None:
+            if field in self.table.columns:
+                values = parse_column(self._numeric_parsers[field], self.table[field])
+            else:
+                values = np.full(len(self.table), np.nan)
+            self._numeric[field] = values
+        return values
+
+    def contains(self, field, value):
+        """Mask of rows whose lowercased field contains the value"""
+        return self.text(field).str.contains(value, regex=False, na=False).to_numpy(dtype=bool)
+
+class BaseDatasetSearch:
+    """Shared dataset lifecycle for the per-dataset search engines.
+
+    The CSV is parsed once into a resident DataFrame on first use and every
+    search method reads from that table. Call ``reload()`` to pick up changes
+    to the file on disk.
+
+    Subclasses describe their dataset with the class attributes below and
+    provide ``build_product_card``, which returns ``_new_card(...)``.
+    """
+
+    # Columns whose lowercased text is matched against query keywords
+    search_fields = []
+    # BM25 weight of each search field (fields not listed weigh 1.0)
+    field_weights = {}
+    # Columns kept lowercased for substring filters (category, brand, ...)
+    text_fields = []
+    # Columns parsed once into numbers, mapped to the parser used for them
+    numeric_fields = {}
+    # Column holding the price used by "under N" queries
+    price_field = None
+    # Keys of the cards build_product_card returns, in the order it passes their values
+    card_fields = ()
+    # Currency of the dataset's prices, and an optional per-row currency column
+    currency = CANONICAL_CURRENCY
+    currency_field = None
+    # Facet names mapped to the columns they count (a price facet is added
+    # automatically when the dataset has a price)
+    facet_fields = {}
+    # Columns (or tuples of columns joined by a space) offered as autocomplete
+    # suggestions, and the columns that make a product popular
+    suggestion_fields = []
+    rating_field = None
+    rating_count_field = None
+    # Whether keywords without any match are corrected against the vocabulary
+    fuzzy = FUZZY_SEARCH
+    stop_words = ['under', 'below', 'less', 'than', 'upto', 'up', 'to', 'find', 'show', 'get', 'want', 'need', 'looking', 'for']
+
+    def __init__(self):
+        self._catalog = None
+        self._lock = threading.RLock()
+        self._card_schema = card_schema(self.card_fields)
+        # Bumped every time a fresh copy of the dataset is loaded
+        self.version = 0
+        self.execution_mode = DEFAULT_EXECUTION_MODE
+
+    @property
+    def execution_mode(self):
+        return self._execution_mode
+
+    @execution_mode.setter
+    def execution_mode(self, mode):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}'. Available modes: {list(EXECUTION_MODES)}")
+        self._execution_mode = mode
+
+    @property
+    def catalog(self):
+        """The resident dataset table and its indexes, loaded on first access"""
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load()
+                    self.version += 1
+        return self._catalog
+
+    @property
+    def data(self):
+        """The resident dataset table"""
+        return self.catalog.table
+
+    @property
+    def is_loaded(self):
+        return self._catalog is not None
+
+    def _load(self):
+        """Read the dataset and build everything derived from it"""
+        parsed = self._read_dataset()
+        table = parsed.table
+        search_columns = [(field, parsed.text[field]) for field in self.search_fields if field in parsed.text]
+        index = InvertedIndex(self._searchable_text(search_columns))
+        scorer = BM25FScorer([(self.field_weights.get(field, 1.0), values) for field, values in search_columns])
+        suggestions = PrefixIndex(self._suggestion_phrases(table))
+        return DatasetCatalog(
+            table, index, self._text_fields(), self._numeric_parsers(), self.price_field, parsed.currencies,
+            scorer, suggestions, self.facet_fields, parsed.text, parsed.numeric
+        )
+
+    def _read_dataset(self):
+        """The parsed dataset, from its table snapshot when one matches the file.
+
+        Snapshots are keyed by the size, modification time and SHA-256 of the
+        CSV and of every module the stored columns depend on: the engine
+        classes, the text, price and currency parsing (this module and
+        currency.py) and the snapshot encoding. Editing any of them rebuilds
+        the snapshot.
+        """
+        name = self._snapshot_name('table')
+        engine_sources = [inspect.getfile(cls) for cls in type(self).__mro__ if issubclass(cls, BaseDatasetSearch)]
+        key = file_signature(self.dataset_path, *dict.fromkeys(engine_sources + list(SNAPSHOT_SOURCES)))
+        arrays = load_snapshot(name, key)
+        if arrays is not None:
+            return ParsedDataset.from_arrays(arrays)
+        parsed = self._parse_dataset()
+        save_snapshot(name, key, parsed.to_arrays())
+        return parsed
+
+    def _parse_dataset(self):
+        """Parse the CSV: prepare the table, lowercase its text columns and parse its numbers"""
+        table = self._prepare(pd.read_csv(self.dataset_path))
+        text = {field: [lower_text(value) for value in table[field]] for field in self._text_fields() if field in table.columns}
+        numeric = {field: parse_column(parser, table[field]) for field, parser in self._numeric_parsers().items() if field in table.columns}
+        return ParsedDataset(table, text, numeric, self._currencies(table))
+
+    def _text_fields(self):
+        """Fields kept lowercased in the catalog: the search fields, then the text filter fields"""
+        return list(dict.fromkeys(list(self.search_fields) + list(self.text_fields)))
+
+    def _numeric_parsers(self):
+        """Parser of every numeric field, the price field included"""
+        numeric_fields = dict(self.numeric_fields)
+        if self.price_field:
+            numeric_fields.setdefault(self.price_field, parse_price)
+        return numeric_fields
+
+    def _snapshot_name(self, kind):
+        """Snapshot file name for this dataset, e.g. 'Flipkart_Mobiles-table'"""
+        return os.path.splitext(os.path.basename(self.dataset_path))[0] + f'-{kind}'
+
+    def _prepare(self, df):
+        """Hook for engines to add derived columns once at load time"""
+        return df.reset_index(drop=True)
+
+    def _search_columns(self, catalog):
+        """``(field, lowercased values)`` for every search field, from the catalog's text columns"""
+        return [(field, catalog.text(field)) for field in self.search_fields if field in catalog.table.columns]
+
+    def _searchable_text(self, search_columns):
+        """Lowercased searchable text per row, joined the same way as a row scan"""
+        for values in zip(*(values for _, values in search_columns)):
+            yield ' '.join(value for value in values if value)
+
+    def _popularity(self, table):
+        """Popularity of every row: 1, plus the rating out of 5, plus log(1 + rating count)"""
+        popularity = np.ones(len(table))
+        for field, transform in ((self.rating_field, lambda rating: rating / 5), (self.rating_count_field, np.log1p)):
+            if field and field in table.columns:
+                # parse_price reads the first number of a cell, ignoring thousands separators
+                values = np.array([parse_price(value) or 0.0 for value in table[field]], dtype=float)
+                popularity += transform(np.nan_to_num(values))
+        return popularity
+
+    def _suggestion_phrases(self, table):
+        """``(phrase, popularity)`` for every suggestion field of every row"""
+        popularity = self._popularity(table)
+        for fields in self.suggestion_fields:
+            fields = fields if isinstance(fields, tuple) else (fields,)
+            if not all(field in table.columns for field in fields):
+                continue
+            columns = [table[field] for field in fields]
+            for row_popularity, values in zip(popularity, zip(*columns)):
+                if all(pd.notnull(value) for value in values):
+                    yield ' '.join(str(value).strip() for value in values), row_popularity
+
+    def _semantic_index(self, catalog):
+        """The catalog's semantic index, read from its snapshot or built on first use"""
+        if catalog.semantic is None:
+            with self._lock:
+                if catalog.semantic is None:
+                    field_texts = [(self.field_weights.get(field, 1.0), values) for field, values in self._search_columns(catalog)]
+                    catalog.semantic = SemanticIndex.load_or_build(self._snapshot_name('semantic'), field_texts)
+        return catalog.semantic
+
+    def reload(self):
+        """Re-read the dataset from disk and swap it in atomically"""
+        with self._lock:
+            catalog = self._load()
+            self._catalog = catalog
+            self.version += 1
+
+    def _currency_of(self, currency_cell, price_cell):
+        """Currency of a price, from the currency column or the price's symbol"""
+        marker = currency_cell if pd.notnull(currency_cell) else price_cell
+        return detect_currency(marker if pd.notnull(marker) else None, self.currency)
+
+    def _currencies(self, table):
+        """Currency of every row's price"""
+        def column(field):
+            return table[field] if field in table.columns else [None] * len(table)
+
+        return [
+            self._currency_of(currency_cell, price_cell)
+            for currency_cell, price_cell in zip(column(self.currency_field), column(self.price_field))
+        ]
+
+    def _row_currency(self, row):
+        return self._currency_of(row.get(self.currency_field) if self.currency_field else None, row.get(self.price_field))
+
+    def _row_canonical_price(self, row):
+        return to_canonical(parse_price(row.get(self.price_field)), self._row_currency(row))
+
+    def _parse_query(self, query):
+        """Split a query into search keywords and an optional price limit.
+
+        The price limit is returned in the canonical currency.
+        """
+        query_lc = query.lower()
+
+        price_limit, price_match = parse_price_limit(query_lc)
+
+        query_main = query_lc
+        if price_match:
+            query_main = query_main[:price_match.start()].strip()
+
+        keywords = [kw for kw in query_main.split() if kw not in self.stop_words and len(kw) > 2]
+        return keywords, price_limit
+
+    def _new_card(self, *values):
+        """Product card (compact record) holding one value per ``card_fields`` entry"""
+        return ProductRecord.from_values(self._card_schema, values)
+
+    def _cards(self, catalog, row_ids):
+        """Build product cards (compact records) for the given row ids only"""
+        product_cards = []
+        for row_id in row_ids:
+            product_card = self.build_product_card(ColumnRow(catalog.columns, row_id))
+            price = catalog.price[row_id]
+            priced = not np.isnan(price)
+            product_card['price_value'] = float(price) if priced else None
+            product_card['price_currency'] = catalog.currency[row_id]
+            product_card['canonical_price'] = float(catalog.canonical_price[row_id]) if priced else None
+            product_cards.append(product_card)
+        return product_cards
+
+    def _row_card(self, row):
+        """Build a product card (compact record) from a row of the iterrows path"""
+        product_card = self.build_product_card(row)
+        product_card['price_value'] = parse_price(row.get(self.price_field))
+        product_card['price_currency'] = self._row_currency(row)
+        product_card['canonical_price'] = self._row_canonical_price(row)
+        return product_card
+
+    def search(self, query, max_results=5, ranking=None):
+        """Keyword search ranked by matching keywords, BM25 relevance (``'bm25'``) or semantic similarity (``'semantic'``)"""
+        return self.search_many([query], max_results, ranking)[0]
+
+    def autocomplete(self, prefix, limit=8):
+        """``(text, popularity)`` suggestions for a typed prefix"""
+        try:
+            return self.catalog.suggestions.complete(prefix, limit)
+        except Exception as e:
+            print(f"[{type(self).__name__}] Error reading dataset: {e}")
+            return []
+
+    def search_many(self, queries, max_results=5, ranking=None):
+        """Run several keyword searches in one pass, results in query order.
+
+        All queries are parsed up front; the vectorized path resolves every
+        distinct keyword with a single scan of the index vocabulary and the
+        iterrows path visits each row once for the whole batch.
+        """
+        return [products for products, _ in self._search_many(queries, max_results, ranking)]
+
+    def faceted_search(self, query, max_results=5, ranking=None, facet_limit=FACET_LIMIT):
+        """``search`` plus the facet counts of every matching row, as ``(products, facets)``"""
+        return self.faceted_search_many([query], max_results, ranking, facet_limit)[0]
+
+    def faceted_search_many(self, queries, max_results=5, ranking=None, facet_limit=FACET_LIMIT):
+        """``search_many`` plus facet counts, as one ``(products, facets)`` per query.
+
+        Facets count every row that matches the query (keywords and price
+        limit), not only the returned top results, keeping the
+        ``facet_limit`` most frequent values of each facet (all of them
+        when None).
+        """
+        return self._search_many(queries, max_results, ranking, include_facets=True, facet_limit=facet_limit)
+
+    def _search_many(self, queries, max_results, ranking, include_facets=False, facet_limit=FACET_LIMIT):
+        ranking = check_ranking(ranking)
+        parsed_queries = [self._parse_query(query) for query in queries]
+
+        try:
+            catalog = self.catalog
+            catalog.index.lookup_many([keyword for keywords, _ in parsed_queries for keyword in keywords])
+            resolved = [self._resolve_keywords(catalog.index, keywords) for keywords, _ in parsed_queries]
+            parsed_queries = [(keywords, price_limit) for (keywords, _), (_, price_limit) in zip(resolved, parsed_queries)]
+
+            # Every matching row of each query, with its match count (or similarity)
+            if ranking == 'semantic':
+                # Semantic ranking does not scan for keywords, so both execution modes share it
+                matches = self._semantic_matches(catalog, parsed_queries)
+            elif self.execution_mode == 'vectorized' or include_facets:
+                matches = [self._matching_rows(catalog, keywords, price_limit) for keywords, price_limit in parsed_queries]
+
+            if ranking != 'semantic' and self.execution_mode == 'iterrows':
+                results = self._scan_search_many(parsed_queries, max_results, ranking)
+            else:
+                results = [
+                    # Queries without keywords have nothing to embed and fall back to keyword ranking;
+                    # BM25 still scores them (0.0 for every row), like the row scan does
+                    self._rank(catalog, keywords, row_ids, values, max_results, 'match_count' if ranking == 'semantic' and not keywords else ranking)
+                    for (keywords, _), (row_ids, values) in zip(parsed_queries, matches)
+                ]
+
+            # Results found through a typo correction are flagged so the
+            # master search can prefer exact matches from other datasets
+            for (_, corrected), products in zip(resolved, results):
+                if corrected:
+                    for product_card in products:
+                        product_card['corrected'] = True
+
+            facets = [catalog.facets.counts(row_ids, facet_limit) for row_ids, _ in matches] if include_facets else [None] * len(results)
+            return list(zip(results, facets))
+        except Exception as e:
+            print(f"[{type(self).__name__}] Error reading dataset: {e}")
+            return [([], {} if include_facets else None) for _ in queries]
+
+    def _resolve_keywords(self, index, keywords):
+        """Rewrite keywords that match nothing into what was probably meant.
+
+        Keywords with matches are kept. Otherwise, in order: a keyword
+        joined with its neighbour when that matches ("one plus" ->
+        "oneplus"), a keyword that splits into two vocabulary tokens
+        ("oneplus" -> "one plus"), and the closest vocabulary token within a
+        small edit distance ("samsng" -> "samsung"). Only the index
+        vocabulary is consulted, never the rows.
+
+        Returns the keywords and whether any of them was rewritten.
+        """
+        if not self.fuzzy:
+            return keywords, False
+
+        def has_matches(keyword):
+            return len(index.lookup(keyword)) > 0
+
+        resolved = []
+        corrected = False
+        position = 0
+        while position < len(keywords):
+            keyword = keywords[position]
+            following = keywords[position + 1] if position + 1 < len(keywords) else None
+            keyword_matches = has_matches(keyword)
+            # Only a pair with a keyword that matches nothing is joined
+            if following is not None and not (keyword_matches and has_matches(following)):
+                joined = keyword + following
+                if has_matches(joined):
+                    resolved.append(joined)
+                    corrected = True
+                    position += 2
+                    continue
+
+            if keyword_matches:
+                resolved.append(keyword)
+            else:
+                parts = self._split_keyword(index, keyword)
+                if parts:
+                    resolved.extend(parts)
+                    corrected = True
+                else:
+                    correction = index.correct(keyword)
+                    corrected = corrected or correction is not None
+                    resolved.append(correction or keyword)
+            position += 1
+        return resolved, corrected
+
+    def _split_keyword(self, index, keyword):
+        """Two vocabulary tokens that form the keyword when joined, or None"""
+        for split_at in range(3, len(keyword) - 2):
+            head, tail = keyword[:split_at], keyword[split_at:]
+            if head in index.postings and tail in index.postings:
+                return [head, tail]
+        return None
+
+    def _relevance(self, catalog, keywords, row_ids):
+        """Normalized BM25F scores of the given rows for the keywords"""
+        keyword_tokens = [catalog.index.tokens(keyword) for keyword in keywords]
+        document_frequencies = [len(catalog.index.lookup(keyword)) for keyword in keywords]
+        return catalog.scorer.score(keyword_tokens, document_frequencies, row_ids)
+
+    def _matching_rows(self, catalog, keywords, price_limit):
+        """Row ids (file order) containing at least one keyword within the price limit, and their match counts"""
+        # Only rows containing at least one keyword are visited
+        if keywords:
+            row_ids, match_counts = catalog.index.match_counts(keywords)
+        else:
+            row_ids = np.arange(len(catalog.table))
+            match_counts = np.zeros(len(row_ids), dtype=np.int64)
+
+        # Rows without a parseable price are kept, as in the row scan
+        if price_limit is not None:
+            keep = ~(catalog.canonical_price[row_ids] > price_limit)
+            row_ids, match_counts = row_ids[keep], match_counts[keep]
+        return row_ids, match_counts
+
+    def _rank(self, catalog, keywords, row_ids, values, max_results, ranking):
+        """Cards of the best matching rows.
+
+        ``values`` are the rows' match counts, or their similarities when
+        ``ranking`` is "semantic".
+        """
+        if ranking == 'semantic':
+            return self._rank_semantic(catalog, keywords, row_ids, values, max_results)
+
+        # Only the top rows are materialized; ties keep file order
+        match_counts = values
+        if ranking == 'bm25':
+            scores = self._relevance(catalog, keywords, row_ids)
+            order = top_k_indices(scores, max_results)
+        else:
+            order = top_k_indices(match_counts, max_results)
+        candidate_products = self._cards(catalog, row_ids[order])
+        for product_card, match_count in zip(candidate_products, match_counts[order]):
+            product_card['match_count'] = int(match_count)
+        if ranking == 'bm25':
+            for product_card, score in zip(candidate_products, scores[order]):
+                product_card['score'] = round(float(score), 4)
+        return candidate_products
+
+    def _semantic_matches(self, catalog, parsed_queries):
+        """``(row_ids, similarities)`` per query: rows similar enough to it within its price limit.
+
+        Queries without keywords get every row within their price limit and
+        zero match counts instead, as in keyword search.
+        """
+        semantic = self._semantic_index(catalog)
+        similar = iter(semantic.search_many([keywords for keywords, _ in parsed_queries if keywords]))
+        matches = []
+        for keywords, price_limit in parsed_queries:
+            if not keywords:
+                matches.append(self._matching_rows(catalog, keywords, price_limit))
+                continue
+            row_ids, similarities = next(similar)
+            if price_limit is not None:
+                keep = ~(catalog.canonical_price[row_ids] > price_limit)
+                row_ids, similarities = row_ids[keep], similarities[keep]
+            matches.append((row_ids, similarities))
+        return matches
+
+    def _rank_semantic(self, catalog, keywords, row_ids, similarities, max_results):
+        """Cards of the rows most similar to the query"""
+        order = top_k_indices(similarities, max_results)
+        top_rows = row_ids[order]
+
+        # Keyword matches are still reported, so the merge can compare corrected results
+        keyword_rows, keyword_counts = catalog.index.match_counts(keywords)
+        positions = np.minimum(np.searchsorted(keyword_rows, top_rows), max(len(keyword_rows) - 1, 0))
+        matched = keyword_rows[positions] == top_rows if len(keyword_rows) else np.zeros(len(top_rows), dtype=bool)
+
+        candidate_products = self._cards(catalog, top_rows)
+        for product_card, similarity, is_match, position in zip(candidate_products, similarities[order], matched, positions):
+            product_card['match_count'] = int(keyword_counts[position]) if is_match else 0
+            product_card['score'] = round(float(similarity), 4)
+        return candidate_products
+
+    def _scan_search_many(self, parsed_queries, max_results, ranking='match_count'):
+        """Row-by-row reference implementation of ``search_many``"""
+        candidate_lists = [[] for _ in parsed_queries]
+        price_limited = any(price_limit is not None for _, price_limit in parsed_queries)
+
+        for row_id, row in self.data.iterrows():
+            # Build searchable text from the dataset's search fields
+            searchable_fields = []
+            for field in self.search_fields:
+                if pd.notnull(row.get(field)):
+                    searchable_fields.append(str(row[field]).lower())
+            searchable_text = ' '.join(searchable_fields)
+            found_price = self._row_canonical_price(row) if price_limited else None
+
+            for (keywords, price_limit), candidate_products in zip(parsed_queries, candidate_lists):
+                if price_limit is not None and found_price is not None and found_price > price_limit:
+                    continue
+
+                match_count = sum(1 for kw in keywords if kw in searchable_text)
+                if match_count > 0 or not keywords:
+                    candidate_products.append((row_id, row, match_count))
+
+        results = []
+        for (keywords, _), candidates in zip(parsed_queries, candidate_lists):
+            scores = None
+            if ranking == 'bm25':
+                # Term statistics come from the catalog built at load time
+                scores = self._relevance(self.catalog, keywords, np.array([row_id for row_id, _, _ in candidates], dtype=np.int64))
+                order = np.argsort(-scores, kind='stable')
+            else:
+                # Sort by match count
+                order = sorted(range(len(candidates)), key=lambda i: candidates[i][2], reverse=True)
+
+            # Cards are only built for the rows that are returned
+            candidate_products = []
+            for i in order[:max_results]:
+                _, row, match_count = candidates[i]
+                product_card = self._row_card(row)
+                product_card['match_count'] = match_count
+                if scores is not None:
+                    product_card['score'] = round(float(scores[i]), 4)
+                candidate_products.append(product_card)
+            results.append(candidate_products)
+        return results
+
+    def _filter(self, mask, row_predicate, max_results, description):
+        """Return cards for the first rows passing a filter, in file order.
+
+        ``mask`` maps the catalog to a boolean array over all rows and is used
+        in vectorized mode; ``row_predicate`` evaluates the same filter on a
+        single row for the iterrows reference path.
+        """
+        try:
+            catalog = self.catalog
+
+            if self.execution_mode == 'iterrows':
+                results = []
+                for _, row in catalog.table.iterrows():
+                    if row_predicate(row):
+                        results.append(self._row_card(row))
+                return results[:max_results]
+
+            row_ids = np.flatnonzero(mask(catalog))[:max_results]
+            return self._cards(catalog, row_ids)
+        except Exception as e:
+            print(f"[{type(self).__name__}] Error in {description}: {e}")
+            return []
+
+    def _contains_filter(self, field, value, max_results, description):
+        """Filter on a case-insensitive substring match of one field"""
+        value_lower = value.lower()
+        return self._filter(
+            lambda catalog: catalog.contains(field, value_lower),
+            lambda row: pd.notnull(row.get(field)) and value_lower in str(row[field]).lower(),
+            max_results,
+            description
+        )
+
+    def _range_filter(self, field, min_value, max_value, max_results, description):
+        """Filter on a parsed numeric field falling inside [min_value, max_value]"""
+        parser = self.numeric_fields.get(field, parse_price)
+
+        def in_range(value):
+            if value is None:
+                return False
+            if min_value is not None and value < min_value:
+                return False
+            if max_value is not None and value > max_value:
+                return False
+            return True
+
+        def mask(catalog):
+            values = catalog.numeric(field)
+            keep = ~np.isnan(values)
+            if min_value is not None:
+                keep &= values >= min_value
+            if max_value is not None:
+                keep &= values <= max_value
+            return keep
+
+        return self._filter(mask, lambda row: in_range(parser(row.get(field))), max_results, description)
+
+    def search_by_price_range(self, min_price=None, max_price=None, max_results=5, currency=None):
+        """Search products by price range, cheapest first.
+
+        Bounds are in ``currency``, which defaults to the dataset's own
+        currency; pass the canonical currency to compare across datasets.
+        Codes are case-insensitive and unknown ones raise ValueError.
+        """
+        currency = normalize_currency(currency or self.currency)
+        min_price = to_canonical(min_price, currency)
+        max_price = to_canonical(max_price, currency)
+        try:
+            if self.execution_mode == 'iterrows':
+                results = []
+                for _, row in self.data.iterrows():
+                    price = self._row_canonical_price(row)
+                    if price is None:
+                        continue
+                    if min_price is not None and price < min_price:
+                        continue
+                    if max_price is not None and price > max_price:
+                        continue
+                    results.append(self._row_card(row))
+                results.sort(key=lambda x: x['canonical_price'])
+                return results[:max_results]
+
+            catalog = self.catalog
+            return self._cards(catalog, catalog.price_range(min_price, max_price)[:max_results])
+        except Exception as e:
+            print(f"[{type(self).__name__}] Error in price range search: {e}")
+            return []
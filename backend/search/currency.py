@@ -0,0 +1,107 @@
+"""
+Offline currency normalization for the search engines.
+
+Every dataset price is stored in its original currency and converted once
+at load time into the canonical currency, so price filters and sorting can
+compare products from INR and USD datasets on a single numeric column.
+
+Exchange rates are a static table (units of the canonical currency per unit
+of each currency). Override them with the ``SEARCH_EXCHANGE_RATES``
+environment variable, e.g. ``SEARCH_EXCHANGE_RATES='{"USD": 84.5}'``, or
+``set_exchange_rates()``; datasets must be reloaded to pick up new rates.
+"""
+
+import json
+import os
+import re
+
+CANONICAL_CURRENCY = 'INR'
+
+DEFAULT_EXCHANGE_RATES = {
+    'INR': 1.0,
+    'USD': 83.0
+}
+
+# Symbols and words that identify a currency in prices and queries
+CURRENCY_ALIASES = {
+    '₹': 'INR',
+    'â‚¹': 'INR',
+    'rs': 'INR',
+    'rs.': 'INR',
+    'inr': 'INR',
+    'rupee': 'INR',
+    'rupees': 'INR',
+    '$': 'USD',
+    'usd': 'USD',
+    'dollar': 'USD',
+    'dollars': 'USD'
+}
+
+# Aliases as whole words (so "rs" does not match inside "dollars"), longest first
+_ALIAS_PATTERN = re.compile('|'.join(
+    rf'(?<![a-z]){re.escape(alias)}(?![a-z])' if alias[0].isalpha() else re.escape(alias)
+    for alias in sorted(CURRENCY_ALIASES, key=len, reverse=True)
+))
+
+_PREFIX_PATTERN = r'(₹|â‚¹|rs\.?|inr|\$|usd)'
+_SUFFIX_PATTERN = r'(inr|rs|rupees?|usd|dollars?)'
+PRICE_LIMIT_PATTERN = re.compile(
+    rf'(under|below|less than|upto|up to|≤|<=|<)\s*{_PREFIX_PATTERN}?\s*([\d,]+(?:\.\d+)?)(?:\s*{_SUFFIX_PATTERN}\b)?'
+)
+
+def _load_exchange_rates():
+    rates = dict(DEFAULT_EXCHANGE_RATES)
+    overrides = os.getenv('SEARCH_EXCHANGE_RATES')
+    if overrides:
+        try:
+            rates.update({currency.upper(): float(rate) for currency, rate in json.loads(overrides).items()})
+        except (ValueError, AttributeError) as e:
+            print(f"[currency] Ignoring invalid SEARCH_EXCHANGE_RATES: {e}")
+    return rates
+
+EXCHANGE_RATES = _load_exchange_rates()
+
+def set_exchange_rates(rates):
+    """Update the exchange-rate table (takes effect on the next dataset load)"""
+    EXCHANGE_RATES.update({currency.upper(): float(rate) for currency, rate in rates.items()})
+
+def detect_currency(value, default=CANONICAL_CURRENCY):
+    """Currency code named by a symbol or word in the value, else the default"""
+    if value is None:
+        return default
+    text = str(value).strip().lower()
+    if text.upper() in EXCHANGE_RATES:
+        return text.upper()
+    alias_match = _ALIAS_PATTERN.search(text)
+    return CURRENCY_ALIASES[alias_match.group()] if alias_match else default
+
+def normalize_currency(currency):
+    """Currency code of a code, symbol or word ('usd', '$', 'rupees'); ValueError when unknown"""
+    text = str(currency).strip()
+    code = text.upper() if text.upper() in EXCHANGE_RATES else CURRENCY_ALIASES.get(text.lower())
+    if code is None:
+        raise ValueError(f"Unknown currency '{currency}'. Available currencies: {list(EXCHANGE_RATES)}")
+    return code
+
+def to_canonical(amount, currency):
+    """Convert an amount in the given currency into the canonical currency"""
+    if amount is None:
+        return None
+    return amount * EXCHANGE_RATES[currency]
+
+def parse_price_limit(query_lc):
+    """Find an "under N" style price limit in a lowercased query.
+
+    One rule for every dataset: an amount marked with a currency symbol or
+    word ("under $500", "below 2000 rupees") is in that currency, a bare
+    amount is in the canonical currency. Returns ``(limit, match)`` with the
+    limit converted to the canonical currency, or ``(None, None)``.
+    """
+    price_match = PRICE_LIMIT_PATTERN.search(query_lc)
+    if not price_match:
+        return None, None
+
+    amount = float(price_match.group(3).replace(',', ''))
+    marker = price_match.group(2) or price_match.group(4)
+    currency = CURRENCY_ALIASES.get(marker, CANONICAL_CURRENCY) if marker else CANONICAL_CURRENCY
+    return to_canonical(amount, currency), price_match
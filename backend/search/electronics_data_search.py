@@ -1,9 +1,39 @@
 import os
-import pandas as pd
 import re
+import numpy as np
+import pandas as pd
+from .base_search import BaseDatasetSearch, parse_price
+
+DISCOUNT_AMOUNT = re.compile(r'after\s*\$\s*([\d,]+(?:\.\d+)?)\s*off', re.IGNORECASE)
+
+def parse_discount_amount(value):
+    """Dollar amount of an 'After $200 OFF' discount label, or None for other labels"""
+    if pd.isnull(value):
+        return None
+    amount_match = DISCOUNT_AMOUNT.search(str(value))
+    return float(amount_match.group(1).replace(',', '')) if amount_match else None
 
-class ElectronicsDataSearch:
+def discount_percentage(amount, price):
+    """Percentage taken off by a discount amount, for a price listed after the discount"""
+    return amount / (price + amount) * 100
+
+class ElectronicsDataSearch(BaseDatasetSearch):
+    search_fields = ['Title', 'Sub Category', 'Feature']
+    field_weights = {'Title': 3.0, 'Sub Category': 1.0, 'Feature': 0.5}
+    suggestion_fields = ['Title', 'Sub Category']
+    # Keys of the cards build_product_card returns, in the order it passes their values
+    card_fields = ('title', 'price', 'rating', 'review', 'image', 'dataset', 'sub_category', 'discount', 'currency')
+    facet_fields = {'category': 'Sub Category'}
+    rating_field = 'Rating'
+    price_field = 'Price'
+    text_fields = ['Sub Category', 'Discount']
+    numeric_fields = {'Discount': parse_discount_amount}
+    currency = 'USD'
+    currency_field = 'Currency'
+    stop_words = BaseDatasetSearch.stop_words + ['electronics', 'electronic', 'device']
+    
     def __init__(self):
+        super().__init__()
         self.dataset_path = os.path.join(os.path.dirname(__file__), '../Dataset/ElectronicsData.csv')
         self.dataset_name = "Electronics Data"
     
@@ -31,154 +61,54 @@ class ElectronicsDataSearch:
         image_id = abs(hash(title)) % 1000
         image = f"https://picsum.photos/400/400?random={image_id}"
         
-        return {
-            'title': title,
-            'price': price,
-            'rating': rating,
-            'review': review,
-            'image': image,
-            'dataset': self.dataset_name,
-            'sub_category': str(row.get('Sub Category', '')).strip() if pd.notnull(row.get('Sub Category')) else '',
-            'discount': str(row.get('Discount', '')).strip() if pd.notnull(row.get('Discount')) else '',
-            'currency': str(row.get('Currency', '')).strip() if pd.notnull(row.get('Currency')) else '$'
-        }
-    
-    def search(self, query, max_results=5):
-        """Search specifically in Electronics dataset"""
-        query_lc = query.lower()
-        results = []
-        candidate_products = []
-        
-        # Price filter extraction for electronics (USD)
-        price_limit = None
-        price_match = re.search(r'(under|below|less than|upto|up to|≤|<=|<)\s*\$?([\d,]+)', query_lc)
-        if price_match:
-            price_limit = int(price_match.group(2).replace(',', ''))
-        
-        # Extract electronics-specific keywords
-        query_main = query_lc
-        if price_match:
-            query_main = query_main[:price_match.start()].strip()
-        
-        # Electronics-specific stop words
-        stop_words = ['under', 'below', 'less', 'than', 'upto', 'up', 'to', 'find', 'show', 'get', 'want', 'need', 'looking', 'for', 'electronics', 'electronic', 'device']
-        keywords = [kw for kw in query_main.split() if kw not in stop_words and len(kw) > 2]
-        
-        try:
-            df = pd.read_csv(self.dataset_path)
-            
-            for _, row in df.iterrows():
-                # Build searchable text from electronics-specific fields
-                searchable_fields = []
-                
-                # Title is primary search field
-                if pd.notnull(row.get('Title')):
-                    searchable_fields.append(str(row['Title']).lower())
-                
-                # Sub Category is secondary
-                if pd.notnull(row.get('Sub Category')):
-                    searchable_fields.append(str(row['Sub Category']).lower())
-                
-                # Feature/description is tertiary
-                if pd.notnull(row.get('Feature')):
-                    searchable_fields.append(str(row['Feature']).lower())
-                
-                searchable_text = ' '.join(searchable_fields)
-                
-                # Price filtering for electronics
-                if price_limit is not None:
-                    price_val = row.get('Price')
-                    if pd.notnull(price_val):
-                        price_str = str(price_val).replace('$', '').replace(',', '').replace(' ', '')
-                        digits = re.sub(r'[^\d]', '', price_str)
-                        if digits:
-                            found_price = int(digits)
-                            if found_price > price_limit:
-                                continue
-                
-                # Keyword matching for electronics search
-                match_count = sum(1 for kw in keywords if kw in searchable_text)
-                if match_count > 0 or not keywords:
-                    product_card = self.build_product_card(row)
-                    product_card['match_count'] = match_count
-                    candidate_products.append(product_card)
-                    
-        except Exception as e:
-            print(f"[ElectronicsDataSearch] Error reading dataset: {e}")
-            return []
-        
-        # Sort by match count and return top results
-        candidate_products.sort(key=lambda x: x.get('match_count', 0), reverse=True)
-        return candidate_products[:max_results]
+        # One value per card_fields entry, in order
+        return self._new_card(
+            title,
+            price,
+            rating,
+            review,
+            image,
+            self.dataset_name,  # dataset
+            str(row.get('Sub Category', '')).strip() if pd.notnull(row.get('Sub Category')) else '',  # sub_category
+            str(row.get('Discount', '')).strip() if pd.notnull(row.get('Discount')) else '',  # discount
+            str(row.get('Currency', '')).strip() if pd.notnull(row.get('Currency')) else '$'  # currency
+        )
     
     def search_by_category(self, category, max_results=5):
         """Search electronics by specific category"""
-        try:
-            df = pd.read_csv(self.dataset_path)
-            category_lower = category.lower()
-            
-            results = []
-            for _, row in df.iterrows():
-                if pd.notnull(row.get('Sub Category')):
-                    if category_lower in str(row['Sub Category']).lower():
-                        product_card = self.build_product_card(row)
-                        results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[ElectronicsDataSearch] Error in category search: {e}")
-            return []
+        return self._contains_filter('Sub Category', category, max_results, 'category search')
     
-    def search_by_price_range(self, min_price=None, max_price=None, max_results=5):
-        """Search electronics by price range"""
-        try:
-            df = pd.read_csv(self.dataset_path)
-            results = []
-            
-            for _, row in df.iterrows():
-                if pd.notnull(row.get('Price')):
-                    price_str = str(row['Price']).replace('$', '').replace(',', '').replace(' ', '')
-                    digits = re.sub(r'[^\d]', '', price_str)
-                    if digits:
-                        price = int(digits)
-                        
-                        # Check price range
-                        if min_price is not None and price < min_price:
-                            continue
-                        if max_price is not None and price > max_price:
-                            continue
-                        
-                        product_card = self.build_product_card(row)
-                        results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[ElectronicsDataSearch] Error in price range search: {e}")
-            return []
-    
-    def search_with_discount(self, max_results=5):
-        """Search electronics that have discounts"""
-        try:
-            df = pd.read_csv(self.dataset_path)
-            results = []
-            
-            for _, row in df.iterrows():
-                discount = str(row.get('Discount', '')).strip() if pd.notnull(row.get('Discount')) else ''
-                if discount and discount.lower() != 'no discount':
-                    product_card = self.build_product_card(row)
-                    results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[ElectronicsDataSearch] Error in discount search: {e}")
-            return []
+    def search_with_discount(self, min_discount_percentage=None, max_results=5):
+        """Search electronics discounted by at least min_discount_percentage.
+
+        Discounts are labels such as "After $200 OFF" on the listed (already
+        discounted) price, so the percentage is the amount over price plus
+        amount. Labels without an amount ("Price valid through 1/14/24",
+        "Free Shipping*") are not discounts.
+        """
+        def row_predicate(row):
+            amount = parse_discount_amount(row.get('Discount'))
+            price = parse_price(row.get(self.price_field))
+            if amount is None or price is None or amount <= 0:
+                return False
+            return min_discount_percentage is None or discount_percentage(amount, price) >= min_discount_percentage
+        
+        def mask(catalog):
+            amount = catalog.numeric('Discount')
+            keep = ~np.isnan(amount) & ~np.isnan(catalog.price) & (np.nan_to_num(amount) > 0)
+            if min_discount_percentage is not None:
+                with np.errstate(invalid='ignore'):
+                    keep &= discount_percentage(amount, catalog.price) >= min_discount_percentage
+            return keep
+        
+        return self._filter(mask, row_predicate, max_results, 'discount search')
 
 # Example usage
 if __name__ == "__main__":
     search = ElectronicsDataSearch()
     
     # Test general search
-    results = search.search("laptop under 1000")
+    results = search.search("laptop under $1000")
     print(f"Found {len(results)} laptops under $1000")
     
     # Test category search
@@ -0,0 +1,90 @@
+"""
+Facet counts (brand, category, memory, price range, ...) for search results.
+
+When a dataset loads, every facet column is factorized once into an integer
+label code per row, and every price is bucketed the same way. The facet
+counts of a result set are then one ``bincount`` of the codes at its row
+ids per facet; the result rows themselves are never read.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from .currency import CANONICAL_CURRENCY
+from .ranking import top_k_indices
+
+# Most frequent values returned per facet
+FACET_LIMIT = int(os.getenv('SEARCH_FACET_LIMIT', '20'))
+
+# Price buckets, in the canonical currency, shared by every dataset so their
+# counts can be added up
+PRICE_FACET = 'price'
+PRICE_BUCKET_EDGES = (1000, 5000, 10000, 20000, 50000, 100000)
+
+def price_bucket_labels():
+    """Label of every price bucket, cheapest first"""
+    edges = [f'{edge:,}' for edge in PRICE_BUCKET_EDGES]
+    return (
+        [f'under {CANONICAL_CURRENCY} {edges[0]}']
+        + [f'{CANONICAL_CURRENCY} {low}-{high}' for low, high in zip(edges[:-1], edges[1:])]
+        + [f'{CANONICAL_CURRENCY} {edges[-1]}+']
+    )
+
+def facet_label(value):
+    """Display label of a facet cell, or None when it is missing or blank"""
+    if pd.isnull(value):
+        return None
+    label = str(value).strip()
+    return label or None
+
+class FacetIndex:
+    """Label codes of every row for each facet of one dataset"""
+
+    def __init__(self, columns, canonical_price=None):
+        """``columns`` maps facet names to the column values; prices are bucketed"""
+        # facet -> (labels, code of every row or -1, whether labels keep their order)
+        self.facets = {}
+        for name, values in columns.items():
+            codes, labels = pd.factorize(pd.Series([facet_label(value) for value in values], dtype=object))
+            self.facets[name] = (list(labels), codes, False)
+
+        if canonical_price is not None:
+            codes = np.searchsorted(PRICE_BUCKET_EDGES, canonical_price, side='right')
+            codes[np.isnan(canonical_price)] = -1
+            self.facets[PRICE_FACET] = (price_bucket_labels(), codes, True)
+
+    def counts(self, row_ids, limit=FACET_LIMIT):
+        """``{facet: {label: count}}`` over the given rows.
+
+        Values are most frequent first (price buckets cheapest first), values
+        without rows are left out, and each facet keeps at most ``limit``
+        (every value when ``limit`` is None, e.g. for counts that
+        ``merge_facets`` adds up and truncates afterwards).
+        """
+        facet_counts = {}
+        for name, (labels, codes, ordered) in self.facets.items():
+            row_codes = codes[row_ids]
+            counts = np.bincount(row_codes[row_codes >= 0], minlength=len(labels))
+            present = np.flatnonzero(counts)
+            if not ordered:
+                present = present[top_k_indices(counts[present], len(present) if limit is None else limit)]
+            facet_counts[name] = {labels[code]: int(counts[code]) for code in present}
+        return facet_counts
+
+def merge_facets(facet_counts_list, limit=FACET_LIMIT):
+    """Add up the facet counts of several datasets; facets without any value are left out"""
+    merged = {}
+    for facet_counts in facet_counts_list:
+        for name, counts in facet_counts.items():
+            totals = merged.setdefault(name, {})
+            for label, count in counts.items():
+                totals[label] = totals.get(label, 0) + count
+
+    for name, totals in merged.items():
+        if name == PRICE_FACET:
+            order = {label: position for position, label in enumerate(price_bucket_labels())}
+            labels = sorted(totals, key=order.get)
+        else:
+            labels = sorted(totals, key=lambda label: -totals[label])[:limit]
+        merged[name] = {label: totals[label] for label in labels}
+    return {name: counts for name, counts in merged.items() if counts}
@@ -1,9 +1,22 @@
 import os
+import numpy as np
 import pandas as pd
-import re
+from .base_search import BaseDatasetSearch, parse_price
 
-class FashionDataSearch:
+class FashionDataSearch(BaseDatasetSearch):
+    search_fields = ['title', 'brand']
+    field_weights = {'title': 3.0, 'brand': 2.0}
+    suggestion_fields = ['brand', 'title']
+    # Keys of the cards build_product_card returns, in the order it passes their values
+    card_fields = ('title', 'price', 'rating', 'review', 'image', 'dataset', 'brand', 'actual_price', 'url', 'id')
+    facet_fields = {'brand': 'brand'}
+    price_field = 'sold_price'
+    text_fields = ['title', 'brand']
+    numeric_fields = {'sold_price': parse_price, 'actual_price': parse_price}
+    stop_words = BaseDatasetSearch.stop_words + ['fashion', 'clothing', 'wear', 'dress']
+    
     def __init__(self):
+        super().__init__()
         self.dataset_path = os.path.join(os.path.dirname(__file__), '../Dataset/Data - Copy.csv')
         self.dataset_name = "Fashion Data"
     
@@ -32,196 +45,49 @@ class FashionDataSearch:
             image_id = abs(hash(title)) % 1000
             image = f"https://picsum.photos/400/400?random={image_id}"
         
-        return {
-            'title': title,
-            'price': price,
-            'rating': rating,
-            'review': review,
-            'image': image,
-            'dataset': self.dataset_name,
-            'brand': brand,
-            'actual_price': str(row.get('actual_price', '')).strip() if pd.notnull(row.get('actual_price')) else '',
-            'url': str(row.get('url', '')).strip() if pd.notnull(row.get('url')) else '',
-            'id': str(row.get('id', '')).strip() if pd.notnull(row.get('id')) else ''
-        }
-    
-    def search(self, query, max_results=5):
-        """Search specifically in fashion dataset"""
-        query_lc = query.lower()
-        results = []
-        candidate_products = []
-        
-        # Price filter extraction for fashion (INR)
-        price_limit = None
-        price_match = re.search(r'(under|below|less than|upto|up to|≤|<=|<)\s*₹?([\d,]+)', query_lc)
-        if price_match:
-            price_limit = int(price_match.group(2).replace(',', ''))
-        
-        # Extract fashion-specific keywords
-        query_main = query_lc
-        if price_match:
-            query_main = query_main[:price_match.start()].strip()
-        
-        # Fashion-specific stop words
-        stop_words = ['under', 'below', 'less', 'than', 'upto', 'up', 'to', 'find', 'show', 'get', 'want', 'need', 'looking', 'for', 'fashion', 'clothing', 'wear', 'dress']
-        keywords = [kw for kw in query_main.split() if kw not in stop_words and len(kw) > 2]
-        
-        try:
-            # Read in chunks due to large file size
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    # Build searchable text from fashion-specific fields
-                    searchable_fields = []
-                    
-                    # Title is primary search field
-                    if pd.notnull(row.get('title')):
-                        searchable_fields.append(str(row['title']).lower())
-                    
-                    # Brand is secondary
-                    if pd.notnull(row.get('brand')):
-                        searchable_fields.append(str(row['brand']).lower())
-                    
-                    searchable_text = ' '.join(searchable_fields)
-                    
-                    # Price filtering for fashion
-                    if price_limit is not None:
-                        sold_price = row.get('sold_price')
-                        if pd.notnull(sold_price):
-                            price_str = str(sold_price).replace('₹', '').replace('â‚¹', '').replace(',', '').replace(' ', '')
-                            digits = re.sub(r'[^\d]', '', price_str)
-                            if digits:
-                                found_price = int(digits)
-                                if found_price > price_limit:
-                                    continue
-                    
-                    # Keyword matching for fashion search
-                    match_count = sum(1 for kw in keywords if kw in searchable_text)
-                    if match_count > 0 or not keywords:
-                        product_card = self.build_product_card(row)
-                        product_card['match_count'] = match_count
-                        candidate_products.append(product_card)
-                        
-        except Exception as e:
-            print(f"[FashionDataSearch] Error reading dataset: {e}")
-            return []
-        
-        # Sort by match count and return top results
-        candidate_products.sort(key=lambda x: x.get('match_count', 0), reverse=True)
-        return candidate_products[:max_results]
+        # One value per card_fields entry, in order
+        return self._new_card(
+            title,
+            price,
+            rating,
+            review,
+            image,
+            self.dataset_name,  # dataset
+            brand,
+            str(row.get('actual_price', '')).strip() if pd.notnull(row.get('actual_price')) else '',  # actual_price
+            str(row.get('url', '')).strip() if pd.notnull(row.get('url')) else '',  # url
+            str(row.get('id', '')).strip() if pd.notnull(row.get('id')) else ''  # id
+        )
     
     def search_by_brand(self, brand, max_results=5):
         """Search fashion items by specific brand"""
-        try:
-            brand_lower = brand.lower()
-            results = []
-            
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    if pd.notnull(row.get('brand')):
-                        if brand_lower in str(row['brand']).lower():
-                            product_card = self.build_product_card(row)
-                            results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FashionDataSearch] Error in brand search: {e}")
-            return []
+        return self._contains_filter('brand', brand, max_results, 'brand search')
     
     def search_by_category(self, category, max_results=5):
         """Search fashion items by category (saree, dress, etc.)"""
-        try:
-            category_lower = category.lower()
-            results = []
-            
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    if pd.notnull(row.get('title')):
-                        if category_lower in str(row['title']).lower():
-                            product_card = self.build_product_card(row)
-                            results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FashionDataSearch] Error in category search: {e}")
-            return []
-    
-    def search_by_price_range(self, min_price=None, max_price=None, max_results=5):
-        """Search fashion items by price range"""
-        try:
-            results = []
-            
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    if pd.notnull(row.get('sold_price')):
-                        price_str = str(row['sold_price']).replace('₹', '').replace('â‚¹', '').replace(',', '').replace(' ', '')
-                        digits = re.sub(r'[^\d]', '', price_str)
-                        if digits:
-                            price = int(digits)
-                            
-                            # Check price range
-                            if min_price is not None and price < min_price:
-                                continue
-                            if max_price is not None and price > max_price:
-                                continue
-                            
-                            product_card = self.build_product_card(row)
-                            results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FashionDataSearch] Error in price range search: {e}")
-            return []
+        return self._contains_filter('title', category, max_results, 'category search')
     
     def search_with_discount(self, min_discount_percentage=20, max_results=5):
         """Search fashion items with significant discounts"""
-        try:
-            results = []
-            
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    sold_price = row.get('sold_price')
-                    actual_price = row.get('actual_price')
-                    
-                    if pd.notnull(sold_price) and pd.notnull(actual_price):
-                        # Clean price strings
-                        sold_str = str(sold_price).replace('₹', '').replace('â‚¹', '').replace(',', '').strip()
-                        actual_str = str(actual_price).replace('₹', '').replace('â‚¹', '').replace(',', '').strip()
-                        
-                        if sold_str and actual_str and sold_str != 'nan' and actual_str != 'nan':
-                            try:
-                                sold = int(re.sub(r'[^\d]', '', sold_str))
-                                actual = int(re.sub(r'[^\d]', '', actual_str))
-                                
-                                if actual > 0:
-                                    discount_percentage = ((actual - sold) / actual) * 100
-                                    if discount_percentage >= min_discount_percentage:
-                                        product_card = self.build_product_card(row)
-                                        results.append(product_card)
-                            except ValueError:
-                                continue
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FashionDataSearch] Error in discount search: {e}")
-            return []
+        def row_predicate(row):
+            sold = parse_price(row.get('sold_price'))
+            actual = parse_price(row.get('actual_price'))
+            if sold is None or actual is None or actual <= 0:
+                return False
+            return ((actual - sold) / actual) * 100 >= min_discount_percentage
+        
+        def mask(catalog):
+            sold = catalog.numeric('sold_price')
+            actual = catalog.numeric('actual_price')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                discount_percentage = ((actual - sold) / actual) * 100
+            return (actual > 0) & (discount_percentage >= min_discount_percentage)
+        
+        return self._filter(mask, row_predicate, max_results, 'discount search')
     
     def search_by_fabric_type(self, fabric_type, max_results=5):
         """Search fashion items by fabric type (silk, cotton, etc.)"""
-        try:
-            fabric_lower = fabric_type.lower()
-            results = []
-            
-            for chunk in pd.read_csv(self.dataset_path, chunksize=1000):
-                for _, row in chunk.iterrows():
-                    if pd.notnull(row.get('title')):
-                        if fabric_lower in str(row['title']).lower():
-                            product_card = self.build_product_card(row)
-                            results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FashionDataSearch] Error in fabric search: {e}")
-            return []
+        return self._contains_filter('title', fabric_type, max_results, 'fabric search')
 
 # Example usage
 if __name__ == "__main__":
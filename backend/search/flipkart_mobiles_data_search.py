@@ -1,12 +1,88 @@
 import os
 import pandas as pd
-import re
+from .base_search import BaseDatasetSearch, parse_price
 
-class FlipkartMobilesSearch:
+def format_amount(value):
+    """Price without a trailing '.0' (11990.0 -> '11990')"""
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+class FlipkartMobilesSearch(BaseDatasetSearch):
+    search_fields = ['Brand', 'Model', 'Color', 'Memory', 'Storage']
+    field_weights = {'Brand': 2.0, 'Model': 3.0, 'Color': 1.0, 'Memory': 1.0, 'Storage': 1.0}
+    suggestion_fields = ['Brand', ('Brand', 'Model')]
+    # Keys of the cards build_product_card returns, in the order it passes their values
+    card_fields = ('title', 'price', 'rating', 'review', 'image', 'dataset', 'brand', 'model', 'color', 'memory', 'storage', 'colors', 'variants', 'price_min', 'price_max')
+    facet_fields = {'brand': 'Brand', 'memory': 'Memory', 'storage': 'Storage'}
+    rating_field = 'Rating'
+    price_field = 'Selling Price'
+    text_fields = ['Brand']
+    stop_words = BaseDatasetSearch.stop_words + ['mobile', 'phone', 'smartphone']
+    # Rows sharing these columns are colour variants of one product
+    variant_fields = ['Brand', 'Model', 'Memory', 'Storage']
+    # Separates the per-variant values stored in a collapsed row
+    variant_separator = '|'
+    
     def __init__(self):
+        super().__init__()
         self.dataset_path = os.path.join(os.path.dirname(__file__), '../Dataset/Flipkart_Mobiles.csv')
         self.dataset_name = "Flipkart Mobiles"
     
+    def _prepare(self, df):
+        """Collapse the colour variants of each Brand/Model/Memory/Storage into one row.
+
+        The file lists a phone once per colour (and sometimes per price), so
+        a collapsed row keeps the first variant's values plus: every colour
+        in 'Color', the lowest price in 'Selling Price' (so "under N" finds a
+        product when any variant qualifies), the highest in 'Max Selling
+        Price', the best 'Rating', and each variant's colour and price in
+        'Variant Colors' / 'Variant Prices'. Searches then scan and return
+        distinct products instead of colour duplicates.
+        """
+        df = super()._prepare(df)
+        keys = [field for field in self.variant_fields if field in df.columns]
+        if not keys or 'Color' not in df.columns:
+            return df
+        
+        # Row positions of every product, in order of first appearance
+        groups = sorted(df.groupby(keys, sort=False, dropna=False).indices.values(), key=lambda rows: rows[0])
+        colors = [str(color).strip() if pd.notnull(color) else '' for color in df['Color']]
+        prices = [parse_price(price) for price in df[self.price_field]] if self.price_field in df.columns else [None] * len(df)
+        ratings = df['Rating'].tolist() if 'Rating' in df.columns else [None] * len(df)
+        
+        collapsed = df.iloc[[rows[0] for rows in groups]].reset_index(drop=True)
+        variant_colors, variant_prices, all_colors, min_prices, max_prices, best_ratings = [], [], [], [], [], []
+        for rows in groups:
+            variants = list(dict.fromkeys((colors[row], prices[row]) for row in rows))
+            variant_colors.append(self.variant_separator.join(color for color, _ in variants))
+            variant_prices.append(self.variant_separator.join('' if price is None else format_amount(price) for _, price in variants))
+            all_colors.append(', '.join(dict.fromkeys(color for color, _ in variants if color)))
+            known_prices = [price for _, price in variants if price is not None]
+            min_prices.append(min(known_prices) if known_prices else None)
+            max_prices.append(max(known_prices) if known_prices else None)
+            known_ratings = [ratings[row] for row in rows if pd.notnull(ratings[row])]
+            best_ratings.append(max(known_ratings) if known_ratings else None)
+        
+        collapsed['Color'] = all_colors
+        collapsed['Variant Colors'] = variant_colors
+        collapsed['Variant Prices'] = variant_prices
+        if self.price_field in df.columns:
+            collapsed[self.price_field] = min_prices
+            collapsed['Max Selling Price'] = max_prices
+        if 'Rating' in df.columns:
+            collapsed['Rating'] = best_ratings
+        return collapsed
+    
+    def _variants(self, row):
+        """``[{'color', 'price'}]`` of a collapsed row, one per colour/price variant"""
+        if pd.isnull(row.get('Variant Colors')):
+            return []
+        colors = str(row['Variant Colors']).split(self.variant_separator)
+        prices = str(row.get('Variant Prices', '')).split(self.variant_separator)
+        return [
+            {'color': color, 'price': f"₹{price}" if price else 'N/A'}
+            for color, price in zip(colors, prices + [''] * (len(colors) - len(prices)))
+        ]
+    
     def build_product_card(self, row):
         """Build a product card specifically for Flipkart mobile data"""
         # Title: Combine Brand and Model
@@ -14,12 +90,14 @@ class FlipkartMobilesSearch:
         model = str(row.get('Model', '')).strip() if pd.notnull(row.get('Model')) else ''
         title = f"{brand} {model}".strip() if brand and model else 'Mobile Phone'
         
-        # Price: Use Selling Price
+        # Price: Use Selling Price, as a range when the variants differ
         price = 'N/A'
-        if pd.notnull(row.get('Selling Price')):
-            price_val = str(row.get('Selling Price')).replace('₹', '').replace(',', '').strip()
-            if price_val and price_val != 'nan':
-                price = f"₹{price_val}"
+        min_price = parse_price(row.get('Selling Price'))
+        max_price = parse_price(row.get('Max Selling Price'))
+        if min_price is not None:
+            price = f"₹{format_amount(min_price)}"
+            if max_price is not None and max_price > min_price:
+                price = f"₹{format_amount(min_price)} - ₹{format_amount(max_price)}"
         
         # Rating: Use Rating column
         rating = str(row.get('Rating', 'N/A')).strip() if pd.notnull(row.get('Rating')) else 'N/A'
@@ -32,134 +110,35 @@ class FlipkartMobilesSearch:
         
         review = f"{brand} {model} - {', '.join(specs)}" if specs else f"{brand} {model}"
         
+        # Variants: one entry per colour/price of the collapsed product
+        variants = self._variants(row)
+        
         # Image: Generate placeholder based on brand
         image_id = abs(hash(title)) % 1000
         image = f"https://picsum.photos/400/400?random={image_id}"
         
-        return {
-            'title': title,
-            'price': price,
-            'rating': rating,
-            'review': review,
-            'image': image,
-            'dataset': self.dataset_name,
-            'brand': brand,
-            'model': model,
-            'color': str(row.get('Color', '')).strip() if pd.notnull(row.get('Color')) else '',
-            'memory': str(row.get('Memory', '')).strip() if pd.notnull(row.get('Memory')) else '',
-            'storage': str(row.get('Storage', '')).strip() if pd.notnull(row.get('Storage')) else ''
-        }
-    
-    def search(self, query, max_results=5):
-        """Search specifically in Flipkart mobiles dataset"""
-        query_lc = query.lower()
-        results = []
-        candidate_products = []
-        
-        # Price filter extraction for mobiles
-        price_limit = None
-        price_match = re.search(r'(under|below|less than|upto|up to|≤|<=|<)\s*₹?([\d,]+)', query_lc)
-        if price_match:
-            price_limit = int(price_match.group(2).replace(',', ''))
-        
-        # Extract mobile-specific keywords
-        query_main = query_lc
-        if price_match:
-            query_main = query_main[:price_match.start()].strip()
-        
-        # Mobile-specific stop words
-        stop_words = ['under', 'below', 'less', 'than', 'upto', 'up', 'to', 'find', 'show', 'get', 'want', 'need', 'looking', 'for', 'mobile', 'phone', 'smartphone']
-        keywords = [kw for kw in query_main.split() if kw not in stop_words and len(kw) > 2]
-        
-        try:
-            df = pd.read_csv(self.dataset_path)
-            
-            for _, row in df.iterrows():
-                # Build searchable text from mobile-specific fields
-                searchable_fields = []
-                
-                # Brand and Model are primary search fields
-                for field in ['Brand', 'Model']:
-                    if field in row and pd.notnull(row[field]):
-                        searchable_fields.append(str(row[field]).lower())
-                
-                # Color, Memory, Storage are secondary
-                for field in ['Color', 'Memory', 'Storage']:
-                    if field in row and pd.notnull(row[field]):
-                        searchable_fields.append(str(row[field]).lower())
-                
-                searchable_text = ' '.join(searchable_fields)
-                
-                # Price filtering for mobiles
-                if price_limit is not None:
-                    selling_price = row.get('Selling Price')
-                    if pd.notnull(selling_price):
-                        price_str = str(selling_price).replace('₹', '').replace(',', '').replace(' ', '')
-                        digits = re.sub(r'[^\d]', '', price_str)
-                        if digits:
-                            found_price = int(digits)
-                            if found_price > price_limit:
-                                continue
-                
-                # Keyword matching for mobile search
-                match_count = sum(1 for kw in keywords if kw in searchable_text)
-                if match_count > 0 or not keywords:
-                    product_card = self.build_product_card(row)
-                    product_card['match_count'] = match_count
-                    candidate_products.append(product_card)
-                    
-        except Exception as e:
-            print(f"[FlipkartMobilesSearch] Error reading dataset: {e}")
-            return []
-        
-        # Sort by match count and return top results
-        candidate_products.sort(key=lambda x: x.get('match_count', 0), reverse=True)
-        return candidate_products[:max_results]
+        # One value per card_fields entry, in order
+        return self._new_card(
+            title,
+            price,
+            rating,
+            review,
+            image,
+            self.dataset_name,  # dataset
+            brand,
+            model,
+            str(row.get('Color', '')).strip() if pd.notnull(row.get('Color')) else '',  # color
+            str(row.get('Memory', '')).strip() if pd.notnull(row.get('Memory')) else '',  # memory
+            str(row.get('Storage', '')).strip() if pd.notnull(row.get('Storage')) else '',  # storage
+            list(dict.fromkeys(variant['color'] for variant in variants if variant['color'])),  # colors
+            variants,
+            min_price,  # price_min
+            max_price if max_price is not None else min_price  # price_max
+        )
     
     def search_by_brand(self, brand, max_results=5):
         """Search mobiles by specific brand"""
-        try:
-            df = pd.read_csv(self.dataset_path)
-            brand_lower = brand.lower()
-            
-            results = []
-            for _, row in df.iterrows():
-                if pd.notnull(row.get('Brand')):
-                    if brand_lower in str(row['Brand']).lower():
-                        product_card = self.build_product_card(row)
-                        results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FlipkartMobilesSearch] Error in brand search: {e}")
-            return []
-    
-    def search_by_price_range(self, min_price=None, max_price=None, max_results=5):
-        """Search mobiles by price range"""
-        try:
-            df = pd.read_csv(self.dataset_path)
-            results = []
-            
-            for _, row in df.iterrows():
-                if pd.notnull(row.get('Selling Price')):
-                    price_str = str(row['Selling Price']).replace('₹', '').replace(',', '').replace(' ', '')
-                    digits = re.sub(r'[^\d]', '', price_str)
-                    if digits:
-                        price = int(digits)
-                        
-                        # Check price range
-                        if min_price is not None and price < min_price:
-                            continue
-                        if max_price is not None and price > max_price:
-                            continue
-                        
-                        product_card = self.build_product_card(row)
-                        results.append(product_card)
-            
-            return results[:max_results]
-        except Exception as e:
-            print(f"[FlipkartMobilesSearch] Error in price range search: {e}")
-            return []
+        return self._contains_filter('Brand', brand, max_results, 'brand search')
 
 # Example usage
 if __name__ == "__main__":
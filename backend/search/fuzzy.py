@@ -0,0 +1,99 @@
+"""
+Typo tolerance for keyword search.
+
+``TrigramIndex`` maps the character trigrams of every vocabulary token to
+the tokens containing them. A misspelled keyword shares most of its
+trigrams with the intended token, so counting shared trigrams narrows the
+vocabulary down to a handful of candidates; only those are checked with a
+bounded edit distance. No dataset rows are visited.
+
+Like exact keywords, which match any token containing them, a keyword is
+compared with the prefixes of each token, so "sari" is one edit away from
+"saree".
+"""
+
+import numpy as np
+
+def trigrams(text):
+    """Character trigrams of a word, padded so short words still have some"""
+    padded = f'${text}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def max_edit_distance(keyword):
+    """Edits tolerated for a keyword: none up to 3 letters, one up to 8, then two"""
+    if len(keyword) <= 3:
+        return 0
+    return 1 if len(keyword) <= 8 else 2
+
+def bounded_edit_distance(a, b, max_distance, prefix=False):
+    """Edit distance of a and b, or ``max_distance + 1`` once it is exceeded.
+
+    Insertions, deletions, substitutions and swaps of two adjacent letters
+    ("iphnoe") cost one edit each. With ``prefix=True`` this is the distance
+    from a to the closest prefix of b.
+    """
+    if len(b) < len(a) - max_distance or (not prefix and len(b) > len(a) + max_distance):
+        return max_distance + 1
+
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before_previous is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before_previous[j - 2] + 1)
+            current.append(distance)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(min(previous) if prefix else previous[-1], max_distance + 1)
+
+class TrigramIndex:
+    """Trigram -> token ids index over a vocabulary"""
+
+    def __init__(self, tokens, frequencies=None):
+        self.tokens = list(tokens)
+        # Used to break distance ties in favour of the more common token
+        self.frequencies = np.asarray(frequencies if frequencies is not None else np.ones(len(self.tokens)))
+
+        postings = {}
+        for token_id, token in enumerate(self.tokens):
+            for gram in trigrams(token):
+                postings.setdefault(gram, []).append(token_id)
+        self.postings = {gram: np.array(token_ids, dtype=np.int64) for gram, token_ids in postings.items()}
+
+    def closest(self, keyword, max_distance=None):
+        """The vocabulary token nearest to the keyword within the edit bound, or None.
+
+        Candidates must share enough trigrams with the keyword to be within
+        the bound (each edit changes at most three trigrams, and a prefix
+        match loses the keyword's end-of-word trigram). Corrections keep the
+        first letter, which typos rarely change; ties in distance go to the
+        more frequent token.
+        """
+        if max_distance is None:
+            max_distance = max_edit_distance(keyword)
+        if max_distance <= 0:
+            return None
+
+        grams = trigrams(keyword)
+        posting_lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not posting_lists:
+            return None
+
+        shared = np.bincount(np.concatenate(posting_lists), minlength=len(self.tokens))
+        candidates = np.flatnonzero(shared >= max(1, len(grams) - 3 * max_distance - 1))
+
+        best, best_key = None, None
+        for token_id in candidates:
+            token = self.tokens[token_id]
+            if token[0] != keyword[0]:
+                continue
+            distance = bounded_edit_distance(keyword, token, max_distance, prefix=True)
+            if distance > max_distance:
+                continue
+            key = (distance, -self.frequencies[token_id], token)
+            if best_key is None or key < best_key:
+                best, best_key = token, key
+        return best
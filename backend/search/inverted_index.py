@@ -0,0 +1,117 @@
+import re
+from collections import defaultdict
+import numpy as np
+from .fuzzy import TrigramIndex
+
+class InvertedIndex:
+    """Token -> posting list index over a dataset's searchable text.
+
+    Documents are tokenized on whitespace, exactly like the per-row
+    ``searchable_text`` strings the engines used to build on every query.
+    Keywords keep their substring semantics: a keyword matches every token
+    that contains it, so ``lookup("sam")`` returns the rows mentioning
+    "samsung". Keyword lookups are cached because the vocabulary scan is the
+    only part whose cost grows with the dataset.
+    """
+
+    MAX_CACHED_KEYWORDS = 4096
+
+    def __init__(self, documents):
+        postings = defaultdict(list)
+        size = 0
+        for row_id, text in enumerate(documents):
+            for token in set(text.split()):
+                postings[token].append(row_id)
+            size += 1
+
+        self.size = size
+        self.postings = {token: np.array(row_ids, dtype=np.int64) for token, row_ids in postings.items()}
+        self._keyword_cache = {}
+        self._token_cache = {}
+
+        # The vocabulary joined into one newline-separated string, so a
+        # keyword's substring matches are found by a single regex scan;
+        # tokens never contain whitespace, so a match cannot span two tokens
+        self._tokens = list(self.postings)
+        self._vocabulary = '\n'.join(self._tokens)
+        self._token_starts = np.cumsum([0] + [len(token) + 1 for token in self._tokens[:-1]]) if self._tokens else np.empty(0, dtype=np.int64)
+
+        # Fuzzy lookups for keywords that match nothing (typos)
+        self.trigram_index = TrigramIndex(self._tokens, [len(self.postings[token]) for token in self._tokens])
+        self._correction_cache = {}
+
+    def lookup(self, keyword):
+        """Sorted row ids whose text contains the keyword"""
+        row_ids = self._keyword_cache.get(keyword)
+        if row_ids is None:
+            row_ids = self.lookup_many([keyword])[keyword]
+        return row_ids
+
+    def lookup_many(self, keywords):
+        """Row ids for several keywords.
+
+        Returns a dict keyword -> sorted row ids. Each distinct keyword is
+        resolved once, however many queries of a batch mention it, and
+        keywords already cached are not rescanned.
+        """
+        results = {}
+        pending = []
+        for keyword in dict.fromkeys(keywords):
+            row_ids = self._keyword_cache.get(keyword)
+            if row_ids is None:
+                pending.append(keyword)
+            else:
+                results[keyword] = row_ids
+        if not pending:
+            return results
+
+        for keyword in pending:
+            posting_lists = [self.postings[token] for token in self.tokens(keyword)]
+            if not posting_lists:
+                row_ids = np.empty(0, dtype=np.int64)
+            elif len(posting_lists) == 1:
+                row_ids = posting_lists[0]
+            else:
+                row_ids = np.unique(np.concatenate(posting_lists))
+
+            if len(self._keyword_cache) >= self.MAX_CACHED_KEYWORDS:
+                self._keyword_cache.clear()
+            self._keyword_cache[keyword] = row_ids
+            results[keyword] = row_ids
+        return results
+
+    def tokens(self, keyword):
+        """Vocabulary tokens containing the keyword"""
+        tokens = self._token_cache.get(keyword)
+        if tokens is None:
+            starts = [match.start() for match in re.finditer(re.escape(keyword), self._vocabulary)]
+            token_ids = np.unique(np.searchsorted(self._token_starts, starts, side='right') - 1)
+            tokens = [self._tokens[token_id] for token_id in token_ids]
+
+            if len(self._token_cache) >= self.MAX_CACHED_KEYWORDS:
+                self._token_cache.clear()
+            self._token_cache[keyword] = tokens
+        return tokens
+
+    def correct(self, keyword):
+        """Closest vocabulary token to a misspelled keyword, or None"""
+        if keyword not in self._correction_cache:
+            if len(self._correction_cache) >= self.MAX_CACHED_KEYWORDS:
+                self._correction_cache.clear()
+            self._correction_cache[keyword] = self.trigram_index.closest(keyword)
+        return self._correction_cache[keyword]
+
+    def match_counts(self, keywords):
+        """Union of the keywords' posting lists with per-row match counts.
+
+        Returns ``(row_ids, counts)`` with row ids in ascending (file) order.
+        A keyword repeated in the query counts once per occurrence, matching
+        ``sum(1 for kw in keywords if kw in searchable_text)``.
+        """
+        posting_lists = [self.lookup(keyword) for keyword in keywords]
+        posting_lists = [ids for ids in posting_lists if len(ids)]
+        if not posting_lists:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        return np.unique(np.concatenate(posting_lists), return_counts=True)
@@ -1,12 +1,82 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
 from .flipkart_mobiles_data_search import FlipkartMobilesSearch
 from .electronics_data_search import ElectronicsDataSearch
 from .amazon_data_search import AmazonDataSearch
 from .dataset_data_search import DatasetDataSearch
 from .fashion_data_search import FashionDataSearch
+from .currency import CANONICAL_CURRENCY, normalize_currency
+from .query_cache import QueryCache, normalize_query
+from .single_flight import SingleFlight
+from .ranking import check_ranking, top_k_products, by_match_count, by_price, by_score
+from .facets import merge_facets
+from .records import ProductRecord
+
+# How engines are run for one request: one after another, or in parallel on
+# a thread or process pool with a per-engine time budget (seconds)
+FAN_OUT_MODES = ('sequential', 'thread', 'process')
+DEFAULT_FAN_OUT = os.getenv('SEARCH_FAN_OUT', 'thread')
+DEFAULT_ENGINE_TIMEOUT = float(os.getenv('SEARCH_ENGINE_TIMEOUT', '2.0'))
+
+# Result cache size (0 disables it) and time-to-live in seconds
+DEFAULT_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '1024'))
+DEFAULT_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '300'))
+
+class SearchResults(list):
+    """Combined product cards from a cross-dataset search.
+
+    Behaves like a plain list. ``timed_out`` names the datasets that did not
+    answer within their time budget, in which case the results are partial.
+    ``facets`` holds the facet counts when they were requested, else None.
+    """
+
+    def __init__(self, products=(), timed_out=(), facets=None):
+        super().__init__(products)
+        self.timed_out = list(timed_out)
+        self.facets = facets
+
+    @property
+    def partial(self):
+        return bool(self.timed_out)
+
+    def copy(self):
+        """Copy with its own cards and facets, so callers cannot modify shared results"""
+        facets = {name: dict(counts) for name, counts in self.facets.items()} if self.facets is not None else None
+        return SearchResults([product.copy() for product in self], self.timed_out, facets)
+
+    def to_dicts(self):
+        """The cards as plain dicts, for JSON responses"""
+        return [product.to_dict() if isinstance(product, ProductRecord) else dict(product) for product in self]
+
+# Search instance owned by each process-pool worker
+_worker_search = None
+
+def _init_worker(execution_modes):
+    """Process-pool initializer: a worker takes no task before every dataset is loaded"""
+    global _worker_search
+    _worker_search = MasterSearch(fan_out='sequential')
+    for dataset_name, execution_mode in execution_modes.items():
+        _worker_search.search_engines[dataset_name].execution_mode = execution_mode
+    for search_engine in _worker_search.search_engines.values():
+        _load_catalog(search_engine)
+
+def _worker_ready():
+    return True
+
+def _load_catalog(search_engine):
+    """Load a dataset; a failure is reported by the search that follows"""
+    try:
+        search_engine.catalog
+    except Exception:
+        pass
+
+def _run_in_worker(dataset_name, method_name, args, kwargs):
+    search_engine = _worker_search.search_engines[dataset_name]
+    return getattr(search_engine, method_name)(*args, **kwargs)
 
 class MasterSearch:
-    def __init__(self):
+    def __init__(self, execution_mode=None, fan_out=None, engine_timeout=None, max_workers=None, cache_size=None, cache_ttl=None, ranking=None):
         """Initialize all dataset search engines"""
         self.search_engines = {
             'flipkart_mobiles': FlipkartMobilesSearch(),
@@ -16,6 +86,32 @@ class MasterSearch:
             'fashion': FashionDataSearch()
         }
         
+        # "vectorized" (default) or "iterrows" to diff against the row-by-row scan
+        if execution_mode is not None:
+            for search_engine in self.search_engines.values():
+                search_engine.execution_mode = execution_mode
+        
+        # Default ranking of search_all_datasets: "match_count", "bm25" or "semantic"
+        self.ranking = check_ranking(ranking)
+        
+        self.fan_out = fan_out or DEFAULT_FAN_OUT
+        if self.fan_out not in FAN_OUT_MODES:
+            raise ValueError(f"Unknown fan-out mode '{self.fan_out}'. Available modes: {list(FAN_OUT_MODES)}")
+        self.engine_timeout = engine_timeout if engine_timeout is not None else DEFAULT_ENGINE_TIMEOUT
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Whether a process-pool worker has finished its initializer
+        self._workers_ready = False
+        
+        # Results of repeated queries, invalidated whenever a dataset reloads
+        cache_size = DEFAULT_CACHE_SIZE if cache_size is None else cache_size
+        cache_ttl = DEFAULT_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        
+        # Identical searches arriving while one is running wait for it
+        self.single_flight = SingleFlight()
+        
         # Dataset descriptions for better search targeting
         self.dataset_descriptions = {
             'flipkart_mobiles': 'Mobile phones and smartphones from Flipkart',
@@ -25,21 +121,236 @@ class MasterSearch:
             'fashion': 'Fashion items including sarees, clothing, and accessories'
         }
     
-    def search_all_datasets(self, query, max_results_per_dataset=3, max_total_results=15):
-        """Search across all datasets and return combined results"""
+    def _get_executor(self):
+        """Pool shared by all requests, created on first parallel search"""
+        with self._executor_lock:
+            if self._executor is None:
+                if self.fan_out == 'process':
+                    execution_modes = {name: engine.execution_mode for name, engine in self.search_engines.items()}
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=_init_worker,
+                        initargs=(execution_modes,)
+                    )
+                    self._workers_ready = False
+                else:
+                    max_workers = self.max_workers or max(len(self.search_engines), min(32, (os.cpu_count() or 1) + 4))
+                    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='master-search')
+            return self._executor
+    
+    def close(self):
+        """Shut down the worker pool (a new one is created on the next search)"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fan_out(self, calls, description=''):
+        """Run one search method per dataset and combine the results.
+
+        ``calls`` is a list of ``(dataset_name, method_name, args)``. Results
+        are concatenated in call order. In thread/process mode every engine
+        runs in parallel and engines that miss ``engine_timeout`` are left
+        out and reported as timed out. The time budget starts once every
+        dataset involved is loaded: a first load (or reload) is waited for.
+        """
+        results, timed_out = self._run_calls(calls, description)
         all_results = []
+        for dataset_name, _, _ in calls:
+            all_results.extend(results.get(dataset_name, []))
+        return all_results, timed_out
+    
+    def _run_calls(self, calls, description=''):
+        """Results of ``_fan_out`` calls by dataset, plus the timed-out datasets"""
+        results = {}
+        timed_out = []
         
-        for dataset_name, search_engine in self.search_engines.items():
-            try:
-                results = search_engine.search(query, max_results_per_dataset)
-                all_results.extend(results)
-            except Exception as e:
-                print(f"[MasterSearch] Error searching {dataset_name}: {e}")
-                continue
+        if self.fan_out == 'sequential':
+            for dataset_name, method_name, args in calls:
+                try:
+                    results[dataset_name] = getattr(self.search_engines[dataset_name], method_name)(*args)
+                except Exception as e:
+                    print(f"[MasterSearch] Error searching {dataset_name}{description}: {e}")
+        else:
+            executor = self._get_executor()
+            self._load_catalogs(executor, [dataset_name for dataset_name, _, _ in calls])
+            futures = {}
+            for dataset_name, method_name, args in calls:
+                if self.fan_out == 'process':
+                    future = executor.submit(_run_in_worker, dataset_name, method_name, args, {})
+                else:
+                    future = executor.submit(getattr(self.search_engines[dataset_name], method_name), *args)
+                futures[future] = dataset_name
+            
+            done, not_done = wait(futures, timeout=self.engine_timeout)
+            for future in not_done:
+                future.cancel()
+                timed_out.append(futures[future])
+                print(f"[MasterSearch] {futures[future]} timed out after {self.engine_timeout}s{description}")
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"[MasterSearch] Error searching {futures[future]}{description}: {e}")
+        
+        timed_out = [dataset_name for dataset_name, _, _ in calls if dataset_name in timed_out]
+        return results, timed_out
+    
+    def _load_catalogs(self, executor, dataset_names):
+        """Wait for the datasets that are not loaded yet to load, on the pool"""
+        if self.fan_out == 'process':
+            # Workers load every dataset in the pool initializer, before they
+            # take any task, so a search never parses inside its budget. The
+            # first search only waits for one worker to be initialized, so
+            # its tasks do not queue behind the loading.
+            if not self._workers_ready:
+                executor.submit(_worker_ready).result()
+                self._workers_ready = True
+            return
+        loading = [self.search_engines[name] for name in dict.fromkeys(dataset_names) if not self.search_engines[name].is_loaded]
+        wait([executor.submit(_load_catalog, search_engine) for search_engine in loading])
+    
+    def _generation(self):
+        """Versions of every dataset; changes whenever one is (re)loaded"""
+        return tuple(search_engine.version for search_engine in self.search_engines.values())
+    
+    def _cached(self, method_name, params, compute):
+        """Serve a search from the result cache, computing and storing it on a miss.
+
+        Concurrent misses for the same search share one computation. Partial
+        results (an engine timed out) and results computed while a dataset
+        was being reloaded are not stored.
+        """
+        key = (method_name,) + params
+        generation = self._generation()
+        if self.cache is not None:
+            cached = self.cache.get(key, generation)
+            if cached is not None:
+                # Hand out copies so callers cannot modify the cached cards
+                return cached.copy()
+        
+        results = self.single_flight.do((key, generation), lambda: self._compute_and_store(key, generation, compute))
+        # Coalesced callers share one result, so each gets its own cards
+        return results.copy()
+    
+    def _compute_and_store(self, key, generation, compute):
+        results = compute()
+        self._store(key, generation, results)
+        return results
+    
+    def _store(self, key, generation, results):
+        if self.cache is None:
+            return
         
-        # Sort by match count and return top results
-        all_results.sort(key=lambda x: x.get('match_count', 0), reverse=True)
-        return all_results[:max_total_results]
+        # Datasets loaded for the first time during the search are fine;
+        # a reload in the middle of it may have mixed old and new data
+        current = self._generation()
+        consistent = all(after == before or (before, after) == (0, 1) for before, after in zip(generation, current))
+        if not results.partial and consistent:
+            self.cache.put(key, current, results.copy())
+    
+    def get_cache_stats(self):
+        """Hit/miss counters and size of the result cache"""
+        return self.cache.stats() if self.cache is not None else {'enabled': False}
+    
+    def get_single_flight_stats(self):
+        """How many searches ran and how many were coalesced into them"""
+        return self.single_flight.stats()
+    
+    def search_all_datasets(self, query, max_results_per_dataset=3, max_total_results=15, ranking=None, include_facets=False):
+        """Search across all datasets and return combined results.
+
+        With ``ranking='bm25'`` every engine ranks by normalized BM25F
+        relevance, and with ``ranking='semantic'`` by cosine similarity of
+        dense vectors; the merge then keeps the highest scores across datasets.
+
+        With ``include_facets=True`` the results' ``facets`` count every
+        matching product of every dataset by brand, category, memory,
+        storage and price bucket (``{facet: {value: count}}``).
+        """
+        query = normalize_query(query)
+        ranking = check_ranking(ranking or self.ranking)
+        
+        def compute():
+            if not include_facets:
+                calls = [(dataset_name, 'search', (query, max_results_per_dataset, ranking)) for dataset_name in self.search_engines]
+                all_results, timed_out = self._fan_out(calls)
+                return self._merge(all_results, max_total_results, ranking, timed_out)
+            
+            # Every value's full count per dataset; the merge keeps the most frequent overall
+            calls = [(dataset_name, 'faceted_search', (query, max_results_per_dataset, ranking, None)) for dataset_name in self.search_engines]
+            results, timed_out = self._run_calls(calls)
+            answered = [results[dataset_name] for dataset_name, _, _ in calls if dataset_name in results]
+            merged = self._merge([product for products, _ in answered for product in products], max_total_results, ranking, timed_out)
+            merged.facets = merge_facets([facets for _, facets in answered])
+            return merged
+        
+        return self._cached('search_all_datasets', (query, max_results_per_dataset, max_total_results, ranking, include_facets), compute)
+    
+    def _merge(self, all_results, max_total_results, ranking, timed_out):
+        """Keep the best results by match count or score; ties keep dataset order.
+
+        Typo-corrected results are dropped when an exact result from another
+        dataset matches more keywords than they do.
+        """
+        exact_match_counts = [product.get('match_count', 0) for product in all_results if not product.get('corrected')]
+        if exact_match_counts:
+            best_exact = max(exact_match_counts)
+            all_results = [product for product in all_results if not product.get('corrected') or product.get('match_count', 0) >= best_exact]
+        key = by_match_count if ranking == 'match_count' else by_score
+        return SearchResults(top_k_products(all_results, max_total_results, key), timed_out)
+    
+    def search_many(self, queries, max_results_per_dataset=3, max_total_results=15, ranking=None):
+        """Run several searches at once; returns one SearchResults per query, in order.
+
+        Cached queries are answered from the cache. The rest are sent to each
+        engine as one batch (one fan-out, one set of index lookups per
+        dataset) and their results are cached like single searches, so a
+        batch also pre-warms the cache for ``search_all_datasets``.
+        """
+        queries = [normalize_query(query) for query in queries]
+        ranking = check_ranking(ranking or self.ranking)
+        generation = self._generation()
+        answers = {}
+        
+        def cache_key(query):
+            return ('search_all_datasets', query, max_results_per_dataset, max_total_results, ranking, False)
+        
+        for query in dict.fromkeys(queries):
+            cached = self.cache.get(cache_key(query), generation) if self.cache is not None else None
+            if cached is not None:
+                answers[query] = cached
+        
+        pending = [query for query in dict.fromkeys(queries) if query not in answers]
+        if pending:
+            calls = [(dataset_name, 'search_many', (pending, max_results_per_dataset, ranking)) for dataset_name in self.search_engines]
+            batch_results, timed_out = self._run_calls(calls, ' (batch)')
+            engine_results = [batch_results[dataset_name] for dataset_name, _, _ in calls if dataset_name in batch_results]
+            
+            for position, query in enumerate(pending):
+                all_results = [product for results in engine_results for product in results[position]]
+                results = self._merge(all_results, max_total_results, ranking, timed_out)
+                self._store(cache_key(query), generation, results)
+                answers[query] = results
+        
+        # Each position gets its own cards, even for repeated queries
+        return [answers[query].copy() for query in queries]
+    
+    def autocomplete(self, prefix, limit=8):
+        """Type-ahead suggestions from every dataset, most popular first.
+
+        Each dataset keeps a prefix index built when it loads (and rebuilt
+        when it reloads), so this is a handful of binary searches; it does
+        not go through the fan-out pool or the result cache.
+        """
+        suggestions = {}
+        for search_engine in self.search_engines.values():
+            for text, popularity in search_engine.autocomplete(prefix, limit):
+                key = text.lower()
+                if key not in suggestions or popularity > suggestions[key][1]:
+                    suggestions[key] = (text, popularity)
+        ranked = sorted(suggestions.values(), key=lambda suggestion: (-suggestion[1], suggestion[0].lower()))
+        return [text for text, _ in ranked[:limit]]
     
     def search_specific_dataset(self, dataset_name, query, max_results=5):
         """Search in a specific dataset"""
@@ -50,90 +361,116 @@ class MasterSearch:
     
     def search_by_category(self, category, max_results_per_dataset=3, max_total_results=15):
         """Search for products by category across all datasets"""
-        all_results = []
+        category = normalize_query(category)
         
-        # Map common categories to appropriate datasets
-        category_mapping = {
-            'mobile': ['flipkart_mobiles'],
-            'phone': ['flipkart_mobiles'],
-            'smartphone': ['flipkart_mobiles'],
-            'electronics': ['electronics', 'amazon', 'general_dataset'],
-            'laptop': ['electronics', 'amazon', 'general_dataset'],
-            'computer': ['electronics', 'amazon', 'general_dataset'],
-            'fashion': ['fashion'],
-            'clothing': ['fashion'],
-            'saree': ['fashion'],
-            'dress': ['fashion'],
-            'accessories': ['fashion', 'amazon', 'general_dataset']
-        }
+        def compute():
+            # Map common categories to appropriate datasets
+            category_mapping = {
+                'mobile': ['flipkart_mobiles'],
+                'phone': ['flipkart_mobiles'],
+                'smartphone': ['flipkart_mobiles'],
+                'electronics': ['electronics', 'amazon', 'general_dataset'],
+                'laptop': ['electronics', 'amazon', 'general_dataset'],
+                'computer': ['electronics', 'amazon', 'general_dataset'],
+                'fashion': ['fashion'],
+                'clothing': ['fashion'],
+                'saree': ['fashion'],
+                'dress': ['fashion'],
+                'accessories': ['fashion', 'amazon', 'general_dataset']
+            }
         
-        category_lower = category.lower()
-        target_datasets = []
+            category_lower = category.lower()
+            target_datasets = []
         
-        # Find matching datasets for the category
-        for cat_key, datasets in category_mapping.items():
-            if cat_key in category_lower:
-                target_datasets.extend(datasets)
+            # Find matching datasets for the category
+            for cat_key, datasets in category_mapping.items():
+                if cat_key in category_lower:
+                    target_datasets.extend(datasets)
         
-        # If no specific mapping, search all datasets
-        if not target_datasets:
-            target_datasets = list(self.search_engines.keys())
+            # If no specific mapping, search all datasets
+            if not target_datasets:
+                target_datasets = list(self.search_engines.keys())
         
-        # Remove duplicates
-        target_datasets = list(set(target_datasets))
+            # Remove duplicates, keeping the order so results are deterministic
+            target_datasets = list(dict.fromkeys(target_datasets))
         
-        for dataset_name in target_datasets:
-            try:
+            calls = []
+            for dataset_name in target_datasets:
                 search_engine = self.search_engines[dataset_name]
-                
+            
                 # Use category-specific search methods if available
                 if hasattr(search_engine, 'search_by_category'):
-                    results = search_engine.search_by_category(category, max_results_per_dataset)
+                    method_name = 'search_by_category'
                 elif hasattr(search_engine, 'search_by_brand'):
-                    results = search_engine.search_by_brand(category, max_results_per_dataset)
+                    method_name = 'search_by_brand'
                 else:
-                    results = search_engine.search(category, max_results_per_dataset)
-                
-                all_results.extend(results)
-            except Exception as e:
-                print(f"[MasterSearch] Error searching {dataset_name} for category '{category}': {e}")
-                continue
+                    method_name = 'search'
+                calls.append((dataset_name, method_name, (category, max_results_per_dataset)))
+        
+            all_results, timed_out = self._fan_out(calls, f" for category '{category}'")
+        
+            # Keep the best results by match count; ties keep dataset order
+            return SearchResults(top_k_products(all_results, max_total_results, by_match_count), timed_out)
         
-        # Sort by match count and return top results
-        all_results.sort(key=lambda x: x.get('match_count', 0), reverse=True)
-        return all_results[:max_total_results]
+        return self._cached('search_by_category', (category, max_results_per_dataset, max_total_results), compute)
     
-    def search_by_price_range(self, min_price=None, max_price=None, max_results_per_dataset=3, max_total_results=15):
-        """Search for products by price range across all datasets"""
-        all_results = []
+    def search_by_price_range(self, min_price=None, max_price=None, max_results_per_dataset=3, max_total_results=15, currency=CANONICAL_CURRENCY):
+        """Search for products by price range across all datasets.
+
+        Bounds are in ``currency`` (INR by default) and compared against each
+        dataset's canonical-currency prices, so USD and INR products mix correctly.
+        Unknown currencies raise ValueError.
+        """
+        currency = normalize_currency(currency)
         
-        for dataset_name, search_engine in self.search_engines.items():
-            try:
-                if hasattr(search_engine, 'search_by_price_range'):
-                    results = search_engine.search_by_price_range(min_price, max_price, max_results_per_dataset)
-                    all_results.extend(results)
-            except Exception as e:
-                print(f"[MasterSearch] Error searching {dataset_name} by price range: {e}")
-                continue
+        def compute():
+            calls = [
+                (dataset_name, 'search_by_price_range', (min_price, max_price, max_results_per_dataset, currency))
+                for dataset_name, search_engine in self.search_engines.items()
+                if hasattr(search_engine, 'search_by_price_range')
+            ]
+            all_results, timed_out = self._fan_out(calls, ' by price range')
+            
+            # Keep the cheapest results, using the numeric price carried on each result
+            return SearchResults(top_k_products(all_results, max_total_results, by_price), timed_out)
         
-        # Sort by price (if available) and return top results
-        all_results.sort(key=lambda x: self._extract_price(x.get('price', '0')))
-        return all_results[:max_total_results]
+        params = (min_price, max_price, max_results_per_dataset, max_total_results, currency)
+        return self._cached('search_by_price_range', params, compute)
     
     def search_with_discounts(self, min_discount_percentage=10, max_results_per_dataset=3, max_total_results=15):
         """Search for products with discounts across all datasets"""
-        all_results = []
+        def compute():
+            calls = [
+                (dataset_name, 'search_with_discount', (min_discount_percentage, max_results_per_dataset))
+                for dataset_name, search_engine in self.search_engines.items()
+                if hasattr(search_engine, 'search_with_discount')
+            ]
+            all_results, timed_out = self._fan_out(calls, ' for discounts')
+            
+            return SearchResults(all_results[:max_total_results], timed_out)
         
-        for dataset_name, search_engine in self.search_engines.items():
+        params = (min_discount_percentage, max_results_per_dataset, max_total_results)
+        return self._cached('search_with_discounts', params, compute)
+    
+    def reload(self, dataset_name=None):
+        """Reload one dataset (or all of them) from disk"""
+        if dataset_name is not None and dataset_name not in self.search_engines:
+            raise ValueError(f"Dataset '{dataset_name}' not found. Available datasets: {list(self.search_engines.keys())}")
+        
+        names = [dataset_name] if dataset_name else list(self.search_engines.keys())
+        for name in names:
             try:
-                if hasattr(search_engine, 'search_with_discount'):
-                    results = search_engine.search_with_discount(min_discount_percentage, max_results_per_dataset)
-                    all_results.extend(results)
+                self.search_engines[name].reload()
             except Exception as e:
-                print(f"[MasterSearch] Error searching {dataset_name} for discounts: {e}")
-                continue
+                print(f"[MasterSearch] Error reloading {name}: {e}")
         
-        return all_results[:max_total_results]
+        # Cached results were computed from the old data
+        if self.cache is not None:
+            self.cache.clear()
+        
+        # Process-pool workers hold their own copies of the datasets
+        if self.fan_out == 'process':
+            self.close()
     
     def get_available_datasets(self):
         """Get list of available datasets with descriptions"""
@@ -150,7 +487,9 @@ class MasterSearch:
                     file_size = os.path.getsize(dataset_path)
                     stats[dataset_name] = {
                         'file_size_mb': round(file_size / (1024 * 1024), 2),
-                        'description': self.dataset_descriptions.get(dataset_name, 'No description available')
+                        'description': self.dataset_descriptions.get(dataset_name, 'No description available'),
+                        'loaded': search_engine.is_loaded,
+                        'rows': len(search_engine.data) if search_engine.is_loaded else None
                     }
                 else:
                     stats[dataset_name] = {
@@ -166,15 +505,6 @@ class MasterSearch:
                 }
         
         return stats
-    
-    def _extract_price(self, price_str):
-        """Extract numeric price from price string for sorting"""
-        try:
-            # Remove currency symbols and commas
-            clean_price = price_str.replace('₹', '').replace('$', '').replace(',', '').replace('â‚¹', '').strip()
-            return float(clean_price) if clean_price and clean_price != 'N/A' else 0
-        except:
-            return 0
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+import heapq
+import math
+import os
+from collections import Counter
+import numpy as np
+
+# "match_count" ranks by how many query keywords a product contains;
+# "bm25" ranks by BM25F relevance normalized to 0..1; "semantic" ranks by
+# cosine similarity of dense TF-IDF/SVD vectors (see semantic.py)
+RANKING_MODES = ('match_count', 'bm25', 'semantic')
+DEFAULT_RANKING = os.getenv('SEARCH_RANKING', 'match_count')
+
+def check_ranking(ranking):
+    """The ranking mode to use, defaulting to DEFAULT_RANKING"""
+    ranking = ranking or DEFAULT_RANKING
+    if ranking not in RANKING_MODES:
+        raise ValueError(f"Unknown ranking '{ranking}'. Available rankings: {list(RANKING_MODES)}")
+    return ranking
+
+def top_k_indices(scores, k):
+    """Positions of the k highest scores, best first.
+
+    Uses a partial partition instead of sorting every candidate; only the k
+    selected positions are sorted. Ties are broken by position (earlier rows
+    first) so the ordering is the same as a stable descending sort.
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+
+    # Score of the k-th best candidate; everything strictly above it is in,
+    # and the earliest candidates tied with it fill the remaining slots
+    threshold = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+
+    order = np.lexsort((selected, -scores[selected]))
+    return selected[order]
+
+def top_k_products(products, k, key):
+    """The k products with the smallest key, ties kept in input order.
+
+    Equivalent to ``sorted(products, key=key)[:k]`` but runs in
+    O(n log k) with a bounded heap.
+    """
+    if k is None:
+        return sorted(products, key=key)
+    return [product for _, product in heapq.nsmallest(k, enumerate(products), key=lambda item: (key(item[1]), item[0]))]
+
+def by_match_count(product):
+    """Sort key ranking products with more matching keywords first"""
+    return -product.get('match_count', 0)
+
+def by_score(product):
+    """Sort key ranking products with a higher relevance score first"""
+    return -product.get('score', 0.0)
+
+def by_price(product):
+    """Sort key ranking cheaper products first and unpriced ones last.
+
+    Uses the canonical-currency price so results from INR and USD datasets
+    are ordered on the same scale.
+    """
+    price = product.get('canonical_price')
+    return price if price is not None else float('inf')
+
+class BM25FScorer:
+    """BM25F relevance over the search fields of one dataset.
+
+    Term statistics are computed once when the dataset is loaded: for every
+    token, the rows it occurs in and its weighted, length-normalized term
+    frequency summed over the fields (a match in a heavily weighted field
+    such as the title counts more, and a match in a long field counts less
+    than one in a short field).
+
+    Query keywords keep the substring semantics of the index: a keyword's
+    term frequency is the sum over the vocabulary tokens that contain it.
+    Scores are divided by the best score the query could reach (every
+    keyword saturated), so they fall in 0..1 and can be merged across
+    datasets. Keywords a dataset lacks still count towards that maximum,
+    so partial matches score lower.
+    """
+
+    def __init__(self, field_texts, k1=1.2, b=0.75):
+        """``field_texts`` is a list of ``(weight, lowercased texts)``, one per field"""
+        self.k1 = k1
+        self.b = b
+        self.size = max((len(texts) for _, texts in field_texts), default=0)
+
+        vocabulary = {}
+        token_ids, rows, values = [], [], []
+        for weight, texts in field_texts:
+            token_lists = [text.split() if text else [] for text in texts]
+            lengths = np.array([len(tokens) for tokens in token_lists], dtype=float)
+            average_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+            scales = weight / (1 - b + b * lengths / average_length)
+            for row_id, tokens in enumerate(token_lists):
+                for token, tf in Counter(tokens).items():
+                    token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                    rows.append(row_id)
+                    values.append(tf * scales[row_id])
+
+        # Sum the fields of each (token, row) pair, ordered by token then row
+        keys = np.array(token_ids, dtype=np.int64) * max(self.size, 1) + np.array(rows, dtype=np.int64)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.bincount(inverse, weights=np.array(values, dtype=float), minlength=len(keys))
+        token_ids, rows = np.divmod(keys, max(self.size, 1))
+
+        # token -> (row ids, weighted term frequency), one entry per row
+        tokens = list(vocabulary)
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(token_ids)) + 1, [len(keys)]])
+        self.postings = {
+            tokens[token_ids[start]]: (rows[start:end], values[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        } if len(keys) else {}
+
+    def idf(self, document_frequency):
+        return math.log(1 + (self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def score(self, keyword_tokens, document_frequencies, row_ids):
+        """Normalized scores of the given rows.
+
+        ``keyword_tokens`` holds, per keyword, the vocabulary tokens that
+        contain it, and ``document_frequencies`` the number of rows matching
+        each keyword.
+        """
+        scores = np.zeros(self.size)
+        max_score = 0.0
+        for tokens, document_frequency in zip(keyword_tokens, document_frequencies):
+            idf = self.idf(document_frequency)
+            max_score += idf * (self.k1 + 1)
+            if not tokens:
+                continue
+            tf = np.zeros(self.size)
+            for token in tokens:
+                token_rows, token_values = self.postings[token]
+                tf[token_rows] += token_values
+            scores += idf * tf * (self.k1 + 1) / (self.k1 + tf)
+
+        if max_score == 0:
+            return np.zeros(len(row_ids))
+        return scores[row_ids] / max_score
@@ -0,0 +1,123 @@
+"""
+Compact product cards.
+
+A search result card used to be a dict with 10-20 string keys, built for
+every candidate row and copied again by the result cache. ``ProductRecord``
+holds only a list of values and a reference to a ``RecordSchema`` shared by
+every card of the same shape, so the keys are stored once per engine instead
+of once per card. Engines fill a record's values directly (``from_values``),
+without building a dict first. Records behave like (mutable) mappings inside
+the search package; the API converts them to plain dicts with ``to_dict``
+when it serializes a response.
+"""
+
+from collections.abc import MutableMapping
+
+# Fields the search pipeline adds to engine cards, in the order it adds them
+CARD_EXTRA_FIELDS = ('price_value', 'price_currency', 'canonical_price', 'match_count', 'score', 'corrected')
+
+# Placeholder for fields a record does not have (e.g. 'score' outside BM25)
+_MISSING = object()
+
+class RecordSchema:
+    """Ordered field names of one record shape and the position of each"""
+
+    __slots__ = ('fields', 'positions')
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.positions = {field: position for position, field in enumerate(self.fields)}
+
+    def __reduce__(self):
+        # Unpickled schemas are interned again, so records keep sharing them
+        return (schema_for, (self.fields,))
+
+_schemas = {}
+
+def schema_for(fields):
+    """The shared schema for these field names"""
+    fields = tuple(fields)
+    schema = _schemas.get(fields)
+    if schema is None:
+        schema = _schemas.setdefault(fields, RecordSchema(fields))
+    return schema
+
+def card_schema(fields, extra_fields=CARD_EXTRA_FIELDS):
+    """The shared schema of cards with these fields, plus room for the pipeline's extra fields"""
+    fields = tuple(fields)
+    return schema_for(fields + tuple(field for field in extra_fields if field not in fields))
+
+class ProductRecord(MutableMapping):
+    """A product card stored as a value list over a shared schema.
+
+    Reads, writes, ``in``, iteration and ``get`` work as on the dict it
+    replaces, and iteration keeps the original key order. Setting a key the
+    schema does not have switches the record to a (shared) wider schema.
+    """
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    @classmethod
+    def from_values(cls, schema, values):
+        """Record holding ``values`` for the leading fields of the schema; the rest start out missing"""
+        values = list(values)
+        values.extend([_MISSING] * (len(schema.fields) - len(values)))
+        return cls(schema, values)
+
+    @classmethod
+    def from_card(cls, card, extra_fields=CARD_EXTRA_FIELDS):
+        """Record holding a card dict's fields, with room for the pipeline's extra fields"""
+        return cls.from_values(card_schema(card, extra_fields), card.values())
+
+    def __getitem__(self, key):
+        position = self._schema.positions.get(key)
+        value = _MISSING if position is None else self._values[position]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        position = self._schema.positions.get(key)
+        value = _MISSING if position is None else self._values[position]
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        position = self._schema.positions.get(key)
+        return position is not None and self._values[position] is not _MISSING
+
+    def __setitem__(self, key, value):
+        position = self._schema.positions.get(key)
+        if position is None:
+            self._schema = schema_for(self._schema.fields + (key,))
+            self._values.append(value)
+        else:
+            self._values[position] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._values[self._schema.positions[key]] = _MISSING
+
+    def __iter__(self):
+        return (field for field, value in zip(self._schema.fields, self._values) if value is not _MISSING)
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not _MISSING)
+
+    def __reduce__(self):
+        # Pickled through the dict form, since the missing-value marker is process-local
+        return (ProductRecord.from_card, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"ProductRecord({self.to_dict()!r})"
+
+    def copy(self):
+        return ProductRecord(self._schema, list(self._values))
+
+    def to_dict(self):
+        """JSON-ready dict of the card, for API responses"""
+        return {field: value for field, value in zip(self._schema.fields, self._values) if value is not _MISSING}
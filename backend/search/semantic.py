@@ -0,0 +1,244 @@
+"""
+Offline semantic search (latent semantic analysis).
+
+Every product's search-field text becomes a TF-IDF vector, and a truncated
+SVD of the TF-IDF matrix projects those vectors into a small dense space in
+which words that occur in similar products ("camera", "megapixel", "lens")
+end up close together. Queries are projected the same way and answered by
+cosine similarity, so a product can match without containing the query's
+words. Everything is computed locally with NumPy.
+
+The document matrix is computed once per dataset content and saved as a
+snapshot (see ``snapshots``); later loads of the same data read it back
+instead of recomputing it. Large catalogs also get an inverted-file (IVF)
+index: the vectors are clustered with k-means, and a query only scores the
+rows of the few clusters closest to it.
+"""
+
+import hashlib
+import os
+import re
+from collections import Counter
+import numpy as np
+from .ranking import top_k_indices
+from .snapshots import load_snapshot, save_snapshot
+
+# Size of the dense vectors and of the TF-IDF vocabulary they are built from
+DIMENSIONS = int(os.getenv('SEARCH_SEMANTIC_DIMENSIONS', '128'))
+MAX_VOCABULARY = int(os.getenv('SEARCH_SEMANTIC_MAX_VOCABULARY', '20000'))
+# Rows less similar than this to a query are not returned
+MIN_SIMILARITY = float(os.getenv('SEARCH_SEMANTIC_MIN_SIMILARITY', '0.3'))
+# Catalogs with at least this many rows are searched through an IVF index,
+# probing this many clusters per query
+IVF_MIN_ROWS = int(os.getenv('SEARCH_SEMANTIC_IVF_MIN_ROWS', '50000'))
+IVF_PROBES = int(os.getenv('SEARCH_SEMANTIC_IVF_PROBES', '8'))
+
+# Bumped whenever the way vectors are computed changes, to invalidate snapshots
+FORMAT_VERSION = 1
+# Products multiplied per chunk in sparse and dense matrix products
+CHUNK_SIZE = 1 << 16
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    """Alphanumeric words of a lowercased text"""
+    return TOKEN_PATTERN.findall(text) if text else []
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class _SparseMatrix:
+    """Coordinate-format sparse matrix with the two products the SVD needs"""
+
+    def __init__(self, rows, cols, values, shape):
+        self.rows, self.cols, self.values, self.shape = rows, cols, values, shape
+
+    def dot(self, matrix):
+        """self @ matrix"""
+        return self._accumulate(self.rows, self.cols, matrix, self.shape[0])
+
+    def tdot(self, matrix):
+        """self.T @ matrix"""
+        return self._accumulate(self.cols, self.rows, matrix, self.shape[1])
+
+    def _accumulate(self, out_ids, in_ids, matrix, size):
+        out = np.zeros((size, matrix.shape[1]))
+        for start in range(0, len(self.values), CHUNK_SIZE):
+            chunk = slice(start, start + CHUNK_SIZE)
+            np.add.at(out, out_ids[chunk], self.values[chunk, None] * matrix[in_ids[chunk]])
+        return out
+
+def _truncated_svd(matrix, dimensions, power_iterations=4, seed=0):
+    """Top right singular vectors of a sparse matrix (randomized range finder).
+
+    Returns a ``(vocabulary, dimensions)`` projection. The random start is
+    seeded so rebuilding from the same data gives the same vectors.
+    """
+    rows, columns = matrix.shape
+    sample = min(dimensions + 10, rows, columns)
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(matrix.dot(rng.standard_normal((columns, sample))))
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(matrix.tdot(basis))
+        basis, _ = np.linalg.qr(matrix.dot(basis))
+    _, _, right = np.linalg.svd(matrix.tdot(basis).T, full_matrices=False)
+    return right[:dimensions].T
+
+def _nearest_centroids(vectors, centroids):
+    """Index of the most similar centroid for every vector"""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), CHUNK_SIZE):
+        assignment[start:start + CHUNK_SIZE] = np.argmax(vectors[start:start + CHUNK_SIZE] @ centroids.T, axis=1)
+    return assignment
+
+def _kmeans(vectors, clusters, iterations=10, seed=0):
+    """Spherical k-means; returns unit centroids and each vector's cluster"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)]
+    for _ in range(iterations):
+        assignment = _nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = np.bincount(assignment, minlength=clusters) > 0
+        centroids[filled] = _normalize_rows(sums[filled])
+    return centroids, _nearest_centroids(vectors, centroids)
+
+class SemanticIndex:
+    """Dense unit vectors of every row plus what is needed to embed queries"""
+
+    def __init__(self, vocabulary, idf, projection, vectors, centroids=None, list_rows=None, list_offsets=None):
+        self.vocabulary = {token: token_id for token_id, token in enumerate(vocabulary)}
+        self.idf = idf
+        self.projection = projection
+        self.vectors = vectors
+        # IVF lists: the rows of cluster c are list_rows[list_offsets[c]:list_offsets[c + 1]]
+        self.centroids = centroids if centroids is not None and len(centroids) else None
+        self.list_rows = list_rows
+        self.list_offsets = list_offsets
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, field_texts, dimensions=DIMENSIONS, max_vocabulary=MAX_VOCABULARY, ivf_min_rows=IVF_MIN_ROWS):
+        """Index ``(weight, lowercased texts)`` fields, one text per row in each"""
+        size = max((len(texts) for _, texts in field_texts), default=0)
+
+        # Field-weighted term counts per row
+        row_terms = [Counter() for _ in range(size)]
+        for weight, texts in field_texts:
+            for terms, text in zip(row_terms, texts):
+                for token in tokenize(text):
+                    terms[token] += weight
+
+        # Words seen in a single row cannot relate rows to each other
+        document_frequency = Counter(token for terms in row_terms for token in terms)
+        kept = sorted((token for token, frequency in document_frequency.items() if frequency > 1),
+                      key=lambda token: (-document_frequency[token], token))[:max_vocabulary]
+        vocabulary = {token: token_id for token_id, token in enumerate(kept)}
+        idf = np.log((1 + size) / (1 + np.array([document_frequency[token] for token in kept], dtype=float))) + 1
+
+        rows, cols, values = [], [], []
+        for row_id, terms in enumerate(row_terms):
+            for token, count in terms.items():
+                token_id = vocabulary.get(token)
+                if token_id is not None:
+                    rows.append(row_id)
+                    cols.append(token_id)
+                    values.append(count)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        # Sublinear term frequency: a word repeated in a row counts a little more
+        counts = np.array(values, dtype=float)
+        values = np.where(counts >= 1, 1 + np.log(np.maximum(counts, 1)), counts) * idf[cols]
+        # Unit-length TF-IDF rows, so long descriptions do not dominate
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=size))
+        values = values / norms[rows] if len(rows) else values
+
+        dimensions = min(dimensions, len(kept), size)
+        if dimensions == 0:
+            return cls(kept, idf, np.zeros((len(kept), 0)), np.zeros((size, 0), dtype=np.float32))
+
+        matrix = _SparseMatrix(rows, cols, values, (size, len(kept)))
+        projection = _truncated_svd(matrix, dimensions)
+        vectors = _normalize_rows(matrix.dot(projection)).astype(np.float32)
+
+        if size < max(ivf_min_rows, 1):
+            return cls(kept, idf, projection, vectors)
+        centroids, assignment = _kmeans(vectors, int(np.sqrt(size)))
+        list_rows = np.argsort(assignment, kind='stable')
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        return cls(kept, idf, projection, vectors, centroids, list_rows, list_offsets)
+
+    @classmethod
+    def load_or_build(cls, name, field_texts, **options):
+        """Read the index from its snapshot, building and saving it when missing or stale"""
+        key = cls.snapshot_key(field_texts, **options)
+        arrays = load_snapshot(name, key)
+        if arrays is not None:
+            return cls(
+                arrays['vocabulary'].tolist(), arrays['idf'], arrays['projection'], arrays['vectors'],
+                arrays['centroids'], arrays['list_rows'], arrays['list_offsets']
+            )
+        index = cls.build(field_texts, **options)
+        save_snapshot(name, key, index.to_arrays())
+        return index
+
+    @staticmethod
+    def snapshot_key(field_texts, **options):
+        """Digest of everything the vectors depend on: the texts, their weights and the settings"""
+        settings = {'dimensions': DIMENSIONS, 'max_vocabulary': MAX_VOCABULARY, 'ivf_min_rows': IVF_MIN_ROWS}
+        settings.update(options)
+        digest = hashlib.sha256(f'{FORMAT_VERSION}|{sorted(settings.items())}'.encode())
+        for weight, texts in field_texts:
+            digest.update(f'|{weight}|'.encode())
+            digest.update('\x1f'.join(text or '' for text in texts).encode())
+        return digest.hexdigest()
+
+    def to_arrays(self):
+        empty = np.empty(0, dtype=np.int64)
+        return {
+            'vocabulary': np.array(list(self.vocabulary), dtype=str),
+            'idf': self.idf,
+            'projection': self.projection,
+            'vectors': self.vectors,
+            'centroids': self.centroids if self.centroids is not None else np.empty((0, self.vectors.shape[1]), dtype=np.float32),
+            'list_rows': self.list_rows if self.list_rows is not None else empty,
+            'list_offsets': self.list_offsets if self.list_offsets is not None else empty
+        }
+
+    def embed(self, keyword_lists):
+        """Unit vectors of queries given as keyword lists (zero for unknown words)"""
+        queries = np.zeros((len(keyword_lists), self.projection.shape[1]))
+        for query_vector, keywords in zip(queries, keyword_lists):
+            token_ids = {self.vocabulary[token] for keyword in keywords for token in tokenize(keyword) if token in self.vocabulary}
+            for token_id in token_ids:
+                query_vector += self.idf[token_id] * self.projection[token_id]
+        return _normalize_rows(queries).astype(np.float32)
+
+    def search_many(self, keyword_lists, min_similarity=MIN_SIMILARITY):
+        """``(row_ids, similarities)`` of the rows close enough to each query.
+
+        Exact search scores every row of every query with one matrix product;
+        with an IVF index each query scores only its closest clusters.
+        """
+        queries = self.embed(keyword_lists)
+        results = []
+        if self.centroids is None:
+            all_rows = np.arange(len(self.vectors))
+            similarities = self.vectors @ queries.T
+            for column in range(len(queries)):
+                keep = similarities[:, column] >= min_similarity
+                results.append((all_rows[keep], similarities[keep, column]))
+            return results
+
+        centroid_similarities = queries @ self.centroids.T
+        for query, scores in zip(queries, centroid_similarities):
+            probed = top_k_indices(scores, IVF_PROBES)
+            row_ids = np.sort(np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probed]))
+            similarities = self.vectors[row_ids] @ query
+            keep = similarities >= min_similarity
+            results.append((row_ids[keep], similarities[keep]))
+        return results
@@ -0,0 +1,71 @@
+"""
+Process-wide search service.
+
+The API modules share one MasterSearch per process through
+``get_master_search()``. Nothing heavy happens at import time: the search
+engines (and pandas/numpy) are imported when the service is first used, and
+each dataset is parsed on its first query or during ``start_warmup()``.
+
+Async callers use ``search_async()``, which runs the CPU-bound search on a
+dedicated thread pool (``SEARCH_ASYNC_WORKERS`` threads) so it neither
+blocks the event loop nor competes with the server's default threadpool.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_ASYNC_WORKERS = int(os.getenv('SEARCH_ASYNC_WORKERS', '8'))
+
+_master_search = None
+_executor = None
+_lock = threading.Lock()
+
+def get_master_search():
+    """The shared MasterSearch instance, created on first use"""
+    global _master_search
+    if _master_search is None:
+        with _lock:
+            if _master_search is None:
+                from .master_search import MasterSearch
+                _master_search = MasterSearch()
+    return _master_search
+
+def get_search_executor():
+    """The thread pool that runs searches issued from async code"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEFAULT_ASYNC_WORKERS, thread_name_prefix='search')
+    return _executor
+
+async def search_async(method_name, *args, **kwargs):
+    """Await a MasterSearch method, e.g. ``await search_async('search_all_datasets', query)``"""
+    call = functools.partial(getattr(get_master_search(), method_name), *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_search_executor(), call)
+
+def shutdown():
+    """Stop the async search pool (a new one is created on next use)"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+def warm_up():
+    """Load every dataset so the first requests do not pay for parsing"""
+    master_search = get_master_search()
+    for dataset_name, search_engine in master_search.search_engines.items():
+        try:
+            search_engine.catalog
+        except Exception as e:
+            print(f"[search.service] Could not warm up {dataset_name}: {e}")
+
+def start_warmup():
+    """Warm the datasets up in a background thread"""
+    thread = threading.Thread(target=warm_up, name='search-warmup', daemon=True)
+    thread.start()
+    return thread
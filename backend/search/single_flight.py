@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _Counters:
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+
+    def stats(self, in_flight):
+        calls = self.executions + self.coalesced
+        return {
+            'calls': calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'coalesced_rate': round(self.coalesced / calls, 4) if calls else 0.0,
+            'in_flight': in_flight
+        }
+
+class SingleFlight(_Counters):
+    """Coalesces concurrent identical calls made from different threads.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result (or exception)
+    instead of repeating the work. Nothing is remembered once the call
+    finishes, so this complements a result cache rather than replacing it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return super().stats(len(self._calls))
+
+class AsyncSingleFlight(_Counters):
+    """SingleFlight for coroutines running on one event loop.
+
+    The shared computation runs as its own task, so a caller that is
+    cancelled (e.g. the client disconnected) does not cancel it for the
+    others waiting on the same key.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = {}
+
+    async def do(self, key, coroutine_fn):
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = self._tasks[key] = asyncio.ensure_future(coroutine_fn())
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark a failure as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return super().stats(len(self._tasks))
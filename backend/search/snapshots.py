@@ -0,0 +1,105 @@
+"""
+On-disk snapshots of data derived from the datasets.
+
+Snapshots are plain ``.npz`` files (no pickled objects) written next to the
+datasets in ``Dataset/.snapshots`` unless ``SEARCH_SNAPSHOT_DIR`` points
+elsewhere; ``SEARCH_SNAPSHOTS=0`` disables reading and writing them. Every
+snapshot records the key it was built for, and a snapshot whose key does not
+match is ignored and rebuilt.
+
+Tables are stored column by column: numeric columns as NumPy arrays, text
+columns as one UTF-8 buffer plus character offsets and a missing-value mask,
+so loading one is a few array reads and a single decode per column.
+"""
+
+import hashlib
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIR = os.getenv('SEARCH_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), '../Dataset/.snapshots'))
+SNAPSHOTS_ENABLED = os.getenv('SEARCH_SNAPSHOTS', '1') != '0'
+
+def file_signature(*paths):
+    """Size, modification time and SHA-256 of files, as one string"""
+    parts = []
+    for path in paths:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(1 << 20), b''):
+                digest.update(block)
+        stat = os.stat(path)
+        parts.append(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}')
+    return '|'.join(parts)
+
+def encode_strings(values):
+    """``(utf-8 buffer, character offsets, missing mask)`` of strings, None for missing"""
+    missing = np.array([value is None for value in values], dtype=bool)
+    texts = ['' if value is None else value for value in values]
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(text) for text in texts])
+    return np.frombuffer(''.join(texts).encode('utf-8'), dtype=np.uint8), offsets, missing
+
+def decode_strings(buffer, offsets, missing):
+    """The strings stored by ``encode_strings``"""
+    text = buffer.tobytes().decode('utf-8')
+    bounds = offsets.tolist()
+    return [None if is_missing else text[start:end] for start, end, is_missing in zip(bounds[:-1], bounds[1:], missing.tolist())]
+
+def encode_table(table, prefix):
+    """Arrays storing every column of a DataFrame under ``prefix``"""
+    arrays = {f'{prefix}columns': np.array(list(map(str, table.columns)), dtype=str)}
+    for position, column in enumerate(table.columns):
+        values = table[column]
+        name = f'{prefix}{position}'
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            arrays[f'{name}.values'] = values.to_numpy()
+        else:
+            strings = [None if pd.isnull(value) else str(value) for value in values]
+            arrays[f'{name}.text'], arrays[f'{name}.offsets'], arrays[f'{name}.missing'] = encode_strings(strings)
+    return arrays
+
+def decode_table(arrays, prefix):
+    """The DataFrame stored by ``encode_table``"""
+    columns = {}
+    for position, column in enumerate(arrays[f'{prefix}columns'].tolist()):
+        name = f'{prefix}{position}'
+        if f'{name}.values' in arrays:
+            columns[column] = arrays[f'{name}.values']
+        else:
+            columns[column] = pd.Series(decode_strings(arrays[f'{name}.text'], arrays[f'{name}.offsets'], arrays[f'{name}.missing']))
+    return pd.DataFrame(columns)
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.npz')
+
+def load_snapshot(name, key):
+    """Arrays of the snapshot when it exists and was built for this key, else None"""
+    if not SNAPSHOTS_ENABLED:
+        return None
+    path = snapshot_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as snapshot:
+            if str(snapshot['key']) != key:
+                return None
+            return {name: snapshot[name] for name in snapshot.files if name != 'key'}
+    except Exception as e:
+        print(f"[snapshots] Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+def save_snapshot(name, key, arrays):
+    """Write the arrays atomically, so readers never see a partial file"""
+    if not SNAPSHOTS_ENABLED:
+        return
+    path = snapshot_path(name)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as snapshot_file:
+            np.savez(snapshot_file, key=np.array(key), **arrays)
+        os.replace(temporary_path, path)
+    except Exception as e:
+        print(f"[snapshots] Could not write snapshot {path}: {e}")
@@ -100,6 +100,595 @@ def test_master_search():
     
     return True
 
+def test_dataset_loaded_once():
+    """Test that an engine parses its CSV once and serves queries from memory"""
+    print("\n💾 Testing Load-Once Dataset Cache...")
+    
+    from search import FlipkartMobilesSearch
+    flipkart_search = FlipkartMobilesSearch()
+    assert not flipkart_search.is_loaded
+    
+    flipkart_search.search("OPPO mobile", max_results=2)
+    table = flipkart_search.data
+    flipkart_search.search_by_brand("Samsung", max_results=2)
+    assert flipkart_search.data is table
+    assert flipkart_search.version == 1
+    
+    flipkart_search.reload()
+    assert flipkart_search.data is not table
+    assert flipkart_search.version == 2
+    print(f"   ✅ {len(table)} rows loaded once and reloaded on demand")
+
+def test_keyword_index():
+    """Test that the inverted index keeps substring keyword semantics"""
+    print("\n🔎 Testing Inverted Keyword Index...")
+    
+    from search.inverted_index import InvertedIndex
+    index = InvertedIndex(["samsung galaxy f22 black", "oppo a53 black", "apple iphone 12"])
+    assert list(index.lookup("sams")) == [0]
+    assert list(index.lookup("black")) == [0, 1]
+    
+    row_ids, counts = index.match_counts(["black", "galaxy", "missing"])
+    assert list(row_ids) == [0, 1]
+    assert list(counts) == [2, 1]
+    print("   ✅ Posting-list union reproduces substring match counts")
+
+def test_execution_modes_agree():
+    """Test that the vectorized path returns the same results as the row scan"""
+    print("\n⚖️ Testing Vectorized vs Iterrows Execution...")
+    
+    from search import FlipkartMobilesSearch, ElectronicsDataSearch
+    for search_engine in (FlipkartMobilesSearch(), ElectronicsDataSearch()):
+        outputs = []
+        for mode in ('iterrows', 'vectorized'):
+            search_engine.execution_mode = mode
+            outputs.append([
+                search_engine.search("samsung black under 20000", max_results=5),
+                search_engine.search("laptop", max_results=5),
+                search_engine.search_by_price_range(min_price=1000, max_price=15000, max_results=5),
+                # BM25 queries with no keywords left after parsing
+                search_engine.search("", max_results=5, ranking='bm25'),
+                search_engine.search("under 10000", max_results=5, ranking='bm25')
+            ])
+        assert outputs[0] == outputs[1]
+        print(f"   ✅ {search_engine.dataset_name}: both execution modes agree")
+
+def test_top_k_selection():
+    """Test that top-k selection matches a stable sort of every candidate"""
+    print("\n🏆 Testing Top-K Selection...")
+    
+    from search.ranking import top_k_indices, top_k_products, by_match_count
+    scores = [1, 3, 0, 3, 2, 1, 3, 2]
+    assert list(top_k_indices(scores, 4)) == [1, 3, 6, 4]
+    assert list(top_k_indices(scores, 20)) == [1, 3, 6, 4, 7, 0, 5, 2]
+    
+    products = [{'title': str(i), 'match_count': score} for i, score in enumerate(scores)]
+    expected = sorted(products, key=by_match_count)[:3]
+    assert top_k_products(products, 3, by_match_count) == expected
+    print("   ✅ Ties are broken by position, deterministically")
+
+def test_price_index():
+    """Test price parsing and sorted price-range lookups"""
+    print("\n💲 Testing Price Index...")
+    
+    from search.base_search import parse_price
+    assert parse_price("₹1,299") == 1299.0
+    assert parse_price("$20.99 ") == 20.99
+    assert parse_price("â‚¹499") == 499.0
+    assert parse_price("N/A") is None
+    
+    from search import FlipkartMobilesSearch
+    flipkart_search = FlipkartMobilesSearch()
+    results = flipkart_search.search_by_price_range(min_price=10000, max_price=15000, max_results=10)
+    prices = [product['price_value'] for product in results]
+    assert prices == sorted(prices)
+    assert all(10000 <= price <= 15000 for price in prices)
+    print(f"   ✅ {len(results)} mobiles between ₹10,000-15,000, cheapest first")
+
+def test_currency_normalization():
+    """Test that price limits and prices share one canonical currency"""
+    print("\n💱 Testing Currency Normalization...")
+    
+    from search.currency import parse_price_limit, to_canonical, EXCHANGE_RATES
+    assert parse_price_limit("saree under 2,000")[0] == 2000
+    assert parse_price_limit("laptop under $500")[0] == 500 * EXCHANGE_RATES['USD']
+    assert parse_price_limit("tv below 300 dollars")[0] == 300 * EXCHANGE_RATES['USD']
+    assert parse_price_limit("samsung galaxy")[0] is None
+    
+    # Aliases match whole words only, longest first
+    from search.currency import detect_currency, normalize_currency
+    assert detect_currency("laptop below 300 dollars") == 'USD'
+    assert detect_currency("Rs. 1,299") == 'INR' and detect_currency("$20.99") == 'USD'
+    assert detect_currency("cars and bikes") == 'INR'
+    assert detect_currency("cars and bikes", default='USD') == 'USD'
+    assert normalize_currency('usd') == normalize_currency('$') == 'USD'
+    try:
+        normalize_currency('xyz')
+        assert False, "unknown currency accepted"
+    except ValueError:
+        pass
+    
+    from search import ElectronicsDataSearch
+    electronics_search = ElectronicsDataSearch()
+    results = electronics_search.search("laptop under $500", max_results=5)
+    assert all(product['price_currency'] == 'USD' for product in results)
+    assert all(product['canonical_price'] <= to_canonical(500, 'USD') for product in results)
+    assert electronics_search.search_by_price_range(100, 500, 5, currency='usd') == electronics_search.search_by_price_range(100, 500, 5, currency='USD')
+    print(f"   ✅ {len(results)} laptops under $500 filtered on canonical prices")
+
+def test_parallel_fan_out():
+    """Test that parallel fan-out matches sequential results and enforces deadlines"""
+    print("\n⚡ Testing Parallel Fan-Out...")
+    
+    import time
+    from search import MasterSearch
+    sequential = MasterSearch(fan_out='sequential')
+    threaded = MasterSearch(fan_out='thread', engine_timeout=0.5)
+    
+    # Loading a dataset for the first time does not count against the budget
+    flipkart_search = threaded.search_engines['flipkart_mobiles']
+    original_read = flipkart_search._read_dataset
+    def slow_read():
+        time.sleep(1)
+        return original_read()
+    flipkart_search._read_dataset = slow_read
+    results = threaded.search_all_datasets("samsung black")
+    assert not results.partial
+    assert results == sequential.search_all_datasets("samsung black")
+    
+    # A slow engine is dropped from the results and reported as timed out
+    electronics_search = threaded.search_engines['electronics']
+    original_search = electronics_search.search
+    def slow_search(*args):
+        time.sleep(1)
+        return original_search(*args)
+    electronics_search.search = slow_search
+    
+    results = threaded.search_all_datasets("laptop samsung")
+    assert results.partial
+    assert results.timed_out == ['electronics']
+    assert all(product['dataset'] != electronics_search.dataset_name for product in results)
+    
+    # Partial results are not cached: the next search gets every dataset
+    electronics_search.search = original_search
+    results = threaded.search_all_datasets("laptop samsung")
+    assert not results.partial
+    assert any(product['dataset'] == electronics_search.dataset_name for product in results)
+    threaded.close()
+    
+    # Process workers load every dataset in the pool initializer, outside the budget
+    processes = MasterSearch(fan_out='process', engine_timeout=0.5, max_workers=2, cache_size=0)
+    try:
+        results = processes.search_all_datasets("samsung black")
+        assert not results.partial
+        assert [p['title'] for p in results] == [p['title'] for p in sequential.search_all_datasets("samsung black")]
+    finally:
+        processes.close()
+    print(f"   ✅ Thread and process fan-out match sequential results ({len(results)} products)")
+
+def test_result_cache():
+    """Test the MasterSearch result cache hits, copies and invalidation"""
+    print("\n🗃️ Testing Result Cache...")
+    
+    from search import MasterSearch
+    master = MasterSearch(fan_out='sequential', cache_size=2, cache_ttl=60)
+    first = master.search_all_datasets("Samsung  Mobile")
+    first[0]['title'] = 'modified by caller'
+    second = master.search_all_datasets("samsung mobile")
+    assert second[0]['title'] != 'modified by caller'
+    assert master.get_cache_stats()['hits'] == 1
+    
+    # Reloading a dataset invalidates results built from the old data
+    master.search_engines['flipkart_mobiles'].reload()
+    master.search_all_datasets("samsung mobile")
+    assert master.get_cache_stats()['hits'] == 1
+    
+    # Least recently used entries are evicted beyond the size bound
+    master.search_all_datasets("oppo")
+    master.search_all_datasets("laptop")
+    stats = master.get_cache_stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    print(f"   ✅ Cache stats: {stats}")
+
+def test_async_search():
+    """Test that search_async matches the synchronous shared search"""
+    print("\n⚡ Testing Async Search...")
+    
+    import asyncio
+    from search import get_master_search, search_async
+    
+    async def run_concurrently(queries):
+        return await asyncio.gather(*(search_async('search_all_datasets', query) for query in queries))
+    
+    queries = ["samsung mobile", "laptop", "oppo under 15000"]
+    async_results = asyncio.run(run_concurrently(queries))
+    for query, results in zip(queries, async_results):
+        expected = get_master_search().search_all_datasets(query)
+        assert [p['title'] for p in results] == [p['title'] for p in expected]
+        print(f"   ✅ '{query}': {len(results)} results")
+
+def test_single_flight():
+    """Test that concurrent identical calls share one execution"""
+    print("\n🛫 Testing Single-Flight Coalescing...")
+    
+    import asyncio
+    import threading
+    import time
+    from search.single_flight import SingleFlight, AsyncSingleFlight
+    
+    executions = []
+    def slow_search():
+        executions.append(1)
+        time.sleep(0.2)
+        return ['result']
+    
+    flight = SingleFlight()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('samsung', slow_search))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [['result']] * 8 and len(executions) == 1
+    assert flight.stats()['coalesced'] == 7 and flight.stats()['in_flight'] == 0
+    
+    async def slow_answer():
+        await asyncio.sleep(0.1)
+        return {'response': 'hello'}
+    
+    async def ask_many():
+        async_flight = AsyncSingleFlight()
+        answers = await asyncio.gather(*(async_flight.do('hi', slow_answer) for _ in range(5)))
+        return answers, async_flight.stats()
+    
+    answers, stats = asyncio.run(ask_many())
+    assert all(answer is answers[0] for answer in answers)
+    assert stats['executions'] == 1 and stats['coalesced'] == 4
+    print(f"   ✅ Stats: {stats}")
+
+def test_search_many():
+    """Test that a batch search matches running the queries one by one"""
+    print("\n📦 Testing Batch Search...")
+    
+    from search import MasterSearch
+    queries = ["samsung mobile", "laptop", "oppo under 15000", "Samsung  Mobile", "zzqx"]
+    
+    master = MasterSearch(fan_out='sequential', cache_size=0)
+    batch = master.search_many(queries)
+    assert len(batch) == len(queries)
+    for query, results in zip(queries, batch):
+        expected = master.search_all_datasets(query)
+        assert [p['title'] for p in results] == [p['title'] for p in expected]
+    assert batch[0] is not batch[3] and batch[0] == batch[3]
+    
+    # Both execution modes evaluate a batch the same way
+    engine = master.search_engines['flipkart_mobiles']
+    vectorized = engine.search_many(queries)
+    engine.execution_mode = 'iterrows'
+    assert [[p['title'] for p in r] for r in engine.search_many(queries)] == [[p['title'] for p in r] for r in vectorized]
+    
+    # A batch warms the cache for single searches
+    cached = MasterSearch(fan_out='sequential')
+    cached.search_many(queries)
+    cached.search_all_datasets("laptop")
+    assert cached.get_cache_stats()['hits'] == 1
+    print(f"   ✅ {len(queries)} queries: {[len(r) for r in batch]} results")
+
+def test_bm25_ranking():
+    """Test BM25 ranking scores, field weights and mode agreement"""
+    print("\n📐 Testing BM25 Ranking...")
+    
+    import numpy as np
+    from search import MasterSearch
+    from search.ranking import BM25FScorer
+    
+    # A title match outweighs the same match in a lighter field
+    scorer = BM25FScorer([(3.0, ['samsung galaxy', 'apple iphone']), (1.0, ['phone', 'samsung'])])
+    scores = scorer.score([['samsung']], [2], np.array([0, 1]))
+    assert scores[0] > scores[1] > 0 and scores.max() < 1
+    
+    master = MasterSearch(fan_out='sequential', cache_size=0, ranking='bm25')
+    results = master.search_all_datasets("samsung galaxy black")
+    assert results and all(0 < p['score'] <= 1 for p in results)
+    assert [p['score'] for p in results] == sorted((p['score'] for p in results), reverse=True)
+    
+    # Both execution modes rank the same way
+    engine = master.search_engines['electronics']
+    queries = ["wireless mouse", "usb cable", "apple watch"]
+    vectorized = engine.search_many(queries, ranking='bm25')
+    engine.execution_mode = 'iterrows'
+    iterrows = engine.search_many(queries, ranking='bm25')
+    assert [[(p['title'], p['score']) for p in r] for r in iterrows] == [[(p['title'], p['score']) for p in r] for r in vectorized]
+    print(f"   ✅ Top BM25 result: {results[0]['title']} ({results[0]['score']})")
+
+def test_typo_tolerance():
+    """Test that misspelled keywords are corrected against the vocabulary"""
+    print("\n🔤 Testing Typo Tolerance...")
+    
+    from search import MasterSearch
+    from search.fuzzy import TrigramIndex, bounded_edit_distance
+    
+    assert bounded_edit_distance('samsng', 'samsung', 1) == 1
+    assert bounded_edit_distance('iphnoe', 'iphone', 1) == 1
+    assert bounded_edit_distance('sari', 'saree', 1, prefix=True) == 1
+    assert bounded_edit_distance('laptop', 'mobile', 2) == 3
+    
+    index = TrigramIndex(['saree', 'samsung', 'oneplus', 'siren'], [5, 10, 3, 1])
+    assert index.closest('sari') == 'saree'
+    assert index.closest('samsnug') == 'samsung'
+    assert index.closest('zzz') is None
+    
+    master = MasterSearch(fan_out='sequential', cache_size=0)
+    for typo, expected in [("samsng", "samsung"), ("motorolla", "motorola"), ("nokai phone", "nokia")]:
+        results = master.search_all_datasets(typo)
+        assert results and expected in results[0]['title'].lower() and results[0].get('corrected'), typo
+        print(f"   ✅ '{typo}' -> {results[0]['title']}")
+    
+    # Exact matches on more keywords win over corrections in other datasets
+    assert not any(p.get('corrected') for p in master.search_all_datasets("wireles mous"))
+    
+    # Keywords that match on their own are never joined, and joins and splits are marked as corrections
+    electronics = master.search_engines['electronics']
+    fuzzy_results = electronics.search("power bank", max_results=50)
+    electronics.fuzzy = False
+    exact_results = electronics.search("power bank", max_results=50)
+    electronics.fuzzy = True
+    assert len(fuzzy_results) == 50 and fuzzy_results == exact_results
+    split = master.search_engines['flipkart_mobiles'].search("oneplus")
+    assert split and all(p.get('corrected') for p in split)
+    
+    # Both execution modes apply the same corrections
+    engine = master.search_engines['flipkart_mobiles']
+    vectorized = engine.search("realmi narzo")
+    engine.execution_mode = 'iterrows'
+    assert [p['title'] for p in engine.search("realmi narzo")] == [p['title'] for p in vectorized]
+
+def test_autocomplete():
+    """Test prefix suggestions ranked by popularity and rebuilt on reload"""
+    print("\n⌨️ Testing Autocomplete...")
+    
+    from search import MasterSearch
+    from search.autocomplete import PrefixIndex
+    
+    index = PrefixIndex([("Samsung Galaxy F22", 3.0), ("Samsung", 1.0), ("Samsung", 4.0), ("Sony Bravia", 2.0)], max_phrases=3)
+    assert [text for text, _ in index.complete("s")] == ["Samsung", "Samsung Galaxy F22", "Sony Bravia"]
+    assert [text for text, _ in index.complete("galaxy")] == ["Samsung Galaxy F22"]
+    assert index.complete("SAMSUNG  gal", limit=1)[0][0] == "Samsung Galaxy F22"
+    assert PrefixIndex([("a", 1), ("b", 2), ("c", 3)], max_phrases=2).complete("a") == []
+    
+    master = MasterSearch()
+    suggestions = master.autocomplete("redmi no", limit=5)
+    assert 0 < len(suggestions) <= 5 and all('redmi note' in text.lower() for text in suggestions)
+    assert master.autocomplete("") == [] and master.autocomplete("zzqx") == []
+    
+    engine = master.search_engines['flipkart_mobiles']
+    old_index = engine.catalog.suggestions
+    engine.reload()
+    assert engine.catalog.suggestions is not old_index
+    print(f"   ✅ 'redmi no' -> {suggestions}")
+
+def test_semantic_search():
+    """Test dense-vector ranking, its IVF index and its on-disk snapshot"""
+    print("\n🧭 Testing Semantic Search...")
+    
+    import tempfile
+    import numpy as np
+    from search import MasterSearch, snapshots
+    from search.semantic import SemanticIndex
+    
+    titles = ["canon dslr camera lens", "nikon camera lens kit", "sony camera zoom lens",
+              "cotton saree silk", "silk saree red", "banarasi silk saree"] * 20
+    field_texts = [(1.0, titles)]
+    exact = SemanticIndex.build(field_texts, dimensions=2)
+    approximate = SemanticIndex.build(field_texts, dimensions=2, ivf_min_rows=10)
+    assert exact.centroids is None and approximate.centroids is not None
+    for index in (exact, approximate):
+        (row_ids, similarities), = index.search_many([["lens"]])
+        assert len(row_ids) and all("lens" in titles[row_id] for row_id in row_ids[similarities > 0.9])
+    # "nikon" alone still finds other cameras, which never mention it
+    (row_ids, _), = exact.search_many([["nikon"]])
+    assert any("canon" in titles[row_id] for row_id in row_ids)
+    assert not any("saree" in titles[row_id] for row_id in row_ids)
+    
+    snapshot_dir, snapshots.SNAPSHOT_DIR = snapshots.SNAPSHOT_DIR, tempfile.mkdtemp()
+    try:
+        saved = SemanticIndex.load_or_build("test-semantic", field_texts, dimensions=2)
+        loaded = SemanticIndex.load_or_build("test-semantic", field_texts, dimensions=2)
+        assert np.array_equal(saved.vectors, loaded.vectors) and loaded.vocabulary == saved.vocabulary
+        changed = SemanticIndex.load_or_build("test-semantic", [(1.0, titles[:-1] + ["tripod"])], dimensions=2)
+        assert len(changed.vectors) == len(titles) and changed.vocabulary != saved.vocabulary
+    finally:
+        snapshots.SNAPSHOT_DIR = snapshot_dir
+    
+    master = MasterSearch()
+    results = master.search_all_datasets("samsung galaxy", ranking="semantic")
+    assert results and all(0 < product['score'] <= 1 for product in results)
+    assert [product['score'] for product in results] == sorted((product['score'] for product in results), reverse=True)
+    assert master.search_engines['flipkart_mobiles'].search("under 10000", 3, ranking="semantic")
+    # The vectors are built from the lowercased columns the catalog already keeps
+    engine = master.search_engines['electronics']
+    for field, values in engine._search_columns(engine.catalog):
+        assert values is engine.catalog.text(field)
+    print(f"   ✅ Top semantic match for 'samsung galaxy': {results[0]['title']} ({results[0]['score']})")
+
+def test_facets():
+    """Test facet counts over the full result set of a search"""
+    print("\n🗂️ Testing Facets...")
+    
+    import numpy as np
+    from search import MasterSearch
+    from search.facets import FacetIndex, merge_facets
+    
+    index = FacetIndex({'brand': ['Apple', 'Samsung', None, 'Samsung', ' Samsung ']}, np.array([500.0, 25000.0, np.nan, 7000.0, 120000.0]))
+    counts = index.counts(np.array([0, 1, 2, 3, 4]))
+    assert counts['brand'] == {'Samsung': 3, 'Apple': 1}
+    assert list(counts['price']) == ['under INR 1,000', 'INR 5,000-10,000', 'INR 20,000-50,000', 'INR 100,000+']
+    assert index.counts(np.array([0]), limit=1)['brand'] == {'Apple': 1}
+    assert index.counts(np.array([0, 1, 2, 3, 4]), limit=None)['brand'] == {'Samsung': 3, 'Apple': 1}
+    # Values outside one dataset's top values still add up across datasets
+    merged = merge_facets([index.counts(np.array([0, 1, 3]), limit=None), {'brand': {'Apple': 2, 'Sony': 1}}], limit=1)
+    assert merged['brand'] == {'Apple': 3}
+    assert merge_facets([{'brand': {'Apple': 1}, 'memory': {}}, {'brand': {'Apple': 2, 'Sony': 5}}]) == {'brand': {'Sony': 5, 'Apple': 3}}
+    
+    master = MasterSearch()
+    engine = master.search_engines['flipkart_mobiles']
+    products, facets = engine.faceted_search("samsung", 3)
+    matching = int(engine.catalog.contains('Brand', 'samsung').sum())
+    assert len(products) == 3 and facets['brand'] == {'SAMSUNG': matching}
+    assert sum(facets['storage'].values()) <= matching
+    
+    results = master.search_all_datasets("samsung", include_facets=True)
+    assert results.facets['brand']['SAMSUNG'] == matching and 'price' in results.facets
+    assert master.search_all_datasets("samsung").facets is None
+    cached = master.search_all_datasets("samsung", include_facets=True)
+    cached.facets['brand'].clear()
+    assert master.search_all_datasets("samsung", include_facets=True).facets['brand']
+    print(f"   ✅ 'samsung' facets: {sorted(results.facets)}")
+
+def test_flipkart_variants():
+    """Test that Flipkart colour variants are collapsed into one product"""
+    print("\n🎨 Testing Flipkart Variant Collapse...")
+    
+    import pandas as pd
+    from search import FlipkartMobilesSearch
+    
+    engine = FlipkartMobilesSearch()
+    raw = pd.read_csv(engine.dataset_path)
+    keys = ['Brand', 'Model', 'Memory', 'Storage']
+    assert len(engine.data) == len(raw.drop_duplicates(keys)) < len(raw)
+    
+    results = engine.search("oppo a53", 10)
+    products = [(product['title'], product['memory'], product['storage']) for product in results]
+    assert len(products) == len(set(products)), "Colour duplicates in results"
+    
+    a53 = next(product for product in results if product['title'] == 'OPPO A53' and product['memory'] == '4 GB')
+    variants = raw[(raw['Model'] == 'A53') & (raw['Memory'] == '4 GB') & (raw['Storage'] == '64 GB')]
+    assert set(a53['colors']) == set(variants['Color'])
+    assert a53['price_min'] == variants['Selling Price'].min() and a53['price_max'] == variants['Selling Price'].max()
+    assert a53['price_value'] == a53['price_min']
+    
+    # A product is found under a price limit when any of its variants is
+    for product in engine.search("samsung under 10000", 10):
+        assert product['price_min'] <= 10000
+    print(f"   ✅ {len(raw)} rows -> {len(engine.data)} products; OPPO A53 colours: {a53['colors']}")
+
+def test_product_records():
+    """Test compact product records and their conversion at the API boundary"""
+    print("\n🧱 Testing Product Records...")
+    
+    import pickle
+    from search import MasterSearch
+    from search.records import ProductRecord
+    
+    card = {'title': 'Phone', 'price': '₹100'}
+    record = ProductRecord.from_card(card)
+    other = ProductRecord.from_card({'title': 'Tablet', 'price': '₹200'})
+    assert record._schema is other._schema
+    assert record == card and list(record) == ['title', 'price'] and 'score' not in record
+    record['score'] = 0.5
+    record['badge'] = 'new'
+    assert record.get('score') == 0.5 and record.to_dict() == {'title': 'Phone', 'price': '₹100', 'score': 0.5, 'badge': 'new'}
+    copy = record.copy()
+    copy['title'] = 'Changed'
+    del copy['score']
+    assert record['title'] == 'Phone' and 'score' in record and 'score' not in copy
+    assert pickle.loads(pickle.dumps(record)) == record
+    
+    # Engines fill records straight from the column arrays, sharing one schema
+    master = MasterSearch()
+    engine = master.search_engines['flipkart_mobiles']
+    cards = engine.search_by_price_range(max_price=20000, max_results=3)
+    assert len(cards) == 3 and all(card._schema is engine._card_schema for card in cards)
+    assert list(cards[0])[:len(engine.card_fields)] == list(engine.card_fields)
+    engine.execution_mode = 'iterrows'
+    assert engine.search_by_price_range(max_price=20000, max_results=3) == cards
+    
+    results = master.search_all_datasets("samsung galaxy")
+    assert results and all(isinstance(product, ProductRecord) for product in results)
+    dicts = results.to_dicts()
+    assert all(type(product) is dict for product in dicts) and dicts[0]['title'] == results[0]['title']
+    print(f"   ✅ {len(results)} records, first: {dicts[0]['title']}")
+
+def test_table_snapshots():
+    """Test that parsed datasets are reloaded from their snapshot and rebuilt when the file changes"""
+    print("\n💾 Testing Table Snapshots...")
+    
+    import shutil
+    import tempfile
+    import pandas as pd
+    from search import FlipkartMobilesSearch, base_search, snapshots
+    
+    workdir = tempfile.mkdtemp()
+    settings = snapshots.SNAPSHOT_DIR, snapshots.SNAPSHOTS_ENABLED
+    sources = base_search.SNAPSHOT_SOURCES
+    snapshots.SNAPSHOT_DIR, snapshots.SNAPSHOTS_ENABLED = workdir, True
+    try:
+        engine = FlipkartMobilesSearch()
+        engine.dataset_path = shutil.copy(engine.dataset_path, os.path.join(workdir, 'Flipkart_Mobiles.csv'))
+        expected = engine.search("samsung galaxy under 15000", 5)
+        assert os.path.exists(snapshots.snapshot_path('Flipkart_Mobiles-table'))
+        
+        # A fresh snapshot replaces CSV parsing entirely
+        parse_dataset = engine._parse_dataset
+        engine._parse_dataset = lambda: (_ for _ in ()).throw(AssertionError("CSV parsed despite a fresh snapshot"))
+        engine.reload()
+        assert engine.search("samsung galaxy under 15000", 5) == expected
+        assert engine.catalog.text('Brand').equals(engine.catalog.table['Brand'].str.lower().astype(object))
+        
+        # Changing the file invalidates it
+        engine._parse_dataset = parse_dataset
+        with open(engine.dataset_path, 'a') as dataset_file:
+            dataset_file.write('ZZPhone,Z1,Red,4 GB,64 GB,4.0,9999,10999\n')
+        engine.reload()
+        assert engine.search("zzphone", 1)[0]['title'] == 'ZZPhone Z1'
+        pd.testing.assert_frame_equal(engine._read_dataset().table, engine.data)
+        
+        # So does editing a module the parsed columns depend on (a copy stands in for currency.py)
+        assert any(path.endswith('currency.py') for path in base_search.SNAPSHOT_SOURCES)
+        parsing_module = shutil.copy(base_search.SNAPSHOT_SOURCES[1], workdir)
+        base_search.SNAPSHOT_SOURCES = sources + (parsing_module,)
+        engine.reload()
+        parses = []
+        engine._parse_dataset = lambda: parses.append(1) or parse_dataset()
+        engine.reload()
+        assert not parses
+        with open(parsing_module, 'a') as module_file:
+            module_file.write('\n# edited\n')
+        engine.reload()
+        assert parses == [1]
+    finally:
+        snapshots.SNAPSHOT_DIR, snapshots.SNAPSHOTS_ENABLED = settings
+        base_search.SNAPSHOT_SOURCES = sources
+        shutil.rmtree(workdir)
+    print("   ✅ Snapshot reused while fresh and rebuilt after a data or code change")
+
+def test_electronics_discounts():
+    """Test that electronics discounts are parsed amounts compared as percentages"""
+    print("\n🏷️ Testing Electronics Discounts...")
+    
+    from search import ElectronicsDataSearch
+    from search.electronics_data_search import discount_percentage, parse_discount_amount
+    from search.base_search import parse_price
+    assert parse_discount_amount("After $200 OFF") == 200.0
+    assert parse_discount_amount("$1,299.99 After $300 OFF") == 300.0
+    assert parse_discount_amount("Price valid through 1/14/24") is None
+    assert parse_discount_amount("No Discount") is None
+    
+    search_engine = ElectronicsDataSearch()
+    outputs = []
+    for mode in ('iterrows', 'vectorized'):
+        search_engine.execution_mode = mode
+        outputs.append([search_engine.search_with_discount(30, max_results=50), search_engine.search_with_discount(max_results=500)])
+    assert outputs[0] == outputs[1]
+    
+    strong, every = outputs[1]
+    assert strong and len(strong) < len(every)
+    for card in every:
+        assert parse_discount_amount(card['discount']) is not None
+    for card in strong:
+        assert discount_percentage(parse_discount_amount(card['discount']), parse_price(card['price'])) >= 30
+    print(f"   ✅ {len(strong)} of {len(every)} discounted electronics are at least 30% off")
+
 def test_dataset_access():
     """Test if all dataset files are accessible"""
     print("\n📁 Testing Dataset File Access...")
@@ -144,6 +733,31 @@ def main():
         print("\n❌ Master search tests failed.")
         return
     
+    # Test the search internals (each raises AssertionError on failure)
+    for test in (
+        test_dataset_loaded_once,
+        test_keyword_index,
+        test_execution_modes_agree,
+        test_top_k_selection,
+        test_price_index,
+        test_currency_normalization,
+        test_parallel_fan_out,
+        test_result_cache,
+        test_async_search,
+        test_single_flight,
+        test_search_many,
+        test_bm25_ranking,
+        test_typo_tolerance,
+        test_autocomplete,
+        test_semantic_search,
+        test_facets,
+        test_flipkart_variants,
+        test_product_records,
+        test_table_snapshots,
+        test_electronics_discounts,
+    ):
+        test()
+    
     print("\n🎉 All tests passed successfully!")
     print("\n✅ Your e-commerce search system is working correctly.")
     print("\n📚 You can now use the search engines in your application:")
@@ -529,6 +529,41 @@ if (chatInput) {
   });
 }
 
+// Type-ahead suggestions from the product catalogue
+if (chatInput) {
+  const suggestionList = document.createElement("datalist");
+  suggestionList.id = "user-input-suggestions";
+  document.body.appendChild(suggestionList);
+  chatInput.setAttribute("list", suggestionList.id);
+  chatInput.setAttribute("autocomplete", "off");
+
+  let autocompleteTimer = null;
+  chatInput.addEventListener("input", function () {
+    clearTimeout(autocompleteTimer);
+    const prefix = chatInput.value.trim();
+    if (prefix.length < 2) {
+      suggestionList.innerHTML = "";
+      return;
+    }
+    autocompleteTimer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `http://127.0.0.1:8000/autocomplete?q=${encodeURIComponent(prefix)}&limit=8`
+        );
+        const data = await response.json();
+        suggestionList.innerHTML = "";
+        (data.suggestions || []).forEach((suggestion) => {
+          const option = document.createElement("option");
+          option.value = suggestion;
+          suggestionList.appendChild(option);
+        });
+      } catch (err) {
+        console.error("Autocomplete error:", err);
+      }
+    }, 150);
+  });
+}
+
 // Featured Products Data and Rendering
 const featuredProducts = [
   {